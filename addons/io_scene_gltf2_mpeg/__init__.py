@@ -8,11 +8,11 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and limitations under the License.
 
-import importlib
-import inspect
-import pkgutil
-from pathlib import Path
 from .blender.ui.anchoring import register_xr_anchors, unregister_xr_anchors
+from .blender.ui.media_export import register_media_export, unregister_media_export
+from .blender.ui.scene_export import register_scene_export, unregister_scene_export
+from .blender.ui.media_proxy import register_media_proxy, unregister_media_proxy
+from .blender.ui.player_cost import register_player_cost, unregister_player_cost, draw_player_cost
 
 import bpy
 import logging
@@ -60,6 +60,221 @@ class MPEG_ExporterProperties(bpy.types.PropertyGroup):
         default=True,
     )
 
+    background_media_export: bpy.props.BoolProperty(
+        name='background media export',
+        description='Copy media files after the glTF export returns, with progress in the status bar. Press Esc to cancel',
+        default=True,
+    )
+
+    media_export_workers: bpy.props.IntProperty(
+        name='media export workers',
+        description='Number of media files copied or built concurrently',
+        default=4,
+        min=1,
+        max=32,
+    )
+
+    media_store: bpy.props.StringProperty(
+        name='media store',
+        description='Directory shared by exports, where media files are stored once, named after their content. '
+                    'Media are copied next to the glTF when empty',
+        default='',
+        subtype='DIR_PATH',
+    )
+
+    media_store_mode: bpy.props.EnumProperty(
+        items=[
+            ('URI', "Relative URIs", "Refer to the files of the media store with URIs relative to the glTF"),
+            ('HARDLINK', "Hard links", "Hard link the files of the media store into the export directory, "
+                                       "they are copied when the store is on another file system"),
+        ],
+        name='media store mode',
+        description='How exports refer to the files of the media store',
+        default='URI',
+    )
+
+    video_atlas: bpy.props.BoolProperty(
+        name='video atlas',
+        description='Pack small movie textures into a single video, the player then uses a single decoder for all of them',
+        default=False,
+    )
+
+    video_atlas_size: bpy.props.IntProperty(
+        name='video atlas size',
+        description='Maximum width and height of the video atlas',
+        default=2048,
+        min=64,
+        max=8192,
+    )
+
+    video_atlas_max_tile_size: bpy.props.IntProperty(
+        name='video atlas max tile size',
+        description='Movie textures larger than this are not packed in the atlas',
+        default=512,
+        min=16,
+        max=8192,
+    )
+
+    video_encoder: bpy.props.StringProperty(
+        name='video encoder',
+        description='ffmpeg compatible encoder used to build the video atlas and trim media',
+        default='ffmpeg',
+        subtype='FILE_PATH',
+    )
+
+    trim_media: bpy.props.BoolProperty(
+        name='trim media',
+        description='Copy only the range of movie textures used by the scene, instead of setting the media time offsets',
+        default=False,
+    )
+
+    media_packaging: bpy.props.EnumProperty(
+        items=[
+            ('NONE', "None", "Progressive files only"),
+            ('DASH', "DASH", "Add a DASH manifest alternative"),
+            ('HLS', "HLS", "Add an HLS playlist alternative"),
+            ('DASH_HLS', "DASH & HLS", "Add DASH manifest and HLS playlist alternatives"),
+        ],
+        name='media packaging',
+        description='Segment media for streaming, the segmented alternatives come first in MPEG_media',
+        default='NONE',
+    )
+
+    segment_duration: bpy.props.FloatProperty(
+        name='segment duration',
+        description='Target duration of DASH/HLS segments, in seconds',
+        default=2.0,
+        min=0.1,
+    )
+
+    analyze_keyframes: bpy.props.BoolProperty(
+        name='analyze keyframes',
+        description='Report movie textures whose keyframes are far apart, the player stalls each time they loop',
+        default=True,
+    )
+
+    max_loop_decode: bpy.props.FloatProperty(
+        name='max loop decode',
+        description='Duration of video a player may decode from the preceding keyframe when a movie loops, in seconds',
+        default=0.5,
+        min=0.0,
+    )
+
+    closed_gop_loops: bpy.props.BoolProperty(
+        name='closed GOP loops',
+        description='Re-encode the movies exceeding the max loop decode, with a keyframe at the loop start '
+                    'and every segment duration',
+        default=False,
+    )
+
+    video_resolution_hints: bpy.props.BoolProperty(
+        name='video resolution hints',
+        description='Scale movie textures down to the largest size at which they are seen from the scene cameras',
+        default=False,
+    )
+
+    proxy_size: bpy.props.IntProperty(
+        name='proxy size',
+        description='Maximum width and height of the movie proxies shown in the viewport',
+        default=512,
+        min=64,
+        max=4096,
+    )
+
+    proxy_directory: bpy.props.StringProperty(
+        name='proxy directory',
+        description='Directory the movie proxies are cached in, the system temporary directory when empty',
+        default='',
+        subtype='DIR_PATH',
+    )
+
+    bake_audio_animation: bpy.props.BoolProperty(
+        name='bake audio animation',
+        description='Bake animated speaker volume and pitch as timed data',
+        default=True,
+    )
+
+    audio_animation_tolerance: bpy.props.FloatProperty(
+        name='audio animation tolerance',
+        description='Maximum relative error allowed when reducing baked speaker keyframes, '
+                    'eg. 0.01 keeps the volume within 0.09 dB and the pitch within 1%',
+        default=0.001,
+        min=0.0,
+        precision=4,
+    )
+
+    cluster_audio_sources: bpy.props.BoolProperty(
+        name='cluster audio sources',
+        description='Merge nearby speakers playing the same sound with the same settings into a single audio source',
+        default=False,
+    )
+
+    audio_cluster_size: bpy.props.FloatProperty(
+        name='audio cluster size',
+        description='Size of the grid cells speakers are merged in, grows until the audio sources fit the maximum',
+        default=5.0,
+        min=0.01,
+        subtype='DISTANCE',
+    )
+
+    max_audio_sources: bpy.props.IntProperty(
+        name='max audio sources',
+        description='Maximum number of audio sources rendered by the player',
+        default=32,
+        min=1,
+    )
+
+    optimize_markers: bpy.props.BoolProperty(
+        name='optimize markers',
+        description='Downsample 2D marker images and warn about markers which may be hard to track',
+        default=True,
+    )
+
+    marker_max_size: bpy.props.IntProperty(
+        name='marker max size',
+        description='Maximum width and height of exported 2D marker images',
+        default=1024,
+        min=64,
+        max=8192,
+    )
+
+    spatial_index: bpy.props.BoolProperty(
+        name='spatial index',
+        description='Write a grid of the audio sources and anchored nodes to <name>.spatial_index.bin, '
+                    'so that players cull them by distance without testing each one',
+        default=False,
+    )
+
+    split_collections: bpy.props.BoolProperty(
+        name='split per collection',
+        description='Write each top-level collection to its own .gltf, with its own media and buffers, '
+                    'next to a base .gltf holding the other objects',
+        default=False,
+    )
+
+    write_manifest: bpy.props.BoolProperty(
+        name='write change manifest',
+        description='Write <name>.manifest.json next to the export, listing the size and sha256 of the exported files '
+                    'and which ones changed since the previous export',
+        default=False,
+    )
+
+    validation: bpy.props.EnumProperty(
+        items=[
+            ('OFF', "Off", "Don't validate the MPEG_* extensions"),
+            ('WARN', "Warn", "Log the MPEG_* values not conforming to ISO/IEC 23090-14"),
+            ('STRICT', "Strict", "Fail the export when MPEG_* values don't conform to ISO/IEC 23090-14"),
+        ],
+        name='validation',
+        default='WARN',
+    )
+
+    print_statistics: bpy.props.BoolProperty(
+        name='print export statistics',
+        description='Print the MPEG export statistics to the console, for debugging',
+        default=False,
+    )
+
     # TODO: autodetect & use manual config to force re-encoding
     audio_object_codec: bpy.props.EnumProperty(
         items= [
@@ -70,6 +285,16 @@ class MPEG_ExporterProperties(bpy.types.PropertyGroup):
         description='audio codec used for audio sources of type "Object"',
     )
 
+    audio_sample_format: bpy.props.EnumProperty(
+        items=[
+            ('FLOAT', "Float", "32 bit float samples"),
+            ('SHORT', "Short", "Normalized 16 bit integer samples, halving the audio buffers size"),
+        ],
+        name='audio sample format',
+        description='Component type of the decoded audio sample accessors',
+        default='FLOAT',
+    )
+
 
 class GLTF_PT_MPEGExporterExtensionPanel(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
@@ -97,20 +322,86 @@ class GLTF_PT_MPEGExporterExtensionPanel(bpy.types.Panel):
 
         layout.prop(props, 'enabled', text="Enable MPEG_* extensions")
         layout.prop(props, 'enable_video_textures', text="MPEG_texture_video")
+        if props.enable_video_textures:
+            layout.prop(props, 'video_atlas', text="Pack small videos in an atlas")
+            if props.video_atlas:
+                layout.prop(props, 'video_atlas_size', text="Atlas size")
+                layout.prop(props, 'video_atlas_max_tile_size', text="Max tile size")
+            layout.prop(props, 'trim_media', text="Trim videos to the used range")
+            layout.prop(props, 'video_resolution_hints', text="Scale videos to their size on screen")
+            layout.prop(props, 'analyze_keyframes', text="Analyze keyframes")
+            if props.analyze_keyframes:
+                layout.prop(props, 'max_loop_decode', text="Max loop decode")
+                layout.prop(props, 'closed_gop_loops', text="Re-encode slow loops")
+        layout.prop(props, 'media_packaging', text="Segmented media")
+        if (props.media_packaging != 'NONE') or (props.enable_video_textures and props.analyze_keyframes
+                                                 and props.closed_gop_loops):
+            layout.prop(props, 'segment_duration', text="Segment duration")
+        if (props.enable_video_textures and (props.video_atlas or props.trim_media or props.video_resolution_hints
+                                             or (props.analyze_keyframes and props.closed_gop_loops))) \
+                or (props.media_packaging != 'NONE'):
+            layout.prop(props, 'video_encoder', text="Encoder")
         layout.prop(props, 'enable_spatial_audio', text="MPEG_audio_spatial")
         layout.prop(props, 'media_export', text="Copy media files to output dir")
+        if props.media_export:
+            layout.prop(props, 'background_media_export', text="Copy in background")
+            layout.prop(props, 'media_export_workers', text="Concurrent files")
+            layout.prop(props, 'media_store', text="Media store")
+            if props.media_store:
+                layout.prop(props, 'media_store_mode', text="Store mode")
         layout.prop(props, 'audio_object_codec', text="Codec for Object audio sources")
+        layout.prop(props, 'audio_sample_format', text="Audio samples")
+        layout.prop(props, 'bake_audio_animation', text="Bake speaker volume & pitch")
+        if props.bake_audio_animation:
+            layout.prop(props, 'audio_animation_tolerance', text="Tolerance")
+        layout.prop(props, 'cluster_audio_sources', text="Merge nearby speakers")
+        if props.cluster_audio_sources:
+            layout.prop(props, 'audio_cluster_size', text="Cluster size")
+            layout.prop(props, 'max_audio_sources', text="Max audio sources")
+        layout.prop(props, 'optimize_markers', text="Optimize marker images")
+        if props.optimize_markers:
+            layout.prop(props, 'marker_max_size', text="Max marker size")
+        layout.prop(props, 'spatial_index', text="Spatial index")
+        layout.prop(props, 'split_collections', text="Split per collection")
+        layout.prop(props, 'write_manifest', text="Write change manifest")
+        layout.prop(props, 'validation', text="Validation")
+        layout.prop(props, 'print_statistics', text="Print statistics")
+
+
+class GLTF_PT_MPEGPlayerCostPanel(bpy.types.Panel):
+    bl_space_type = 'FILE_BROWSER'
+    bl_region_type = 'TOOL_PROPS'
+    bl_label = "MPEG Player Cost"
+    bl_parent_id = "GLTF_PT_export_user_extensions"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        sfile = context.space_data
+        operator = sfile.active_operator
+        return operator.bl_idname == "EXPORT_SCENE_OT_gltf"
+
+    def draw(self, context):
+        draw_player_cost(self.layout, context.scene)
 
 
 def register():
     register_panel()
     register_xr_anchors()
+    register_media_export()
+    register_scene_export()
+    register_media_proxy()
+    register_player_cost()
     bpy.utils.register_class(MPEG_ExporterProperties)
     bpy.types.Scene.MPEG_ExporterProperties = bpy.props.PointerProperty(type=MPEG_ExporterProperties)
 
 
 def unregister():
     unregister_xr_anchors()
+    unregister_media_export()
+    unregister_scene_export()
+    unregister_media_proxy()
+    unregister_player_cost()
     unregister_panel()
     bpy.utils.unregister_class(MPEG_ExporterProperties)
     del bpy.types.Scene.MPEG_ExporterProperties
@@ -119,6 +410,7 @@ def unregister():
 def register_panel():
     try:
         bpy.utils.register_class(GLTF_PT_MPEGExporterExtensionPanel)
+        bpy.utils.register_class(GLTF_PT_MPEGPlayerCostPanel)
     except Exception:
         pass
     return unregister_panel
@@ -126,42 +418,85 @@ def register_panel():
 
 def unregister_panel():
     try:
+        bpy.utils.unregister_class(GLTF_PT_MPEGPlayerCostPanel)
         bpy.utils.unregister_class(GLTF_PT_MPEGExporterExtensionPanel)
     except Exception:
         pass
 
 
 ##################################################################################
-from .exp.mpeg_export import glTF2ExportMpegExtension
-
-def glTF2_pre_export_callback(export_settings):
-    props = bpy.context.scene.MPEG_ExporterProperties
-    export_settings["mpeg_media_exports"] = props.media_export
-    export_settings["mpeg_enable_video_textures"] = props.enable_video_textures
-    export_settings["mpeg_enable_spatial_audio"] = props.enable_spatial_audio
-    export_settings["mpeg_audio_object_codec"] = props.audio_object_codec
+# The glTF add-on looks up the user extensions when an export or import starts.
+# The export modules pull in `aud` and the io_scene_gltf2 internals, so they are
+# only imported then, keeping add-on registration fast.
 
-class glTF2ExportUserExtension(glTF2ExportMpegExtension):
+_USER_EXTENSIONS = ('glTF2ExportUserExtension', 'glTF2ImportUserExtension')
 
-    @property
-    def enabled(self): 
-        return bpy.context.scene.MPEG_ExporterProperties.enabled
+def __getattr__(name):
+    if name in _USER_EXTENSIONS:
+        from . import user_extensions
+        return getattr(user_extensions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-##################################################################################
-# importer stub - normaly import would fail totaly, 
-#   but here MPEG_* extensions will be simply ignored.
-#
-
-from io_scene_gltf2.io.com.gltf2_io_extensions import Extension
-
-class glTF2ImportUserExtension:
-
-    def __init__(self):
-        self.extensions = [
-            Extension(name="MPEG_media", extension={}, required=True), 
-            Extension(name="MPEG_buffer_circular", extension={}, required=True),
-            Extension(name="MPEG_accessor_timed", extension={}, required=True),
-            Extension(name="MPEG_texture_video", extension={}, required=True),
-            Extension(name="MPEG_audio_spatial", extension={}, required=True)
-        ]
\ No newline at end of file
+def glTF2_pre_export_callback(export_settings):
+    from .exp.mpeg_media import MediaLibrary
+    from .exp.mpeg_video_atlas import VideoAtlas
+    from .exp.mpeg_settings import MPEG_SETTINGS, MPEGExportSettings
+    from .exp.mpeg_stats import ExportStatistics
+    from .exp.mpeg_scene_split import SceneSplit
+    from .exp.mpeg_resolution import ResolutionHints
+    from .exp.mpeg_audio_clustering import AudioClusters
+    from .exp.mpeg_marker import MarkerImages
+    from .exp.mpeg_audio_source import AudioSourceIds
+    from .exp.mpeg_node_index import NodeIndex
+    from .exp.mpeg_media_store import MediaStore
+    from .exp.mpeg_manifest import ChangeManifest
+    from .blender.utils import MovieTextureCache
+    from .blender.media_proxy import MediaProxies
+
+    MediaLibrary.reset()
+    MediaStore.reset()
+    VideoAtlas.reset()
+    MovieTextureCache.reset()
+    ExportStatistics.reset()
+    SceneSplit.reset()
+    ResolutionHints.reset()
+    AudioClusters.reset()
+    MarkerImages.reset()
+    AudioSourceIds.reset()
+    NodeIndex.reset()
+    ChangeManifest.reset()
+    settings = MPEGExportSettings.from_scene(bpy.context.scene, abspath=bpy.path.abspath)
+    export_settings[MPEG_SETTINGS] = settings
+    if settings.enabled:
+        # movies showing their viewport proxy are exported from their original file
+        MediaProxies.suspend()
+    if settings.enabled and (settings.enable_spatial_audio or settings.optimize_markers):
+        NodeIndex.capture(bpy.context.scene)
+    if settings.enabled and settings.media_exports and settings.media_store:
+        MediaStore.capture(settings, export_settings)
+    if settings.enabled and settings.split_collections:
+        SceneSplit.capture(bpy.context.scene)
+    if settings.enabled and settings.enable_video_textures and settings.video_resolution_hints:
+        ResolutionHints.capture(bpy.context.scene)
+    if settings.enabled and settings.enable_spatial_audio:
+        AudioSourceIds.capture(bpy.context.scene)
+    if settings.enabled and settings.enable_spatial_audio and settings.cluster_audio_sources:
+        AudioClusters.capture(bpy.context.scene, settings)
+    if settings.enabled and settings.optimize_markers:
+        MarkerImages.capture(bpy.context.scene)
+
+
+def glTF2_post_export_callback(export_settings):
+    from .exp.mpeg_settings import get_mpeg_settings
+    from .blender.media_proxy import MediaProxies
+    MediaProxies.resume()
+    settings = get_mpeg_settings(export_settings)
+    if settings is None:
+        return
+    if settings.write_manifest:
+        from .exp.mpeg_manifest import ChangeManifest
+        try:
+            ChangeManifest.schedule(export_settings)
+        except BaseException as e:
+            print(e)
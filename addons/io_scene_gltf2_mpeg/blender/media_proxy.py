@@ -0,0 +1,220 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from ..com.content_hash import get_digest
+
+# custom properties holding the original file path and size of a movie image showing its proxy
+PROXY_ORIGINAL = "mpeg_proxy_original"
+PROXY_ORIGINAL_SIZE = "mpeg_proxy_original_size"
+
+# all-intra, scrubbing the timeline seeks to any frame without decoding a GOP
+PROXY_ENCODER_ARGS = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28', '-g', '1', '-pix_fmt', 'yuv420p', '-an']
+
+
+@dataclass
+class ProxyJob:
+    image_name: str
+    src: Path
+    proxy_path: Optional[Path] = None
+    """the proxy was found in the cache"""
+    cached: bool = False
+
+
+class MediaProxies:
+    """
+    Low resolution copies of the movie textures, shown in the viewport in place of the original files.
+    Proxies are cached by content hash, so that renamed or duplicated movies share a proxy and an edited
+    movie gets a new one. The original files are swapped back in for the duration of an export.
+    """
+
+    # (image, proxy file path) swapped back to their original file during an export
+    suspended = []
+
+    @classmethod
+    def get_cache_dir(cls, props) -> Path:
+        if props.proxy_directory:
+            return Path(bpy.path.abspath(props.proxy_directory))
+        return Path(tempfile.gettempdir()) / 'mpeg_proxies'
+
+    @staticmethod
+    def get_original_path(image) -> Path:
+        filepath = image[PROXY_ORIGINAL] if PROXY_ORIGINAL in image else image.filepath
+        return Path(bpy.path.abspath(filepath)).resolve()
+
+    @staticmethod
+    def iter_movie_images():
+        for image in bpy.data.images:
+            if (image.source == 'MOVIE') and image.filepath and image.users:
+                yield image
+
+    @classmethod
+    def apply(cls, image, proxy_path):
+        if PROXY_ORIGINAL not in image:
+            image[PROXY_ORIGINAL] = image.filepath
+            # read by the player cost estimate, only when known: reading the size loads the movie
+            if image.has_data:
+                image[PROXY_ORIGINAL_SIZE] = tuple(image.size)
+        image.filepath = str(proxy_path)
+
+    @classmethod
+    def revert(cls, image):
+        if PROXY_ORIGINAL in image:
+            image.filepath = image[PROXY_ORIGINAL]
+            del image[PROXY_ORIGINAL]
+            if PROXY_ORIGINAL_SIZE in image:
+                del image[PROXY_ORIGINAL_SIZE]
+
+    @classmethod
+    def suspend(cls):
+        """
+        points the movie images back to their original files, the exporter reads their path and size.
+        the post export callback resumes them, and a timer once the export returns, should it fail before
+        """
+        for image in bpy.data.images:
+            if PROXY_ORIGINAL in image:
+                cls.suspended.append((image, image.filepath))
+                cls.revert(image)
+        if cls.suspended and not bpy.app.timers.is_registered(_resume_timer):
+            bpy.app.timers.register(_resume_timer, first_interval=0.0)
+
+    @classmethod
+    def resume(cls):
+        """
+        points the suspended images to their proxy again, does nothing once they are resumed
+        """
+        suspended, cls.suspended = cls.suspended, []
+        for image, proxy_path in suspended:
+            try:
+                cls.apply(image, proxy_path)
+            except ReferenceError:
+                # removed meanwhile
+                pass
+        if bpy.app.timers.is_registered(_resume_timer):
+            bpy.app.timers.unregister(_resume_timer)
+
+
+def _resume_timer():
+    MediaProxies.resume()
+    return None
+
+
+class ProxyBuild:
+    """
+    Builds the proxies of a set of movies on a small thread pool, encoding is already multi-threaded.
+    Finished jobs are collected on the main thread with `pop_finished`, where the images are updated.
+    """
+
+    def __init__(self, jobs: List[ProxyJob], cache_dir: Path, encoder, max_size, workers=2):
+        self.jobs = jobs
+        self.cache_dir = cache_dir
+        self.encoder = encoder
+        self.max_size = max_size
+        self.workers = max(1, workers)
+        self.errors = []
+        self._finished = []
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        # proxy path -> lock, movies with the same content are built once
+        self._path_locks = {}
+        self._executor = None
+        self._futures = []
+        self._start_time = None
+
+    @property
+    def total_files(self):
+        return len(self.jobs)
+
+    @property
+    def files_done(self):
+        return sum(1 for f in self._futures if f.done())
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def start(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._start_time = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mpeg_media_proxy')
+        self._futures = [self._executor.submit(self._run, job) for job in self.jobs]
+        return self
+
+    def done(self):
+        return all(f.done() for f in self._futures)
+
+    def wait(self):
+        for f in self._futures:
+            f.result()
+        self._executor.shutdown()
+        return self
+
+    def cancel(self):
+        # encodes already running complete in the background, their proxies are cached for the next build
+        self._cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def pop_finished(self) -> List[ProxyJob]:
+        with self._lock:
+            finished, self._finished = self._finished, []
+        return finished
+
+    def progress(self):
+        return self.files_done / self.total_files if self.total_files else 1.0
+
+    def status(self):
+        elapsed = time.perf_counter() - self._start_time if self._start_time is not None else 0.0
+        return f'{self.files_done}/{self.total_files} proxies, {elapsed:.1f} s'
+
+    def _run(self, job: ProxyJob):
+        if self.cancelled:
+            return
+        try:
+            digest = get_digest(job.src)
+            proxy_path = self.cache_dir / f'{digest[:32]}.{self.max_size}.mp4'
+            with self._lock:
+                path_lock = self._path_locks.setdefault(proxy_path, threading.Lock())
+            with path_lock:
+                job.cached = proxy_path.exists()
+                if not job.cached:
+                    part = proxy_path.with_name(f'{proxy_path.stem}.part{proxy_path.suffix}')
+                    try:
+                        build_proxy(self.encoder, job.src, self.max_size, part)
+                        os.replace(part, proxy_path)
+                    finally:
+                        part.unlink(missing_ok=True)
+            job.proxy_path = proxy_path
+            with self._lock:
+                self._finished.append(job)
+        except Exception as e:
+            if not self.cancelled:
+                with self._lock:
+                    self.errors.append(f'{job.image_name}: {e}')
+
+
+def build_proxy(encoder, src, max_size, output_path):
+    """
+    re-encodes a movie to fit in max_size x max_size using an ffmpeg compatible tool, keeping its aspect ratio
+    """
+    scale = (f'scale={max_size}:{max_size}:force_original_aspect_ratio=decrease,'
+             f'scale=trunc(iw/2)*2:trunc(ih/2)*2')
+    cmd = [encoder, '-y', '-i', str(src), '-vf', scale, *PROXY_ENCODER_ARGS, str(output_path)]
+    subprocess.run(cmd, check=True, capture_output=True)
@@ -0,0 +1,131 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+import time
+from dataclasses import dataclass, field
+
+from .media_proxy import PROXY_ORIGINAL_SIZE
+
+# ISO/IEC 23090-14, MPEG_buffer_circular.count default value, the exporter doesn't set it
+CIRCULAR_BUFFER_COUNT = 2
+
+# decoded RGB video frames are VEC3 of unsigned bytes, aligned to 4 bytes, see exp.mpeg_media._accessor_element_size
+VIDEO_BYTES_PER_PIXEL = 4
+
+# (sample rate, samples per frame) of the audio object codecs, see exp.mpeg_audio_source
+AUDIO_CODEC_FRAMES = {'MP3': (44100, 1152), 'AAC': (48000, 1024)}
+
+
+@dataclass
+class PlayerCost:
+    """
+    Estimated player-side cost of exporting a scene, before resolution hints are applied.
+    """
+    video_decoders: int = 0
+    audio_decoders: int = 0
+    decoded_pixels_per_second: float = 0.0
+    audio_sources: int = 0
+    audio_sample_rate: int = 0
+    circular_buffer_bytes: int = 0
+    anchors: int = 0
+    trackables: int = 0
+    markers: int = 0
+    """time spent computing the estimate, in seconds"""
+    seconds: float = 0.0
+    warnings: list = field(default_factory=list)
+
+    @property
+    def concurrent_decoders(self):
+        return self.video_decoders + self.audio_decoders
+
+
+def estimate_player_cost(scene) -> PlayerCost:
+    props = scene.MPEG_ExporterProperties
+    fps = scene.render.fps / scene.render.fps_base
+    cost = PlayerCost()
+    t0 = time.perf_counter()
+
+    objects = list(scene.objects)
+    if props.enable_video_textures:
+        _estimate_video(cost, objects, props, fps)
+    if props.enable_spatial_audio:
+        _estimate_audio(cost, objects, props)
+
+    for obj in objects:
+        if obj.xr_anchor.enabled:
+            cost.anchors += 1
+        if obj.xr_marker.enabled:
+            cost.markers += 1
+    # the exporter writes a trackable per anchor
+    cost.trackables = cost.anchors
+
+    cost.seconds = time.perf_counter() - t0
+    return cost
+
+
+def _estimate_video(cost, objects, props, fps):
+    materials = {slot.material for obj in objects if obj.type == 'MESH'
+                 for slot in obj.material_slots if slot.material is not None}
+    images = {}
+    for material in materials:
+        if material.use_nodes and (material.node_tree is not None):
+            for image in _iter_movie_images(material.node_tree, set()):
+                images[image.name] = image
+
+    atlas_pixels = 0
+    for image in images.values():
+        width, height = image.get(PROXY_ORIGINAL_SIZE, image.size)
+        pixels = width * height
+        if pixels == 0:
+            cost.warnings.append(f'{image.name}: movie file not found')
+            continue
+        if props.video_atlas and (max(width, height) <= props.video_atlas_max_tile_size):
+            atlas_pixels += pixels
+            continue
+        cost.video_decoders += 1
+        cost.decoded_pixels_per_second += pixels * fps
+        cost.circular_buffer_bytes += pixels * VIDEO_BYTES_PER_PIXEL * CIRCULAR_BUFFER_COUNT
+
+    if atlas_pixels:
+        # the atlas is at most video_atlas_size x video_atlas_size, tiles may not fill it
+        cost.video_decoders += 1
+        atlas_pixels = min(atlas_pixels, props.video_atlas_size ** 2)
+        cost.decoded_pixels_per_second += atlas_pixels * fps
+        cost.circular_buffer_bytes += atlas_pixels * VIDEO_BYTES_PER_PIXEL * CIRCULAR_BUFFER_COUNT
+
+
+def _iter_movie_images(node_tree, visited):
+    if node_tree.name in visited:
+        return
+    visited.add(node_tree.name)
+    for node in node_tree.nodes:
+        if node.type == 'TEX_IMAGE':
+            if (node.image is not None) and (node.image.source == 'MOVIE'):
+                yield node.image
+        elif (node.type == 'GROUP') and (node.node_tree is not None):
+            yield from _iter_movie_images(node.node_tree, visited)
+
+
+def _estimate_audio(cost, objects, props):
+    sample_rate, samples_per_frame = AUDIO_CODEC_FRAMES.get(props.audio_object_codec, (0, 0))
+    sample_bytes = 2 if props.audio_sample_format == 'SHORT' else 4
+    sounds = set()
+    for obj in objects:
+        if (obj.type == 'SPEAKER') and (obj.data.sound is not None):
+            cost.audio_sources += 1
+            sounds.add(bpy.path.abspath(obj.data.sound.filepath))
+    if props.cluster_audio_sources:
+        cost.audio_sources = min(cost.audio_sources, props.max_audio_sources)
+    # speakers playing the same file share its media, whichever sound datablock they use
+    cost.audio_decoders = len(sounds)
+    cost.audio_sample_rate = sample_rate
+    cost.circular_buffer_bytes += cost.audio_sources * samples_per_frame * sample_bytes * CIRCULAR_BUFFER_COUNT
@@ -0,0 +1,112 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+from bpy.app.handlers import persistent
+
+# seconds without depsgraph updates before the estimate is computed again
+DEBOUNCE_INTERVAL = 0.5
+
+
+class SceneCost:
+    """
+    Player cost estimate of the scenes, cached for the panels to draw.
+    Depsgraph updates only flag the scene, the estimate is computed again once they stop for
+    DEBOUNCE_INTERVAL: dragging objects or scrubbing the timeline doesn't walk the scene on every update.
+    """
+
+    # scene name -> PlayerCost
+    costs = {}
+    dirty = set()
+
+    @classmethod
+    def get(cls, scene):
+        """
+        returns the cached estimate of a scene, None until it is first computed
+        """
+        if scene.name not in cls.costs:
+            cls.dirty.add(scene.name)
+            if not bpy.app.timers.is_registered(_update_timer):
+                bpy.app.timers.register(_update_timer, first_interval=0.0)
+        return cls.costs.get(scene.name)
+
+    @classmethod
+    def invalidate(cls, scene):
+        """
+        (re)starts the update timer, so that it only runs once updates stop
+        """
+        cls.dirty.add(scene.name)
+        if bpy.app.timers.is_registered(_update_timer):
+            bpy.app.timers.unregister(_update_timer)
+        bpy.app.timers.register(_update_timer, first_interval=DEBOUNCE_INTERVAL)
+
+    @classmethod
+    def update(cls):
+        from .player_cost import estimate_player_cost
+        dirty, cls.dirty = cls.dirty, set()
+        for name in dirty:
+            scene = bpy.data.scenes.get(name)
+            if scene is None:
+                cls.costs.pop(name, None)
+            else:
+                cls.costs[name] = estimate_player_cost(scene)
+
+    @classmethod
+    def reset(cls):
+        cls.costs = {}
+        cls.dirty = set()
+
+
+def _update_timer():
+    SceneCost.update()
+    # redraw the panels showing the estimate
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type in ('PROPERTIES', 'FILE_BROWSER'):
+                area.tag_redraw()
+    return None
+
+
+# ID types whose changes may change the estimate
+COST_ID_TYPES = {'OBJECT', 'MATERIAL', 'IMAGE', 'SPEAKER', 'NODETREE', 'SCENE', 'COLLECTION'}
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+    for update in depsgraph.updates:
+        id_type = update.id.id_type
+        if id_type not in COST_ID_TYPES:
+            continue
+        # moving objects doesn't change the estimate
+        if (id_type == 'OBJECT') and update.is_updated_transform \
+                and not (update.is_updated_geometry or update.is_updated_shading):
+            continue
+        SceneCost.invalidate(scene)
+        return
+
+
+@persistent
+def on_load(*args):
+    SceneCost.reset()
+
+
+def register_scene_cost():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+    bpy.app.handlers.load_post.append(on_load)
+
+
+def unregister_scene_cost():
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    if on_load in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(on_load)
+    if bpy.app.timers.is_registered(_update_timer):
+        bpy.app.timers.unregister(_update_timer)
+    SceneCost.reset()
@@ -0,0 +1,75 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+
+class MPEG_OT_ExportMedia(bpy.types.Operator):
+    bl_idname = "mpeg.export_media"
+    bl_label = "Export MPEG media"
+    bl_description = "Copy and build the media files of the last glTF export, press Esc to cancel"
+
+    def invoke(self, context, event):
+        from ...exp.mpeg_media_export import MediaExport
+        self._export = MediaExport.pending
+        MediaExport.pending = None
+        if self._export is None:
+            return {'CANCELLED'}
+
+        self._export.start()
+        self._cancelling = False
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.2, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if (event.type == 'ESC') and not self._cancelling:
+            # doesn't block, the jobs still running end once their tools are terminated
+            self._export.cancel()
+            self._cancelling = True
+            context.workspace.status_text_set('MPEG media export: cancelling')
+            return {'RUNNING_MODAL'}
+
+        if (event.type == 'TIMER') and self._cancelling:
+            if self._export.done():
+                self._export.cleanup()
+                self._finish(context)
+                self.report({'WARNING'}, f'MPEG media export cancelled, {self._export.files_done} of {self._export.total_files} files exported')
+                return {'CANCELLED'}
+            return {'PASS_THROUGH'}
+
+        if event.type == 'TIMER':
+            context.window_manager.progress_update(int(self._export.progress() * 100))
+            context.workspace.status_text_set(f'MPEG media export: {self._export.status()} - Esc to cancel')
+            if self._export.done():
+                self._finish(context)
+                self._export.complete()
+                for error in self._export.errors:
+                    self.report({'ERROR'}, error)
+                self.report({'INFO'}, f'MPEG media export: {self._export.status()}')
+                return {'FINISHED'}
+
+        return {'PASS_THROUGH'}
+
+    def _finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+
+def register_media_export():
+    bpy.utils.register_class(MPEG_OT_ExportMedia)
+
+
+def unregister_media_export():
+    bpy.utils.unregister_class(MPEG_OT_ExportMedia)
@@ -0,0 +1,120 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+
+class MPEG_OT_BuildProxies(bpy.types.Operator):
+    bl_idname = "mpeg.build_proxies"
+    bl_label = "Build movie proxies"
+    bl_description = ("Show low resolution copies of the movie textures in the viewport, built in the background. "
+                      "Exports still use the original movies. Press Esc to cancel")
+
+    def invoke(self, context, event):
+        from ..media_proxy import MediaProxies, ProxyBuild, ProxyJob
+        props = context.scene.MPEG_ExporterProperties
+        jobs = [ProxyJob(image.name, MediaProxies.get_original_path(image)) for image in MediaProxies.iter_movie_images()]
+        if not jobs:
+            self.report({'INFO'}, 'No movie textures')
+            return {'CANCELLED'}
+
+        self._build = ProxyBuild(jobs, MediaProxies.get_cache_dir(props), bpy.path.abspath(props.video_encoder),
+                                 props.proxy_size, props.media_export_workers).start()
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._build.cancel()
+            self._apply_finished()
+            self._finish(context)
+            self.report({'WARNING'}, f'Movie proxies cancelled, {self._build.status()}')
+            return {'CANCELLED'}
+
+        if event.type == 'TIMER':
+            # images are updated as their proxy is ready, on the main thread
+            self._apply_finished()
+            context.window_manager.progress_update(int(self._build.progress() * 100))
+            context.workspace.status_text_set(f'Movie proxies: {self._build.status()} - Esc to cancel')
+            if self._build.done():
+                self._apply_finished()
+                self._finish(context)
+                for error in self._build.errors:
+                    self.report({'ERROR'}, error)
+                cached = sum(1 for job in self._build.jobs if job.cached)
+                self.report({'INFO'}, f'Movie proxies: {self._build.status()}, {cached} from cache')
+                return {'FINISHED'}
+
+        return {'PASS_THROUGH'}
+
+    def _apply_finished(self):
+        from ..media_proxy import MediaProxies
+        for job in self._build.pop_finished():
+            image = bpy.data.images.get(job.image_name)
+            if image is not None:
+                MediaProxies.apply(image, job.proxy_path)
+
+    def _finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+
+class MPEG_OT_UseOriginalMovies(bpy.types.Operator):
+    bl_idname = "mpeg.use_original_movies"
+    bl_label = "Use original movies"
+    bl_description = "Show the original movie files in place of their proxies"
+
+    def execute(self, context):
+        from ..media_proxy import MediaProxies
+        for image in bpy.data.images:
+            MediaProxies.revert(image)
+        return {'FINISHED'}
+
+
+class SCENE_PT_MPEGMediaProxies(bpy.types.Panel):
+    bl_label = "MPEG Movie Proxies"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = 'scene'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        props = context.scene.MPEG_ExporterProperties
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        layout.prop(props, 'proxy_size', text="Size")
+        layout.prop(props, 'proxy_directory', text="Cache directory")
+        layout.prop(props, 'video_encoder', text="Encoder")
+        row = layout.row()
+        row.operator(MPEG_OT_BuildProxies.bl_idname, text="Build proxies")
+        row.operator(MPEG_OT_UseOriginalMovies.bl_idname, text="Use originals")
+
+
+classes = [
+    MPEG_OT_BuildProxies,
+    MPEG_OT_UseOriginalMovies,
+    SCENE_PT_MPEGMediaProxies
+]
+
+
+def register_media_proxy():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+
+def unregister_media_proxy():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
@@ -0,0 +1,54 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+from ..scene_cost import SceneCost, register_scene_cost, unregister_scene_cost
+
+
+def draw_player_cost(layout, scene):
+    """
+    draws the cached estimate, the scene isn't walked while drawing
+    """
+    from ...com.mpeg_analysis import format_bytes
+    cost = SceneCost.get(scene)
+    if cost is None:
+        layout.label(text="Estimating...")
+        return
+    col = layout.column(align=True)
+    col.label(text=f"Concurrent decoders: {cost.concurrent_decoders} "
+                   f"(video {cost.video_decoders}, audio {cost.audio_decoders})")
+    col.label(text=f"Decoded video: {cost.decoded_pixels_per_second / 1e6:.1f} Mpixels/s")
+    col.label(text=f"Audio sources: {cost.audio_sources} at {cost.audio_sample_rate / 1000:g} kHz")
+    col.label(text=f"Circular buffers: {format_bytes(cost.circular_buffer_bytes)}")
+    col.label(text=f"Anchors: {cost.anchors}, trackables: {cost.trackables}, markers: {cost.markers}")
+    for warning in cost.warnings:
+        col.label(text=warning, icon='ERROR')
+
+
+class SCENE_PT_MPEGPlayerCost(bpy.types.Panel):
+    bl_label = "MPEG Player Cost"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = 'scene'
+    bl_options = {'DEFAULT_CLOSED'}
+
+    def draw(self, context):
+        draw_player_cost(self.layout, context.scene)
+
+
+def register_player_cost():
+    register_scene_cost()
+    bpy.utils.register_class(SCENE_PT_MPEGPlayerCost)
+
+
+def unregister_player_cost():
+    bpy.utils.unregister_class(SCENE_PT_MPEGPlayerCost)
+    unregister_scene_cost()
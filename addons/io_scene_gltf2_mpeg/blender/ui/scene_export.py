@@ -0,0 +1,76 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+import time
+from pathlib import Path
+
+
+class MPEG_OT_ExportScenes(bpy.types.Operator):
+    bl_idname = "mpeg.export_scenes"
+    bl_label = "Export all scenes (MPEG glTF)"
+    bl_description = "Export each scene of the .blend to its own .gltf, sharing a single copy of the media files"
+
+    directory: bpy.props.StringProperty(
+        name='output directory',
+        subtype='DIR_PATH',
+    )
+
+    media_dir: bpy.props.StringProperty(
+        name='media directory',
+        description='Directory of the shared media files, relative to the output directory',
+        default='media',
+    )
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        from ...exp.mpeg_shared_media import SharedMedia
+
+        output_dir = Path(bpy.path.abspath(self.directory))
+        window = context.window
+        active_scene = window.scene
+        t0 = time.perf_counter()
+        SharedMedia.begin(self.media_dir.strip('/\\') or 'media')
+        try:
+            for scene in bpy.data.scenes:
+                # the MPEG settings are read from the active scene
+                window.scene = scene
+                bpy.ops.export_scene.gltf(
+                    filepath=str(output_dir / f'{bpy.path.clean_name(scene.name)}.gltf'),
+                    export_format='GLTF_SEPARATE',
+                    use_active_scene=True
+                )
+            export = SharedMedia.export()
+            for error in export.errors:
+                self.report({'ERROR'}, error)
+            self.report({'INFO'}, f'{len(bpy.data.scenes)} scenes exported in {time.perf_counter() - t0:.2f} s, '
+                                  f'{SharedMedia.report()}')
+        finally:
+            window.scene = active_scene
+            SharedMedia.end()
+        return {'FINISHED'}
+
+
+def _menu_func_export(self, context):
+    self.layout.operator(MPEG_OT_ExportScenes.bl_idname, text="glTF 2.0, all scenes (MPEG)")
+
+
+def register_scene_export():
+    bpy.utils.register_class(MPEG_OT_ExportScenes)
+    bpy.types.TOPBAR_MT_file_export.append(_menu_func_export)
+
+
+def unregister_scene_export():
+    bpy.types.TOPBAR_MT_file_export.remove(_menu_func_export)
+    bpy.utils.unregister_class(MPEG_OT_ExportScenes)
@@ -21,4 +21,77 @@ def get_tex_from_socket(socket, export_settings):
         return None
     if result[0].shader_node.image is None:
         return None
-    return result[0]
\ No newline at end of file
+    return result[0]
+
+
+class MovieTextureCache:
+    """
+    Per-export cache of node tree searches for movie textures.
+    The texture and texture info hooks search the same sockets, this avoids walking
+    the node trees again. Sockets not leading to a movie texture are cached as None.
+    """
+
+    results = {}
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def reset(cls):
+        cls.results = {}
+        cls.hits = 0
+        cls.misses = 0
+
+    @classmethod
+    def get(cls, socket, export_settings):
+        key = _socket_cache_key(socket)
+        if key in cls.results:
+            cls.hits += 1
+            return cls.results[key]
+        cls.misses += 1
+        tex = get_tex_from_socket(socket, export_settings)
+        if (tex is not None) and (tex.shader_node.image.source != 'MOVIE'):
+            tex = None
+        cls.results[key] = tex
+        return tex
+
+    @classmethod
+    def hit_rate(cls):
+        total = cls.hits + cls.misses
+        return cls.hits / total if total else 0.0
+
+
+def get_movie_tex_from_socket(socket, export_settings):
+    return MovieTextureCache.get(socket, export_settings)
+
+
+def _socket_cache_key(socket):
+    # io_scene_gltf2 >= 4.x wraps blender sockets with the path of the groups (starting with the material) they belong to
+    group_path = getattr(socket, "group_path", None)
+    if group_path is not None:
+        path = tuple(n.as_pointer() for n in group_path)
+        socket = socket.socket
+    else:
+        path = ()
+    return (path, socket.id_data.as_pointer(), socket.as_pointer())
+
+
+def get_movie_images_from_material(material):
+    """
+    returns the movie images of the image textures feeding the material outputs, searched as the exporter does,
+    including through node groups
+    """
+    # io_scene_gltf2 >= 4.x searches from sockets wrapped with the path of the groups they belong to
+    wrap = getattr(gltf2_blender_search_node_tree, "NodeSocket", None)
+    images = []
+    for node in material.node_tree.nodes:
+        if node.type != 'OUTPUT_MATERIAL':
+            continue
+        socket = node.inputs['Surface']
+        result = gltf2_blender_search_node_tree.from_socket(
+            wrap(socket, [material]) if wrap is not None else socket,
+            gltf2_blender_search_node_tree.FilterByType(bpy.types.ShaderNodeTexImage))
+        for tex in result:
+            image = tex.shader_node.image
+            if (image is not None) and (image.source == 'MOVIE') and (image not in images):
+                images.append(image)
+    return images
\ No newline at end of file
@@ -233,7 +233,7 @@ class MPEG_media:
         extensions = from_union([lambda x: from_dict(lambda x: from_dict(lambda x: x, x), x), from_none], obj.get("extensions"))
         extras = from_union([lambda x: from_dict(lambda x: x, x), from_none], obj.get("extras"))
         name = from_union([from_str, from_none], obj.get("name"))
-        return MPEG(media, extensions, extras, name)
+        return MPEG_media(media, extensions, extras, name)
 
     def to_dict(self) -> dict:
         result: dict = {}
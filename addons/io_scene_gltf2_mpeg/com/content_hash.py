@@ -0,0 +1,42 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""
+Content hashes of media files, shared by the movie proxies and the media store, so that each
+file is hashed once per session. It doesn't depend on Blender.
+"""
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def get_digest(path: Path) -> str:
+    """
+    returns the blake2b hex digest of a file's content, cached per file size and modification time,
+    hashing large movies again on each export is slow
+    """
+    stat = path.stat()
+    return _get_digest(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _get_digest(path, size, mtime):
+    return hash_file(path)
+
+
+def hash_file(path) -> str:
+    h = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
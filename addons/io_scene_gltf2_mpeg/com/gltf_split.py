@@ -0,0 +1,363 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""
+Splits a glTF document into a base document and sub-documents, each holding a group of the
+scene's root nodes. Every document only carries the objects its nodes reference: accessors and
+binary data, MPEG_media entries and their circular buffers.
+Works on the glTF json only, it doesn't depend on Blender.
+"""
+
+import base64
+import copy
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+MPEG_MEDIA = "MPEG_media"
+MPEG_BUFFER_CIRCULAR = "MPEG_buffer_circular"
+MPEG_ACCESSOR_TIMED = "MPEG_accessor_timed"
+MPEG_TEXTURE_VIDEO = "MPEG_texture_video"
+MPEG_AUDIO_SPATIAL = "MPEG_audio_spatial"
+MPEG_ANCHOR = "MPEG_anchor"
+KHR_LIGHTS_PUNCTUAL = "KHR_lights_punctual"
+# root extras indexing nodes and accessors of the whole export
+MPEG_SPATIAL_INDEX = "MPEG_spatial_index"
+
+# base document root extras listing the sub-documents
+SUB_SCENES = "subScenes"
+
+
+@dataclass
+class Document:
+    name: str
+    gltf: dict
+    """binary data of the document's buffer, None if the document has no binary data"""
+    data: bytearray
+    bin_uri: str = None
+    uri: str = None
+
+
+def _data_uri_bytes(uri):
+    return base64.b64decode(uri.split(',', 1)[1])
+
+
+def load_buffers(gltf, base_dir) -> Callable[[int], bytes]:
+    """
+    returns a function reading buffers' content, external files are read once on first access
+    """
+    cache = {}
+
+    def read(i):
+        if i not in cache:
+            uri = gltf["buffers"][i].get("uri")
+            if uri is None:
+                raise ValueError(f'buffer {i} has no uri, binary glTF is not supported')
+            if uri.startswith('data:'):
+                cache[i] = _data_uri_bytes(uri)
+            else:
+                cache[i] = (Path(base_dir) / uri).read_bytes()
+        return cache[i]
+
+    return read
+
+
+class _DocumentBuilder:
+    """
+    copies objects from the source document on first reference, and remaps their indices
+    """
+
+    def __init__(self, source, read_buffer, name):
+        self.source = source
+        self.read_buffer = read_buffer
+        self.gltf = {"asset": copy.deepcopy(source["asset"])}
+        self.data = None
+        self._data_buffer = None
+        self._indices: Dict[str, Dict[int, int]] = {}
+        self.name = name
+
+    def _add(self, key, i, remap):
+        indices = self._indices.setdefault(key, {})
+        if i not in indices:
+            obj = copy.deepcopy(self.source[key][i])
+            target = self.gltf.setdefault(key, [])
+            indices[i] = len(target)
+            target.append(obj)
+            remap(obj)
+        return indices[i]
+
+    def node(self, i):
+        return self._add("nodes", i, self._remap_node)
+
+    def _remap_node(self, node):
+        if "children" in node:
+            node["children"] = [self.node(c) for c in node["children"]]
+        if "mesh" in node:
+            node["mesh"] = self._add("meshes", node["mesh"], self._remap_mesh)
+        if "camera" in node:
+            node["camera"] = self._add("cameras", node["camera"], _no_references)
+        if "skin" in node:
+            node["skin"] = self._add("skins", node["skin"], self._remap_skin)
+        extensions = node.get("extensions", {})
+        if MPEG_AUDIO_SPATIAL in extensions:
+            for source in extensions[MPEG_AUDIO_SPATIAL].get("sources", []):
+                source["accessors"] = [self.accessor(a) for a in source.get("accessors", [])]
+                for sampler in source.get("extras", {}).get("animation", {}).values():
+                    for k in ("input", "output"):
+                        sampler[k] = self.accessor(sampler[k])
+        if KHR_LIGHTS_PUNCTUAL in extensions:
+            light = extensions[KHR_LIGHTS_PUNCTUAL]
+            light["light"] = self._add_root_extension_item(KHR_LIGHTS_PUNCTUAL, "lights", light["light"])
+
+    def _remap_mesh(self, mesh):
+        for primitive in mesh.get("primitives", []):
+            primitive["attributes"] = {k: self.accessor(a) for k, a in primitive["attributes"].items()}
+            if "indices" in primitive:
+                primitive["indices"] = self.accessor(primitive["indices"])
+            if "material" in primitive:
+                primitive["material"] = self._add("materials", primitive["material"], self._remap_texture_infos)
+            if "targets" in primitive:
+                primitive["targets"] = [{k: self.accessor(a) for k, a in t.items()} for t in primitive["targets"]]
+
+    def _remap_skin(self, skin):
+        if "inverseBindMatrices" in skin:
+            skin["inverseBindMatrices"] = self.accessor(skin["inverseBindMatrices"])
+        skin["joints"] = [self.node(j) for j in skin["joints"]]
+        if "skeleton" in skin:
+            skin["skeleton"] = self.node(skin["skeleton"])
+
+    def _remap_texture_infos(self, obj):
+        # texture infos are found in the core material and in material extensions, as "*Texture" objects
+        for key, value in obj.items():
+            if isinstance(value, dict):
+                if key.endswith("Texture") and ("index" in value):
+                    value["index"] = self._add("textures", value["index"], self._remap_texture)
+                self._remap_texture_infos(value)
+
+    def _remap_texture(self, texture):
+        if "sampler" in texture:
+            texture["sampler"] = self._add("samplers", texture["sampler"], _no_references)
+        if "source" in texture:
+            texture["source"] = self._add("images", texture["source"], self._remap_image)
+        for name, ext in texture.get("extensions", {}).items():
+            if name == MPEG_TEXTURE_VIDEO:
+                ext["accessor"] = self.accessor(ext["accessor"])
+            elif "source" in ext:
+                ext["source"] = self._add("images", ext["source"], self._remap_image)
+
+    def _remap_image(self, image):
+        if "bufferView" in image:
+            image["bufferView"] = self.buffer_view(image["bufferView"])
+
+    def accessor(self, i):
+        return self._add("accessors", i, self._remap_accessor)
+
+    def _remap_accessor(self, accessor):
+        if "bufferView" in accessor:
+            accessor["bufferView"] = self.buffer_view(accessor["bufferView"])
+        sparse = accessor.get("sparse")
+        if sparse is not None:
+            sparse["indices"]["bufferView"] = self.buffer_view(sparse["indices"]["bufferView"])
+            sparse["values"]["bufferView"] = self.buffer_view(sparse["values"]["bufferView"])
+        timed = accessor.get("extensions", {}).get(MPEG_ACCESSOR_TIMED)
+        if (timed is not None) and ("bufferView" in timed):
+            timed["bufferView"] = self.buffer_view(timed["bufferView"])
+
+    def buffer_view(self, i):
+        return self._add("bufferViews", i, self._remap_buffer_view)
+
+    def _remap_buffer_view(self, buffer_view):
+        buffer = self.source["buffers"][buffer_view["buffer"]]
+        if MPEG_BUFFER_CIRCULAR in buffer.get("extensions", {}):
+            # circular buffers have no data, the player fills them from the media
+            buffer_view["buffer"] = self._add("buffers", buffer_view["buffer"], self._remap_circular_buffer)
+            return
+        offset = buffer_view.get("byteOffset", 0)
+        chunk = self.read_buffer(buffer_view["buffer"])[offset:offset + buffer_view["byteLength"]]
+        if self.data is None:
+            self.data = bytearray()
+            self._data_buffer = len(self.gltf.setdefault("buffers", []))
+            self.gltf["buffers"].append({"byteLength": 0})
+        self.data += b'\0' * (-len(self.data) % 4)
+        buffer_view["buffer"] = self._data_buffer
+        buffer_view["byteOffset"] = len(self.data)
+        self.data += chunk
+        self.gltf["buffers"][self._data_buffer]["byteLength"] = len(self.data)
+
+    def _remap_circular_buffer(self, buffer):
+        ext = buffer["extensions"][MPEG_BUFFER_CIRCULAR]
+        ext["media"] = self._add_root_extension_item(MPEG_MEDIA, "media", ext["media"])
+
+    def _add_root_extension_item(self, extension, key, i):
+        indices = self._indices.setdefault(f'{extension}.{key}', {})
+        if i not in indices:
+            items = self.gltf.setdefault("extensions", {}).setdefault(extension, {}).setdefault(key, [])
+            indices[i] = len(items)
+            items.append(copy.deepcopy(self.source["extensions"][extension][key][i]))
+        return indices[i]
+
+    def add_animations(self):
+        """
+        copies the animation channels targeting the document's nodes
+        """
+        nodes = self._indices.get("nodes", {})
+        for animation in self.source.get("animations", []):
+            channels = [c for c in animation["channels"] if c["target"].get("node") in nodes]
+            if not channels:
+                continue
+            samplers = {}
+            result = {k: copy.deepcopy(v) for k, v in animation.items() if k not in ("channels", "samplers")}
+            result["channels"] = []
+            result["samplers"] = []
+            for channel in channels:
+                if channel["sampler"] not in samplers:
+                    sampler = copy.deepcopy(animation["samplers"][channel["sampler"]])
+                    sampler["input"] = self.accessor(sampler["input"])
+                    sampler["output"] = self.accessor(sampler["output"])
+                    samplers[channel["sampler"]] = len(result["samplers"])
+                    result["samplers"].append(sampler)
+                channel = copy.deepcopy(channel)
+                channel["sampler"] = samplers[channel["sampler"]]
+                channel["target"]["node"] = nodes[channel["target"]["node"]]
+                result["channels"].append(channel)
+            self.gltf.setdefault("animations", []).append(result)
+
+    def finalize(self, bin_uri):
+        if self.data is not None:
+            self.gltf["buffers"][self._data_buffer]["uri"] = bin_uri
+        extensions = sorted(_find_extensions(self.gltf))
+        if extensions:
+            self.gltf["extensionsUsed"] = extensions
+            required = [e for e in self.source.get("extensionsRequired", []) if e in extensions]
+            if required:
+                self.gltf["extensionsRequired"] = required
+        return Document(self.name, self.gltf, self.data, bin_uri=bin_uri if self.data is not None else None)
+
+
+def _no_references(obj):
+    pass
+
+
+def _find_extensions(obj, found=None):
+    found = set() if found is None else found
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == "extensions" and isinstance(value, dict):
+                found.update(value.keys())
+            _find_extensions(value, found)
+    elif isinstance(obj, list):
+        for value in obj:
+            _find_extensions(value, found)
+    return found
+
+
+def _has_anchor(gltf, i):
+    node = gltf["nodes"][i]
+    if MPEG_ANCHOR in node.get("extensions", {}):
+        return True
+    return any(_has_anchor(gltf, c) for c in node.get("children", []))
+
+
+def split(gltf: dict, read_buffer: Callable[[int], bytes], groups: Dict[str, List[int]]) -> List[Document]:
+    """
+    splits `gltf`, `groups` maps a sub-document name to root node indices of the default scene.
+    Root nodes which aren't in a group stay in the base document, the first document returned.
+    Anchored nodes stay in the base document too, as MPEG_anchor trackables refer to marker nodes.
+    """
+    scene_index = gltf.get("scene", 0)
+    split_roots = {}
+    for name, roots in groups.items():
+        for i in roots:
+            if not _has_anchor(gltf, i):
+                split_roots[i] = name
+
+    base = _DocumentBuilder(gltf, read_buffer, None)
+    for key in ("extensions", "extras"):
+        if key in gltf:
+            # root extensions are rebuilt on reference, except for the ones not indexed by objects (eg. MPEG_anchor)
+            base.gltf[key] = copy.deepcopy(gltf[key])
+    for ext in (MPEG_MEDIA, KHR_LIGHTS_PUNCTUAL):
+        base.gltf.get("extensions", {}).pop(ext, None)
+    anchor = base.gltf.get("extensions", {}).get(MPEG_ANCHOR)
+    if anchor is not None:
+        for trackable in anchor.get("trackables", []):
+            if "markerNode" in trackable:
+                trackable["markerNode"] = base.node(trackable["markerNode"])
+    if not base.gltf.get("extensions", True):
+        del base.gltf["extensions"]
+    # the spatial index refers to nodes and accessors of the unsplit document
+    base.gltf.get("extras", {}).pop(MPEG_SPATIAL_INDEX, None)
+    if not base.gltf.get("extras", True):
+        del base.gltf["extras"]
+
+    scenes = []
+    for i, scene in enumerate(gltf.get("scenes", [])):
+        scene = copy.deepcopy(scene)
+        scene["nodes"] = [base.node(n) for n in scene.get("nodes", []) if (i != scene_index) or (n not in split_roots)]
+        scenes.append(scene)
+    base.gltf["scenes"] = scenes
+    if "scene" in gltf:
+        base.gltf["scene"] = gltf["scene"]
+
+    builders = {}
+    for root, name in split_roots.items():
+        if name not in builders:
+            builders[name] = _DocumentBuilder(gltf, read_buffer, name)
+            builders[name].gltf["scenes"] = [{"name": name, "nodes": []}]
+            builders[name].gltf["scene"] = 0
+        builder = builders[name]
+        builder.gltf["scenes"][0]["nodes"].append(builder.node(root))
+
+    base.add_animations()
+    for builder in builders.values():
+        builder.add_animations()
+    return [base, *builders.values()]
+
+
+def finalize(documents, filepath) -> List[Document]:
+    """
+    finalizes the documents built by `split`, the base document is named after `filepath` and
+    sub-documents after <stem>.<name>.gltf, they are listed in the base document's root extras
+    """
+    filepath = Path(filepath)
+    base, subs = documents[0], documents[1:]
+    results = []
+    for builder in subs:
+        suffix = ''.join(c if (c.isalnum() or c in '-_') else '_' for c in builder.name)
+        doc = builder.finalize(f'{filepath.stem}.{suffix}.bin')
+        doc.uri = f'{filepath.stem}.{suffix}.gltf'
+        results.append(doc)
+
+    doc = base.finalize(f'{filepath.stem}.bin')
+    doc.uri = filepath.name
+    if results:
+        extras = doc.gltf.setdefault("extras", {})
+        extras[SUB_SCENES] = [{
+            "name": d.name,
+            "uri": d.uri,
+            "media": len(d.gltf.get("extensions", {}).get(MPEG_MEDIA, {}).get("media", [])),
+            "byteLength": len(d.data) if d.data is not None else 0
+        } for d in results]
+    results.insert(0, doc)
+    return results
+
+
+def write(documents, directory):
+    """
+    writes finalized documents, and their binary data, to `directory`
+    """
+    directory = Path(directory)
+    for d in documents:
+        if d.data is not None:
+            (directory / d.bin_uri).write_bytes(d.data)
+        with open(directory / d.uri, 'w', encoding='utf-8') as f:
+            json.dump(d.gltf, f, indent=2)
+    return documents
@@ -0,0 +1,243 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""
+Estimates the player-side cost of an exported glTF: per-frame memory and bandwidth of
+the MPEG_buffer_circular buffers, and the number of media decoded concurrently.
+Works on the glTF json only, it doesn't depend on Blender.
+"""
+
+import json
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from .MPEG_media import Media
+
+MPEG_MEDIA = "MPEG_media"
+MPEG_BUFFER_CIRCULAR = "MPEG_buffer_circular"
+MPEG_ACCESSOR_TIMED = "MPEG_accessor_timed"
+MPEG_TEXTURE_VIDEO = "MPEG_texture_video"
+MPEG_AUDIO_SPATIAL = "MPEG_audio_spatial"
+
+# ISO/IEC 23090-14, MPEG_buffer_circular.count default value
+DEFAULT_CIRCULAR_BUFFER_COUNT = 2
+
+COMPONENT_SIZES = {5120: 1, 5121: 1, 5122: 2, 5123: 2, 5125: 4, 5126: 4}
+NUM_COMPONENTS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+
+@dataclass
+class MediaReport:
+    index: int
+    uri: Optional[str]
+    mime_type: Optional[str]
+    kind: str
+    buffers: List[int] = field(default_factory=list)
+    """bytes of a single frame, over all circular buffers fed by the media"""
+    frame_bytes: int = 0
+    """bytes per second written to the circular buffers, at the accessors' suggestedUpdateRate"""
+    bytes_per_second: float = 0.0
+    """memory allocated for the circular buffers: frame bytes * buffer count"""
+    circular_buffer_bytes: int = 0
+
+
+@dataclass
+class AnalysisReport:
+    media: List[MediaReport] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+
+    @property
+    def total_frame_bytes(self):
+        return sum(m.frame_bytes for m in self.media)
+
+    @property
+    def total_bytes_per_second(self):
+        return sum(m.bytes_per_second for m in self.media)
+
+    @property
+    def total_circular_buffer_bytes(self):
+        return sum(m.circular_buffer_bytes for m in self.media)
+
+    @property
+    def concurrent_decoders(self):
+        return sum(1 for m in self.media if m.buffers)
+
+    def decoders(self, kind):
+        return sum(1 for m in self.media if m.buffers and (m.kind == kind))
+
+    def to_dict(self):
+        return {
+            "media": [asdict(m) for m in self.media],
+            "issues": self.issues,
+            "totalFrameBytes": self.total_frame_bytes,
+            "totalBytesPerSecond": self.total_bytes_per_second,
+            "totalCircularBufferBytes": self.total_circular_buffer_bytes,
+            "concurrentDecoders": self.concurrent_decoders,
+            "videoDecoders": self.decoders("video"),
+            "audioDecoders": self.decoders("audio"),
+        }
+
+
+def _element_size(accessor):
+    return COMPONENT_SIZES[accessor["componentType"]] * NUM_COMPONENTS[accessor["type"]]
+
+
+def _accessor_kinds(gltf) -> Dict[int, str]:
+    kinds = {}
+    for texture in gltf.get("textures", []):
+        ext = texture.get("extensions", {}).get(MPEG_TEXTURE_VIDEO)
+        if ext is not None:
+            kinds[ext["accessor"]] = "video"
+    for node in gltf.get("nodes", []):
+        ext = node.get("extensions", {}).get(MPEG_AUDIO_SPATIAL)
+        if ext is not None:
+            for source in ext.get("sources", []):
+                for a in source.get("accessors", []):
+                    kinds[a] = "audio"
+    return kinds
+
+
+def _check_accessor(i, accessor, buffer_views, issues):
+    view_index = accessor.get("bufferView")
+    if view_index is None:
+        return
+    if view_index >= len(buffer_views):
+        issues.append(f'accessor {i}: bufferView {view_index} does not exist')
+        return
+    view = buffer_views[view_index]
+    component_size = COMPONENT_SIZES[accessor["componentType"]]
+    element_size = _element_size(accessor)
+    byte_offset = accessor.get("byteOffset", 0)
+    stride = view.get("byteStride")
+
+    if byte_offset % component_size:
+        issues.append(f'accessor {i}: byteOffset {byte_offset} is not a multiple of the component size {component_size}')
+    if (view.get("byteOffset", 0) + byte_offset) % component_size:
+        issues.append(f'accessor {i}: data is not aligned to its component size {component_size} in the buffer')
+    if stride is not None:
+        if stride % 4:
+            issues.append(f'bufferView {view_index}: byteStride {stride} is not a multiple of 4')
+        if stride < element_size:
+            issues.append(f'accessor {i}: byteStride {stride} is smaller than the element size {element_size}')
+    count = accessor.get("count", 0)
+    if count:
+        extent = byte_offset + (count - 1) * (stride or element_size) + element_size
+        if extent > view.get("byteLength", 0):
+            issues.append(f'accessor {i}: {extent} bytes exceed bufferView {view_index} byteLength {view.get("byteLength", 0)}')
+
+
+def analyze(gltf: dict) -> AnalysisReport:
+    report = AnalysisReport()
+    issues = report.issues
+
+    accessors = gltf.get("accessors", [])
+    buffer_views = gltf.get("bufferViews", [])
+    buffers = gltf.get("buffers", [])
+    kinds = _accessor_kinds(gltf)
+
+    for i, media in enumerate(gltf.get("extensions", {}).get(MPEG_MEDIA, {}).get("media", [])):
+        alternative = Media.from_dict(media).alternatives[0] if media.get("alternatives") else None
+        report.media.append(MediaReport(
+            index=i,
+            uri=alternative.uri if alternative else None,
+            mime_type=alternative.mime_type if alternative else None,
+            kind=(alternative.mime_type.split('/')[0] if alternative else "unknown")
+        ))
+
+    for i, view in enumerate(buffer_views):
+        if view.get("buffer", 0) >= len(buffers):
+            issues.append(f'bufferView {i}: buffer {view.get("buffer")} does not exist')
+        elif view.get("byteOffset", 0) + view.get("byteLength", 0) > buffers[view["buffer"]].get("byteLength", 0):
+            issues.append(f'bufferView {i}: exceeds buffer {view["buffer"]} byteLength')
+
+    # per buffer rate: the highest suggestedUpdateRate of the timed accessors it stores
+    buffer_rates = {}
+    for i, accessor in enumerate(accessors):
+        _check_accessor(i, accessor, buffer_views, issues)
+        timed = accessor.get("extensions", {}).get(MPEG_ACCESSOR_TIMED)
+        if timed is None:
+            continue
+        view_index = accessor.get("bufferView")
+        if (view_index is None) or (view_index >= len(buffer_views)):
+            continue
+        buffer_index = buffer_views[view_index].get("buffer", 0)
+        if buffer_index >= len(buffers):
+            continue
+        if MPEG_BUFFER_CIRCULAR not in buffers[buffer_index].get("extensions", {}):
+            issues.append(f'accessor {i}: timed accessor stored in buffer {buffer_index} which is not a circular buffer')
+        header = timed.get("bufferView")
+        if (header is not None) and (header >= len(buffer_views)):
+            issues.append(f'accessor {i}: timed accessor header bufferView {header} does not exist')
+        rate = timed.get("suggestedUpdateRate")
+        if rate is None:
+            issues.append(f'accessor {i}: timed accessor has no suggestedUpdateRate')
+            continue
+        buffer_rates[buffer_index] = max(rate, buffer_rates.get(buffer_index, 0.0))
+
+    for i, buffer in enumerate(buffers):
+        ext = buffer.get("extensions", {}).get(MPEG_BUFFER_CIRCULAR)
+        if ext is None:
+            continue
+        media_index = ext.get("media")
+        if (media_index is None) or (media_index >= len(report.media)):
+            issues.append(f'buffer {i}: media {media_index} does not exist')
+            continue
+        media = report.media[media_index]
+        frame_bytes = buffer.get("byteLength", 0)
+        media.buffers.append(i)
+        media.frame_bytes += frame_bytes
+        media.bytes_per_second += frame_bytes * buffer_rates.get(i, 0.0)
+        media.circular_buffer_bytes += frame_bytes * ext.get("count", DEFAULT_CIRCULAR_BUFFER_COUNT)
+        if i not in buffer_rates:
+            issues.append(f'buffer {i}: circular buffer without timed accessors')
+
+    # media kind from the extensions consuming it, mime types may be manifests (eg. DASH)
+    for i, accessor in enumerate(accessors):
+        kind = kinds.get(i)
+        view_index = accessor.get("bufferView")
+        if (kind is None) or (view_index is None) or (view_index >= len(buffer_views)):
+            continue
+        buffer_index = buffer_views[view_index].get("buffer", 0)
+        if buffer_index >= len(buffers):
+            continue
+        ext = buffers[buffer_index].get("extensions", {}).get(MPEG_BUFFER_CIRCULAR)
+        if (ext is not None) and (ext.get("media") is not None) and (ext["media"] < len(report.media)):
+            report.media[ext["media"]].kind = kind
+
+    return report
+
+
+def analyze_file(filepath) -> AnalysisReport:
+    with open(filepath, encoding='utf-8') as f:
+        return analyze(json.load(f))
+
+
+def format_bytes(n):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(n) < 1024.0:
+            return f'{n:.1f} {unit}'
+        n /= 1024.0
+    return f'{n:.1f} TiB'
+
+
+def format_report(report: AnalysisReport) -> str:
+    lines = []
+    for m in report.media:
+        lines.append(f'media {m.index} [{m.kind}] {m.uri} ({m.mime_type})')
+        lines.append(f'    buffers {m.buffers}  frame {format_bytes(m.frame_bytes)}  '
+                     f'{format_bytes(m.bytes_per_second)}/s  circular buffers {format_bytes(m.circular_buffer_bytes)}')
+    lines.append(f'total: frame {format_bytes(report.total_frame_bytes)}  '
+                 f'{format_bytes(report.total_bytes_per_second)}/s  circular buffers {format_bytes(report.total_circular_buffer_bytes)}')
+    lines.append(f'concurrent decoders: {report.concurrent_decoders} '
+                 f'(video {report.decoders("video")}, audio {report.decoders("audio")})')
+    if report.issues:
+        lines.append(f'{len(report.issues)} issue(s):')
+        lines += [f'    {issue}' for issue in report.issues]
+    return '\n'.join(lines)
@@ -0,0 +1,360 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""
+Reads the sample tables of MP4 (ISO BMFF) files and reports their keyframe intervals, and the
+cost of looping: the frames a player decodes from the preceding keyframe before it can show
+the frame it loops back to. Only the file headers are read, it doesn't depend on Blender.
+"""
+
+import bisect
+import json
+import struct
+from dataclasses import dataclass, field
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import unquote
+
+from .MPEG_media import Media
+
+# ISO/IEC 14496-12, sample_is_non_sync_sample bit of the fragments' sample flags
+NON_SYNC_SAMPLE_FLAG = 0x10000
+
+HANDLER_KINDS = {b'vide': 'video', b'soun': 'audio'}
+
+# progressive alternatives the analysis applies to
+MP4_MIME_TYPES = ('video/mp4', 'audio/mp4')
+
+
+class Mp4Error(ValueError):
+    pass
+
+
+@dataclass
+class TrackSamples:
+    track_id: int
+    kind: str
+    timescale: int
+    """sample durations in timescale units, in decoding order"""
+    durations: List[int] = field(default_factory=list)
+    """composition time offsets, None when samples are presented in decoding order"""
+    composition_offsets: Optional[List[int]] = None
+    """0 based indices of the sync samples (keyframes), None when every sample is a sync sample"""
+    sync_samples: Optional[List[int]] = None
+    """media time of the first presented sample, from the edit list"""
+    media_start: int = 0
+
+
+@dataclass
+class GopReport:
+    kind: str
+    frames: int
+    keyframes: int
+    """media duration, in seconds"""
+    duration: float
+    """longest and mean keyframe intervals, in seconds"""
+    max_keyframe_interval: float
+    mean_keyframe_interval: float
+    """presentation time the media loops back to, in seconds"""
+    loop_start: float = 0.0
+    """frames decoded from the preceding keyframe before the loop start frame is shown"""
+    loop_frames: int = 0
+    """duration of those frames, in seconds: the player decodes them at each loop"""
+    loop_seconds: float = 0.0
+
+
+@dataclass
+class MediaGopReport:
+    index: int
+    uri: Optional[str]
+    report: Optional[GopReport] = None
+    error: Optional[str] = None
+
+
+def _iter_boxes(data, offset=0, end=None):
+    """
+    yields (type, payload offset, box end) of the boxes in data[offset:end]
+    """
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', data, offset + 8)
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if (size < header) or (offset + size > end):
+            raise Mp4Error(f'invalid {box_type.decode("latin-1")} box at {offset}')
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _find_box(data, start, end, *path):
+    for box_type, s, e in _iter_boxes(data, start, end):
+        if box_type == path[0]:
+            return (s, e) if len(path) == 1 else _find_box(data, s, e, *path[1:])
+    return None
+
+
+def _read_top_level_boxes(f):
+    """
+    yields (type, payload) of the moov and moof boxes, without reading the media data
+    """
+    f.seek(0, 2)
+    file_size = f.tell()
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', header, 8)
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if (size < header_size) or (offset + size > file_size):
+            raise Mp4Error(f'invalid {box_type.decode("latin-1")} box at {offset}')
+        if box_type in (b'moov', b'moof'):
+            f.seek(offset + header_size)
+            yield box_type, f.read(size - header_size)
+        offset += size
+
+
+def _full_box_flags(data, offset):
+    return data[offset], int.from_bytes(data[offset + 1:offset + 4], 'big')
+
+
+def _parse_trak(data, start, end) -> Optional[TrackSamples]:
+    tkhd = _find_box(data, start, end, b'tkhd')
+    mdhd = _find_box(data, start, end, b'mdia', b'mdhd')
+    hdlr = _find_box(data, start, end, b'mdia', b'hdlr')
+    stbl = _find_box(data, start, end, b'mdia', b'minf', b'stbl')
+    if None in (tkhd, mdhd, hdlr, stbl):
+        raise Mp4Error('incomplete track')
+    kind = HANDLER_KINDS.get(data[hdlr[0] + 8:hdlr[0] + 12])
+    if kind is None:
+        return None
+
+    version = data[tkhd[0]]
+    track_id, = struct.unpack_from('>I', data, tkhd[0] + (20 if version == 1 else 12))
+    version = data[mdhd[0]]
+    timescale, = struct.unpack_from('>I', data, mdhd[0] + (20 if version == 1 else 12))
+    track = TrackSamples(track_id, kind, timescale)
+
+    for box_type, s, e in _iter_boxes(data, *stbl):
+        if box_type == b'stts':
+            count, = struct.unpack_from('>I', data, s + 4)
+            for sample_count, delta in struct.iter_unpack('>II', data[s + 8:s + 8 + count * 8]):
+                track.durations.extend([delta] * sample_count)
+        elif box_type == b'ctts':
+            version, _ = _full_box_flags(data, s)
+            count, = struct.unpack_from('>I', data, s + 4)
+            track.composition_offsets = []
+            for sample_count, offset in struct.iter_unpack('>Ii' if version == 1 else '>II', data[s + 8:s + 8 + count * 8]):
+                track.composition_offsets.extend([offset] * sample_count)
+        elif box_type == b'stss':
+            count, = struct.unpack_from('>I', data, s + 4)
+            track.sync_samples = [n - 1 for n in struct.unpack_from(f'>{count}I', data, s + 8)]
+
+    elst = _find_box(data, start, end, b'edts', b'elst')
+    if elst is not None:
+        version, _ = _full_box_flags(data, elst[0])
+        count, = struct.unpack_from('>I', data, elst[0] + 4)
+        entry_format = '>Qqhh' if version == 1 else '>Iihh'
+        entry_size = struct.calcsize(entry_format)
+        for i in range(count):
+            _, media_time, _, _ = struct.unpack_from(entry_format, data, elst[0] + 8 + i * entry_size)
+            # empty edits (-1) delay the presentation, the first other edit gives the first presented sample
+            if media_time >= 0:
+                track.media_start = media_time
+                break
+    return track
+
+
+def _parse_traf(data, start, end, tracks, trex):
+    track = None
+    default_duration = default_flags = 0
+    for box_type, s, e in _iter_boxes(data, start, end):
+        if box_type == b'tfhd':
+            _, flags = _full_box_flags(data, s)
+            track_id, = struct.unpack_from('>I', data, s + 4)
+            track = tracks.get(track_id)
+            default_duration, default_flags = trex.get(track_id, (0, 0))
+            pos = s + 8
+            if flags & 0x01:  # base data offset
+                pos += 8
+            if flags & 0x02:  # sample description index
+                pos += 4
+            if flags & 0x08:
+                default_duration, = struct.unpack_from('>I', data, pos)
+                pos += 4
+            if flags & 0x10:  # default sample size
+                pos += 4
+            if flags & 0x20:
+                default_flags, = struct.unpack_from('>I', data, pos)
+        elif (box_type == b'trun') and (track is not None):
+            _parse_trun(data, s, track, default_duration, default_flags)
+
+
+def _parse_trun(data, s, track, default_duration, default_flags):
+    version, flags = _full_box_flags(data, s)
+    count, = struct.unpack_from('>I', data, s + 4)
+    pos = s + 8
+    if flags & 0x001:  # data offset
+        pos += 4
+    first_flags = None
+    if flags & 0x004:
+        first_flags, = struct.unpack_from('>I', data, pos)
+        pos += 4
+    # samples of the fragments follow those of the sample tables, usually none
+    if track.sync_samples is None:
+        track.sync_samples = list(range(len(track.durations)))
+    if (flags & 0x800) and (track.composition_offsets is None):
+        track.composition_offsets = [0] * len(track.durations)
+
+    for i in range(count):
+        duration = default_duration
+        sample_flags = first_flags if (i == 0) and (first_flags is not None) else default_flags
+        if flags & 0x100:
+            duration, = struct.unpack_from('>I', data, pos)
+            pos += 4
+        if flags & 0x200:  # sample size
+            pos += 4
+        if flags & 0x400:
+            sample_flags, = struct.unpack_from('>I', data, pos)
+            pos += 4
+        if not sample_flags & NON_SYNC_SAMPLE_FLAG:
+            track.sync_samples.append(len(track.durations))
+        if track.composition_offsets is not None:
+            offset = 0
+            if flags & 0x800:
+                offset, = struct.unpack_from('>i' if version == 1 else '>I', data, pos)
+                pos += 4
+            track.composition_offsets.append(offset)
+        track.durations.append(duration)
+
+
+def read_tracks(filepath) -> List[TrackSamples]:
+    """
+    returns the samples of the video and audio tracks of an MP4 file, fragmented or not
+    """
+    tracks = {}
+    # track id -> (default sample duration, default sample flags) of the fragments
+    trex = {}
+    found_moov = False
+    try:
+        with open(filepath, 'rb') as f:
+            for box_type, data in _read_top_level_boxes(f):
+                if box_type == b'moov':
+                    found_moov = True
+                    for t, s, e in _iter_boxes(data):
+                        if t == b'trak':
+                            track = _parse_trak(data, s, e)
+                            if track is not None:
+                                tracks[track.track_id] = track
+                        elif t == b'mvex':
+                            for tt, ss, _ in _iter_boxes(data, s, e):
+                                if tt == b'trex':
+                                    track_id, _, duration, _, flags = struct.unpack_from('>5I', data, ss + 4)
+                                    trex[track_id] = (duration, flags)
+                elif found_moov:
+                    for t, s, e in _iter_boxes(data):
+                        if t == b'traf':
+                            _parse_traf(data, s, e, tracks, trex)
+    except struct.error as e:
+        raise Mp4Error(f'truncated box, {e}')
+    if not found_moov:
+        raise Mp4Error('not an MP4 file, no moov box')
+    return list(tracks.values())
+
+
+def analyze_track(track: TrackSamples, loop_start=0.0) -> GopReport:
+    """
+    reports the keyframe intervals of a track, and the frames decoded when seeking to `loop_start` seconds
+    """
+    frames = len(track.durations)
+    if (frames == 0) or (track.timescale == 0):
+        raise Mp4Error(f'track {track.track_id} has no samples')
+    decode_times = [0, *accumulate(track.durations)]
+    total = decode_times[-1]
+    sync = track.sync_samples if track.sync_samples is not None else list(range(frames))
+    if not sync:
+        sync = [0]
+
+    # keyframe intervals, the last one lasts to the end of the media
+    bounds = [decode_times[i] for i in sync] + [total]
+    intervals = [b - a for a, b in zip(bounds, bounds[1:])]
+
+    # the sample shown at loop_start: the last one presented at or before it
+    media_time = track.media_start + round(loop_start * track.timescale)
+    if track.composition_offsets is None:
+        target = max(0, bisect.bisect_right(decode_times, media_time, 0, frames) - 1)
+    else:
+        presented = [(decode_times[i] + track.composition_offsets[i], i) for i in range(frames)]
+        before = [p for p in presented if p[0] <= media_time]
+        target = max(before)[1] if before else min(presented)[1]
+    keyframe = sync[max(0, bisect.bisect_right(sync, target) - 1)]
+    keyframe = min(keyframe, target)
+
+    return GopReport(
+        kind=track.kind,
+        frames=frames,
+        keyframes=len(sync),
+        duration=total / track.timescale,
+        max_keyframe_interval=max(intervals) / track.timescale,
+        mean_keyframe_interval=total / len(sync) / track.timescale,
+        loop_start=loop_start,
+        loop_frames=target - keyframe,
+        loop_seconds=(decode_times[target] - decode_times[keyframe]) / track.timescale
+    )
+
+
+def analyze_gops(filepath, loop_start=0.0, kind='video') -> Optional[GopReport]:
+    """
+    analyzes the first `kind` ('video' or 'audio') track of an MP4 file, None if it has none
+    """
+    for track in read_tracks(filepath):
+        if track.kind == kind:
+            return analyze_track(track, loop_start)
+    return None
+
+
+def analyze_gltf_gops(filepath) -> List[MediaGopReport]:
+    """
+    analyzes the progressive MP4 alternative of each MPEG_media of an exported .gltf, at its loop start
+    """
+    filepath = Path(filepath)
+    with open(filepath, encoding='utf-8') as f:
+        gltf = json.load(f)
+    reports = []
+    for i, m in enumerate(gltf.get("extensions", {}).get("MPEG_media", {}).get("media", [])):
+        media = Media.from_dict(m)
+        alternative = next((a for a in media.alternatives if a.mime_type in MP4_MIME_TYPES), None)
+        if alternative is None:
+            continue
+        report = MediaGopReport(i, alternative.uri)
+        try:
+            report.report = analyze_gops(filepath.parent / unquote(alternative.uri), media.start_time_offset or 0.0,
+                                         alternative.mime_type.split('/')[0])
+            if report.report is None:
+                report.error = 'no matching track'
+        except (OSError, Mp4Error) as e:
+            report.error = str(e)
+        reports.append(report)
+    return reports
+
+
+def format_gop_report(report: GopReport) -> str:
+    return (f'{report.frames} frames, {report.keyframes} keyframes, '
+            f'keyframe interval {report.mean_keyframe_interval:.2f} s (max {report.max_keyframe_interval:.2f} s), '
+            f'loop at {report.loop_start:.3f} s decodes {report.loop_frames} frames ({report.loop_seconds:.2f} s)')
@@ -0,0 +1,369 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""
+Validates MPEG_* extension payloads against the ISO/IEC 23090-14 JSON schemas.
+The schemas are a subset of JSON schema (type, properties, required, enum, minimum, exclusiveMinimum,
+maximum, items, minItems, maxItems), plus `ref` checking that an index refers to an existing glTF
+object and `discriminator` selecting additional constraints from the value of a property.
+Audio source ids are also checked to be unique across the document.
+Each schema is compiled once per process to closures, so that validating a payload
+doesn't interpret the schema again.
+Works on plain dicts, it doesn't depend on Blender.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+MPEG_MEDIA = "MPEG_media"
+MPEG_BUFFER_CIRCULAR = "MPEG_buffer_circular"
+MPEG_ACCESSOR_TIMED = "MPEG_accessor_timed"
+MPEG_TEXTURE_VIDEO = "MPEG_texture_video"
+MPEG_AUDIO_SPATIAL = "MPEG_audio_spatial"
+MPEG_ANCHOR = "MPEG_anchor"
+
+_INDEX = {"type": "integer", "minimum": 0}
+_NUMBER = {"type": "number"}
+_VEC3 = {"type": "array", "items": _NUMBER, "minItems": 3, "maxItems": 3}
+
+
+def _ref(collection):
+    return {"type": "integer", "minimum": 0, "ref": collection}
+
+
+_MEDIA_ALTERNATIVE = {
+    "type": "object",
+    "required": ["mimeType", "uri"],
+    "properties": {
+        "mimeType": {"type": "string"},
+        "uri": {"type": "string"},
+        "tracks": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["track"],
+                "properties": {
+                    "track": {"type": "string"},
+                    "codecs": {"type": "string"},
+                },
+            },
+        },
+        "extraParams": {"type": "object"},
+    },
+}
+
+_MEDIA = {
+    "type": "object",
+    "required": ["alternatives"],
+    "properties": {
+        "name": {"type": "string"},
+        "startTime": {"type": "number", "minimum": 0},
+        "startTimeOffset": {"type": "number", "minimum": 0},
+        "endTimeOffset": {"type": "number", "minimum": 0},
+        "autoplay": {"type": "boolean"},
+        "autoplayGroup": {"type": "integer"},
+        "loop": {"type": "boolean"},
+        "controls": {"type": "boolean"},
+        "alternatives": {"type": "array", "minItems": 1, "items": _MEDIA_ALTERNATIVE},
+    },
+}
+
+_AUDIO_SOURCE = {
+    "type": "object",
+    "required": ["id", "type", "accessors"],
+    "properties": {
+        "id": _INDEX,
+        "type": {"enum": ["Object", "HOA"]},
+        "pregain": _NUMBER,
+        "playbackSpeed": {"type": "number", "exclusiveMinimum": 0},
+        "attenuation": {"enum": ["noAttenuation", "inverseDistance", "linearDistance", "exponentialDistance", "custom"]},
+        "attenuationParameters": {"type": "array", "items": _NUMBER},
+        "referenceDistance": {"type": "number", "minimum": 0},
+        "targetSampleRate": {"type": "integer", "exclusiveMinimum": 0},
+        "accessors": {"type": "array", "minItems": 1, "items": _ref("accessors")},
+        "reverbFeed": {"type": "array", "items": _INDEX},
+        "reverbFeedGain": {"type": "array", "items": _NUMBER},
+    },
+}
+
+_TRACKABLE = {
+    "type": "object",
+    "required": ["type"],
+    "properties": {
+        "type": {"type": "integer", "minimum": 0, "maximum": 7},
+    },
+    "discriminator": {
+        "property": "type",
+        "mapping": {
+            2: {"required": ["path"], "properties": {"path": {"type": "string"}}},
+            3: {"required": ["geometricConstraint"], "properties": {"geometricConstraint": {"enum": [0, 1]}}},
+            4: {"required": ["markerNode"], "properties": {"markerNode": _ref("nodes")}},
+            5: {"required": ["markerNode"], "properties": {"markerNode": _ref("nodes")}},
+            6: {"required": ["coordinates"], "properties": {"coordinates": _VEC3}},
+            7: {"required": ["id"], "properties": {"id": {"type": "string"}}},
+        },
+    },
+}
+
+_ANCHOR = {
+    "type": "object",
+    "required": ["trackable", "requiresAnchoring"],
+    "properties": {
+        "trackable": _ref("trackables"),
+        "requiresAnchoring": {"type": "boolean"},
+        "minimumRequiredSpace": _VEC3,
+        "aligned": {"enum": [0, 1, 2]},
+        "actions": {"type": "array", "items": _INDEX},
+        "light": _INDEX,
+    },
+}
+
+# (extension name, glTF object the extension is on) -> schema
+SCHEMAS = {
+    (MPEG_MEDIA, "root"): {
+        "type": "object",
+        "required": ["media"],
+        "properties": {"media": {"type": "array", "minItems": 1, "items": _MEDIA}},
+    },
+    (MPEG_ANCHOR, "root"): {
+        "type": "object",
+        "properties": {
+            "trackables": {"type": "array", "items": _TRACKABLE},
+            "anchors": {"type": "array", "items": _ANCHOR},
+        },
+    },
+    (MPEG_ANCHOR, "nodes"): {
+        "type": "object",
+        "required": ["anchor"],
+        "properties": {"anchor": _ref("anchors")},
+    },
+    (MPEG_AUDIO_SPATIAL, "nodes"): {
+        "type": "object",
+        "properties": {
+            "sources": {"type": "array", "minItems": 1, "items": _AUDIO_SOURCE},
+            "reverbs": {"type": "array", "items": {"type": "object", "required": ["id"], "properties": {"id": _INDEX}}},
+            "listener": {"type": "object", "required": ["id"], "properties": {"id": _INDEX}},
+        },
+    },
+    (MPEG_TEXTURE_VIDEO, "textures"): {
+        "type": "object",
+        "required": ["accessor", "width", "height"],
+        "properties": {
+            "accessor": _ref("accessors"),
+            "width": {"type": "integer", "minimum": 1},
+            "height": {"type": "integer", "minimum": 1},
+            "format": {"enum": ["RED", "GREEN", "BLUE", "RG", "RGB", "RGBA", "BGR", "BGRA", "DEPTH"]},
+        },
+    },
+    (MPEG_BUFFER_CIRCULAR, "buffers"): {
+        "type": "object",
+        "required": ["media"],
+        "properties": {
+            "count": {"type": "integer", "minimum": 1},
+            "media": _ref("media"),
+            "tracks": {"type": "array", "minItems": 1, "items": _INDEX},
+        },
+    },
+    (MPEG_ACCESSOR_TIMED, "accessors"): {
+        "type": "object",
+        "properties": {
+            "immutable": {"type": "boolean"},
+            "bufferView": _ref("bufferViews"),
+            "suggestedUpdateRate": {"type": "number", "exclusiveMinimum": 0},
+        },
+    },
+}
+
+# glTF collections holding objects with extensions
+COLLECTIONS = ("nodes", "textures", "buffers", "accessors")
+
+# tests of the JSON schema types, bool is a subclass of int
+_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+# python types of the JSON values, checked before the tests above which also accept subclasses
+_EXACT_TYPES = {
+    "object": {dict},
+    "array": {list},
+    "string": {str},
+    "boolean": {bool},
+    "integer": {int},
+    "number": {int, float},
+}
+
+
+def _error(path, message):
+    # paths are built as nested (parent, key) tuples, they are only formatted for errors
+    keys = []
+    while isinstance(path, tuple):
+        path, key = path
+        keys.append(f'[{key}]' if isinstance(key, int) else f'.{key}')
+    return f'{path}{"".join(reversed(keys))}: {message}'
+
+
+_MISSING = object()
+
+
+def compile_schema(schema):
+    """
+    returns check(value, path, errors, counts), appending error messages to `errors`.
+    `counts` maps the glTF collections referenced by `ref` to their length.
+    The schema is only read here, the returned closure holds what each keyword checks.
+    """
+    name = schema.get("type")
+    exact_types = _EXACT_TYPES[name] if name is not None else None
+    is_type = _TYPES[name] if name is not None else None
+    allowed = schema.get("enum")
+    minimum = schema.get("minimum")
+    exclusive_minimum = schema.get("exclusiveMinimum")
+    maximum = schema.get("maximum")
+    bounded = (minimum is not None) or (exclusive_minimum is not None) or (maximum is not None)
+    bounds = ", ".join(f"{k} {schema[k]}" for k in ("minimum", "exclusiveMinimum", "maximum") if k in schema)
+    collection = schema.get("ref")
+    required = tuple(schema.get("required", ()))
+    properties = tuple((k, compile_schema(s)) for k, s in schema.get("properties", {}).items())
+    discriminator = schema.get("discriminator")
+    if discriminator is not None:
+        discriminator_property = discriminator["property"]
+        mapping = tuple((value, compile_schema(s)) for value, s in discriminator["mapping"].items())
+    counted = ("minItems" in schema) or ("maxItems" in schema)
+    min_items = schema.get("minItems", 0)
+    max_items = schema.get("maxItems")
+    expected_items = f'{min_items}..{max_items if max_items is not None else ""}'
+    check_item = compile_schema(schema["items"]) if "items" in schema else None
+
+    def check(value, path, errors, counts):
+        # each failed type, enum or range check skips the following ones,
+        # eg. properties of a value which isn't an object
+        if (exact_types is not None) and (type(value) not in exact_types) and not is_type(value):
+            errors.append(_error(path, f'expected {name}, got {type(value).__name__}'))
+            return
+        if (allowed is not None) and (isinstance(value, bool) or (value not in allowed)):
+            errors.append(_error(path, f'{value!r} is not one of {allowed}'))
+            return
+        if bounded and (((minimum is not None) and (value < minimum))
+                        or ((exclusive_minimum is not None) and (value <= exclusive_minimum))
+                        or ((maximum is not None) and (value > maximum))):
+            errors.append(_error(path, f'{value} out of range ({bounds})'))
+            return
+
+        if collection is not None:
+            n = counts.get(collection)
+            if (n is not None) and (value >= n):
+                errors.append(_error(path, f'{collection} index {value} out of range, {n} {collection}'))
+        for key in required:
+            if key not in value:
+                errors.append(_error(path, f'missing {key}'))
+        for key, check_property in properties:
+            child = value.get(key, _MISSING)
+            if child is not _MISSING:
+                check_property(child, (path, key), errors, counts)
+        if discriminator is not None:
+            selected = value.get(discriminator_property)
+            for key, check_mapped in mapping:
+                if selected == key:
+                    check_mapped(value, path, errors, counts)
+                    break
+        if counted and ((len(value) < min_items) or ((max_items is not None) and (len(value) > max_items))):
+            errors.append(_error(path, f'{len(value)} items, expected {expected_items}'))
+        if check_item is not None:
+            for i, item in enumerate(value):
+                check_item(item, (path, i), errors, counts)
+
+    return check
+
+
+@lru_cache(maxsize=None)
+def get_validator(extension, scope):
+    """
+    returns the compiled validator of an extension on a glTF `scope` ('root' or a collection name),
+    None if there is no schema for it
+    """
+    schema = SCHEMAS.get((extension, scope))
+    return compile_schema(schema) if schema is not None else None
+
+
+def iter_payloads(root_extensions, collections) -> Iterable[Tuple[str, str, str, dict]]:
+    """
+    yields (extension, scope, path, payload) for each MPEG_* extension payload.
+    `collections` maps glTF collection names to the list of their objects `extensions` (or None).
+    """
+    for name, payload in (root_extensions or {}).items():
+        if name.startswith("MPEG_"):
+            yield name, "root", f'extensions.{name}', payload
+    for scope in COLLECTIONS:
+        for i, extensions in enumerate(collections.get(scope, ())):
+            if not extensions:
+                continue
+            for name, payload in extensions.items():
+                if name.startswith("MPEG_"):
+                    yield name, scope, f'{scope}[{i}].extensions.{name}', payload
+
+
+def get_counts(root_extensions, lengths: Dict[str, int]):
+    """
+    returns the number of objects in each collection an index may refer to
+    """
+    root_extensions = root_extensions or {}
+    counts = dict(lengths)
+    counts["media"] = len(root_extensions.get(MPEG_MEDIA, {}).get("media", []))
+    anchor = root_extensions.get(MPEG_ANCHOR, {})
+    counts["trackables"] = len(anchor.get("trackables", []))
+    counts["anchors"] = len(anchor.get("anchors", []))
+    return counts
+
+
+def validate_payloads(payloads, counts) -> List[str]:
+    """
+    validates (extension, scope, path, payload) in one pass, returns the error messages
+    """
+    errors = []
+    # audio source id -> path of the first source using it
+    source_ids = {}
+    for extension, scope, path, payload in payloads:
+        check = get_validator(extension, scope)
+        if check is not None:
+            check(payload, path, errors, counts)
+        if extension == MPEG_AUDIO_SPATIAL:
+            _check_source_ids(payload, path, source_ids, errors)
+    return errors
+
+
+def _check_source_ids(payload, path, source_ids, errors):
+    # players identify the audio sources by id, ids are unique across the nodes of a document
+    sources = payload.get("sources") if isinstance(payload, dict) else None
+    if not isinstance(sources, list):
+        return
+    for i, source in enumerate(sources):
+        source_id = source.get("id") if isinstance(source, dict) else None
+        if not isinstance(source_id, int):
+            continue
+        source_path = f'{path}.sources[{i}]'
+        if source_id in source_ids:
+            errors.append(_error(source_path, f'audio source id {source_id} is already used by {source_ids[source_id]}'))
+        else:
+            source_ids[source_id] = source_path
+
+
+def validate_gltf(gltf) -> List[str]:
+    """
+    validates the MPEG_* extensions of a glTF json document
+    """
+    root_extensions = gltf.get("extensions", {})
+    collections = {scope: [o.get("extensions") for o in gltf.get(scope, [])] for scope in COLLECTIONS}
+    lengths = {k: len(gltf.get(k, [])) for k in ("accessors", "bufferViews", "buffers", "nodes", "textures")}
+    return validate_payloads(iter_payloads(root_extensions, collections), get_counts(root_extensions, lengths))
@@ -0,0 +1,171 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+import numpy as np
+
+from io_scene_gltf2.io.com import gltf2_io
+from io_scene_gltf2.io.com.gltf2_io_constants import ComponentType, DataType
+from io_scene_gltf2.io.exp import gltf2_io_binary_data
+
+# number of points used to flatten each bezier segment of an fcurve
+BEZIER_SUBDIVISIONS = 16
+
+# segment interpolations evaluated in numpy, easing modes (SINE, BOUNCE, ...) are evaluated by blender
+SAMPLED_INTERPOLATIONS = ('CONSTANT', 'LINEAR', 'BEZIER')
+
+
+def get_fcurve(id_data, data_path, index=0):
+    anim = id_data.animation_data
+    if (anim is None) or (anim.action is None):
+        return None
+    return anim.action.fcurves.find(data_path, index=index)
+
+
+def get_scene_frames(settings):
+    """
+    returns the frames of the exported scene's frame range, and the matching times in seconds
+    """
+    frames = np.arange(settings.frame_start, settings.frame_end + 1, dtype=np.float64)
+    return frames, (frames - settings.frame_start) / settings.fps
+
+
+def sample_fcurve(fcurve, frames):
+    """
+    evaluates an fcurve at the given frames, reading the keyframes in a single batch
+    rather than calling `fcurve.evaluate` once per frame
+    """
+    keyframes = fcurve.keyframe_points
+    n = len(keyframes)
+    if n == 0:
+        return None
+
+    # iterates over keyframes, not frames
+    interpolation = np.array([k.interpolation for k in keyframes[:-1]], dtype=object)
+
+    # modifiers, linear extrapolation and easing modes are not worth re-implementing, fall back to blender
+    if len(fcurve.modifiers) or (fcurve.extrapolation != 'CONSTANT') \
+            or not np.isin(interpolation, SAMPLED_INTERPOLATIONS).all():
+        return np.fromiter((fcurve.evaluate(f) for f in frames), dtype=np.float64, count=len(frames))
+
+    co = _get_keyframes_vec2(keyframes, 'co')
+    if n == 1:
+        return np.full(len(frames), co[0, 1])
+
+    handle_left = _get_keyframes_vec2(keyframes, 'handle_left')
+    handle_right = _get_keyframes_vec2(keyframes, 'handle_right')
+
+    # control points of each segment
+    p0 = co[:-1]
+    p1 = handle_right[:-1].copy()
+    p2 = handle_left[1:].copy()
+    p3 = co[1:]
+
+    # straight (and constant) segments are exact with handles at 1/3 and 2/3 of the segment
+    not_bezier = interpolation != 'BEZIER'
+    p1[not_bezier] = p0[not_bezier] + (p3[not_bezier] - p0[not_bezier]) / 3.0
+    p2[not_bezier] = p0[not_bezier] + (p3[not_bezier] - p0[not_bezier]) * 2.0 / 3.0
+
+    t = np.linspace(0.0, 1.0, BEZIER_SUBDIVISIONS, endpoint=False)[None, :, None]
+    points = ((1 - t) ** 3) * p0[:, None, :] \
+        + 3 * ((1 - t) ** 2) * t * p1[:, None, :] \
+        + 3 * (1 - t) * (t ** 2) * p2[:, None, :] \
+        + (t ** 3) * p3[:, None, :]
+    points = np.concatenate((points.reshape(-1, 2), co[-1:]))
+
+    values = np.interp(frames, points[:, 0], points[:, 1])
+
+    constant = interpolation == 'CONSTANT'
+    if constant.any():
+        segment = np.clip(np.searchsorted(co[:, 0], frames, side='right') - 1, 0, n - 2)
+        hold = constant[segment] & (frames >= co[0, 0]) & (frames < co[-1, 0])
+        values[hold] = co[segment[hold], 1]
+
+    return values
+
+
+def _get_keyframes_vec2(keyframes, attr):
+    a = np.empty(len(keyframes) * 2, dtype=np.float64)
+    keyframes.foreach_get(attr, a)
+    return a.reshape(-1, 2)
+
+
+def reduce_keyframes(values, tolerance, relative=False):
+    """
+    Ramer-Douglas-Peucker simplification of uniformly sampled values.
+    returns the indices of the samples to keep, so that linear interpolation
+    between them stays within tolerance of every dropped sample,
+    or within tolerance times the sample's magnitude if `relative`.
+    """
+    n = len(values)
+    if n < 3:
+        return np.arange(n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if (last - first) < 2:
+            continue
+        k = np.arange(1, last - first) / (last - first)
+        lerp = values[first] + k * (values[last] - values[first])
+        err = np.abs(values[first + 1:last] - lerp)
+        if relative:
+            err = err / np.maximum(np.abs(values[first + 1:last]), np.finfo(float).tiny)
+        i = int(np.argmax(err))
+        if err[i] > tolerance:
+            i += first + 1
+            keep[i] = True
+            stack.append((first, i))
+            stack.append((i, last))
+
+    return np.flatnonzero(keep)
+
+
+def create_scalar_accessor(values, name) -> gltf2_io.Accessor:
+    """
+    creates a float accessor stored in the main glTF buffer
+    """
+    data = np.ascontiguousarray(values, dtype=np.float32)
+    return gltf2_io.Accessor(
+        buffer_view=gltf2_io_binary_data.BinaryData(data.tobytes()),
+        byte_offset=None,
+        component_type=ComponentType.Float,
+        count=len(data),
+        extensions=None,
+        extras=None,
+        max=[float(data.max())],
+        min=[float(data.min())],
+        name=name,
+        normalized=None,
+        sparse=None,
+        type=DataType.Scalar
+    )
+
+
+def get_baked_sampler(fcurve, frames, times, tolerance, name, convert=None, relative=False):
+    """
+    samples an fcurve over the frame range and returns a glTF-like sampler dict:
+    { "input": times accessor, "output": values accessor }
+    values are reduced once converted, `tolerance` is in the units of the output,
+    or a ratio of the output values if `relative`
+    """
+    values = sample_fcurve(fcurve, frames)
+    if values is None:
+        return None
+    if convert is not None:
+        values = convert(values)
+    keep = reduce_keyframes(values, tolerance, relative)
+    values = values[keep]
+    return {
+        "input": create_scalar_accessor(times[keep], f'{name}.input'),
+        "output": create_scalar_accessor(values, f'{name}.output')
+    }
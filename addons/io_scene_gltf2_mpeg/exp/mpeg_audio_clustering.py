@@ -0,0 +1,122 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+import numpy as np
+
+import logging
+
+from .mpeg_media import MediaLibrary
+from .mpeg_stats import ExportStatistics
+from .mpeg_node_index import NodeIndex
+
+log = logging.getLogger(__name__)
+
+
+class AudioClusters:
+    """
+    Merges speakers playing the same sound with the same settings, when they are close to each other,
+    so that the player decodes and renders a single source for them.
+    Speakers are clustered on a regular grid, the cell size grows until the number of sources fits
+    the configured maximum. Each cluster is exported as the source of the speaker nearest to its center,
+    with a pregain compensating for the merged speakers, the other speakers have no source.
+    """
+
+    # speaker object name -> number of speakers it represents, 0 when merged in another source
+    sizes = {}
+
+    @classmethod
+    def reset(cls):
+        cls.sizes = {}
+
+    @classmethod
+    def capture(cls, scene, settings):
+        groups = {}
+        fixed = 0
+        for obj in NodeIndex.get_speakers(scene):
+            if obj.data.sound is None:
+                continue
+            key = _cluster_key(obj)
+            if key is None:
+                fixed += 1
+                continue
+            groups.setdefault(key, []).append(obj)
+
+        positions = {key: np.array([[*_translation(o)] for o in objs], dtype=np.float64) for key, objs in groups.items()}
+        cell_size = settings.audio_cluster_size
+        clusters = {key: cluster_positions(p, cell_size) for key, p in positions.items()}
+        extent = max((np.ptp(p, axis=0).max() for p in positions.values()), default=0.0)
+        while (fixed + sum(c.max() + 1 for c in clusters.values()) > settings.max_audio_sources) and (cell_size <= extent):
+            cell_size *= 2.0
+            clusters = {key: cluster_positions(p, cell_size) for key, p in positions.items()}
+
+        sources = fixed
+        for key, objs in groups.items():
+            labels = clusters[key]
+            p = positions[key]
+            for label in range(labels.max() + 1):
+                members = np.flatnonzero(labels == label)
+                center = p[members].mean(axis=0)
+                representative = members[np.argmin(((p[members] - center) ** 2).sum(axis=1))]
+                for i in members:
+                    cls.sizes[objs[i].name] = 0
+                cls.sizes[objs[representative].name] = len(members)
+                sources += 1
+
+        if sources > settings.max_audio_sources:
+            log.warning(f'{sources} audio sources exceed the maximum of {settings.max_audio_sources}, '
+                        'speakers using different sounds or settings are not merged')
+        ExportStatistics.set("speakers merged in clusters", sum(1 for n in cls.sizes.values() if n == 0))
+        ExportStatistics.set("audio cluster size", cell_size)
+
+    @classmethod
+    def is_merged(cls, blender_node):
+        return cls.sizes.get(blender_node.name) == 0
+
+    @classmethod
+    def get_pregain(cls, blender_node):
+        """
+        returns the gain, in dB, of a cluster's source: the amplitude sum of its speakers.
+        Merged speakers play the same sound from the start of the scene (speakers with sound strips are
+        animated and never merged), their signals are coherent and add up in amplitude, not in power.
+        """
+        n = cls.sizes.get(blender_node.name, 1)
+        return float(20.0 * np.log10(n)) if n > 1 else None
+
+
+def cluster_positions(positions, cell_size):
+    """
+    returns the cluster label of each position (n, 3), labels are the occupied cells of a regular grid
+    """
+    if len(positions) == 0:
+        return np.zeros(0, dtype=np.int64)
+    cells = np.floor(positions / cell_size).astype(np.int64)
+    _, labels = np.unique(cells, axis=0, return_inverse=True)
+    return labels.reshape(-1)
+
+
+def _translation(obj):
+    m = obj.matrix_world
+    return (m[0][3], m[1][3], m[2][3])
+
+
+def _cluster_key(obj):
+    # animated speakers move or change over time, they are never merged
+    speaker = obj.data
+    if (obj.animation_data is not None) or (speaker.animation_data is not None):
+        return None
+    return (
+        MediaLibrary.abspath(speaker.sound.filepath),
+        speaker.volume,
+        speaker.pitch,
+        speaker.distance_max,
+        speaker.distance_reference,
+        speaker.attenuation,
+    )
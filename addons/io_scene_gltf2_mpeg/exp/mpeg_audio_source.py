@@ -12,20 +12,86 @@ import bpy
 
 # https://docs.blender.org/api/current/aud.html
 import aud 
+import numpy as np
+
+import hashlib
 
 from io_scene_gltf2.io.com import gltf2_io, gltf2_io_extensions
 from io_scene_gltf2.io.com.gltf2_io_constants import ComponentType, DataType
 
 from ..com.MPEG_audio_spatial import Attenuation, TypeEnum #, MPEGAudioSpatialSource
 from ..exp.mpeg_media import MediaLibrary, MediaFrame
+from ..exp.mpeg_animation import get_fcurve, get_scene_frames, get_baked_sampler
+from ..exp.mpeg_audio_clustering import AudioClusters
+from ..exp.mpeg_settings import MPEG_SETTINGS
+from ..exp.mpeg_node_index import NodeIndex
 
 MPEG_AUDIO_SPATIAL = "MPEG_audio_spatial"
 
+# lower bound for the pregain of a muted source
+MIN_PREGAIN_DB = -96.0
+
+# audio source ids are positive 31 bit integers
+SOURCE_ID_MASK = 0x7FFFFFFF
+
+
+class AudioSourceIds:
+    """
+    Audio source ids derived from the speaker object names, so that they don't depend on the export
+    order and don't change when other speakers are added or removed.
+    Hash collisions are resolved in name order.
+    The exporter gathers a node for each collection instance of a speaker, passing the same object:
+    further instances get ids derived from the name and their rank in the export order.
+    """
+
+    # speaker object name -> audio source id
+    ids = {}
+    # ids handed out or reserved during this export
+    used = set()
+    # speaker object name -> number of nodes gathered so far
+    instances = {}
+
+    @classmethod
+    def reset(cls):
+        cls.ids = {}
+        cls.used = set()
+        cls.instances = {}
+
+    @classmethod
+    def capture(cls, scene):
+        for name in sorted(obj.name for obj in NodeIndex.get_speakers(scene)):
+            cls.ids[name] = cls._allocate(name)
+
+    @classmethod
+    def get(cls, blender_node):
+        name = blender_node.name
+        rank = cls.instances.get(name, 0)
+        cls.instances[name] = rank + 1
+        if rank == 0:
+            source_id = cls.ids.get(name)
+            return cls._allocate(name) if source_id is None else source_id
+        return cls._allocate(f'{name}\0{rank}')
+
+    @classmethod
+    def _allocate(cls, key):
+        source_id = _hash_source_id(key)
+        while source_id in cls.used:
+            source_id = (source_id + 1) & SOURCE_ID_MASK
+        cls.used.add(source_id)
+        return source_id
+
+
+def _hash_source_id(name):
+    digest = hashlib.blake2b(name.encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'little') & SOURCE_ID_MASK
+
 
 def get_audio_source_extension(blender_node, audio_source_id, export_settings):
     if blender_node.data.sound is None:
         return None
-    elif not export_settings["mpeg_enable_spatial_audio"]:
+    elif not export_settings[MPEG_SETTINGS].enable_spatial_audio:
+        return None
+    elif AudioClusters.is_merged(blender_node):
         return None
 
     src = {
@@ -38,6 +104,14 @@ def get_audio_source_extension(blender_node, audio_source_id, export_settings):
         "referenceDistance": blender_node.data.distance_reference
     }
 
+    pregain = AudioClusters.get_pregain(blender_node)
+    if pregain is not None:
+        src["pregain"] = pregain
+
+    animation = _get_audio_source_animation(blender_node, export_settings)
+    if animation:
+        src["extras"] = { "animation": animation }
+
     return gltf2_io_extensions.Extension(
             name=MPEG_AUDIO_SPATIAL,
             extension={
@@ -54,6 +128,50 @@ def export_audio_source(sound, export_settings):
     tmp.write(out, aud.RATE_44100, aud.CHANNELS_MONO, aud.FORMAT_FLOAT32, aud.CONTAINER_MP3, aud.CODEC_MP3, 128000, 128000)    
 
 
+def _get_audio_source_animation(blender_node, export_settings):
+    # the core exporter handles the speaker's transform animations (node animation channels),
+    # volume and pitch are speaker properties with no glTF equivalent and are baked here.
+    settings = export_settings[MPEG_SETTINGS]
+    if not settings.bake_audio_animation:
+        return None
+
+    speaker = blender_node.data
+    # the tolerance is a relative error: a constant level error in dB, and a ratio of the speed
+    tolerance = settings.audio_animation_tolerance
+    channels = (
+        # (speaker property, MPEG_audio_spatial source property, conversion, tolerance of the converted values,
+        #  relative tolerance)
+        ("volume", "pregain", _volume_to_pregain, 20.0 * np.log10(1.0 + tolerance), False),
+        ("pitch", "playbackSpeed", None, tolerance, True)
+    )
+
+    animation = {}
+    frames = times = None
+    for data_path, name, convert, channel_tolerance, relative in channels:
+        fcurve = get_fcurve(speaker, data_path)
+        if fcurve is None:
+            continue
+        if frames is None:
+            frames, times = get_scene_frames(settings)
+        sampler = get_baked_sampler(
+            fcurve, frames, times,
+            tolerance=channel_tolerance,
+            name=f'{MPEG_AUDIO_SPATIAL}.{name}',
+            convert=convert,
+            relative=relative
+        )
+        if sampler is not None:
+            animation[name] = sampler
+
+    return animation
+
+
+def _volume_to_pregain(volume):
+    # blender's volume is a linear gain, the pregain is a level adjustment in dB
+    with np.errstate(divide='ignore'):
+        return np.maximum(20.0 * np.log10(volume), MIN_PREGAIN_DB)
+
+
 def _get_audio_attenuation_args(blender_node, export_settings):
     # see ISO/IEC 23090-14 for audio attenuation functions args [d, md, rf]
     md = blender_node.data.distance_max
@@ -62,7 +180,7 @@ def _get_audio_attenuation_args(blender_node, export_settings):
 
 
 def _get_audio_attenuation_model(export_settings):
-    m = bpy.context.scene.audio_distance_model
+    m = export_settings[MPEG_SETTINGS].audio_distance_model
     if m.startswith('EXPONENTIAL'):    
         return Attenuation.exponentialDistance.value
     elif m.startswith('INVERSE'):
@@ -76,7 +194,7 @@ def _get_audio_attenuation_model(export_settings):
 
 
 def _get_audio_source_samplerate(sound, export_settings):
-    audio_object_codec = export_settings["mpeg_audio_object_codec"]
+    audio_object_codec = export_settings[MPEG_SETTINGS].audio_object_codec
     if audio_object_codec == "MP3":
         return 44100
     elif audio_object_codec == "AAC":
@@ -105,19 +223,20 @@ def _get_audio_source_accessors(sound, export_settings):
     media = MediaLibrary.get_audio_media(sound, export_settings)
     frame = MediaFrame(media)
 
-    # this assumes decoding to fltp sample format
+    # this assumes decoding to fltp sample format, or s16p with normalized short samples
     # TODO: investigate if interleaved is desirable
+    short_samples = export_settings[MPEG_SETTINGS].audio_sample_format == 'SHORT'
     accessor = gltf2_io.Accessor(
         buffer_view=None, 
         byte_offset=0, 
-        component_type=ComponentType.Float, 
+        component_type=ComponentType.Short if short_samples else ComponentType.Float, 
         count=samples_per_frame, 
         extensions=None, 
         extras=None,
         max=None, 
         min=None, 
-        name="MPEG_texture_video.accessor", 
-        normalized=False,
+        name="MPEG_audio_spatial.accessor", 
+        normalized=short_samples,
         sparse=None, 
         type=DataType.Scalar
     )
@@ -10,24 +10,31 @@
 
 import bpy
 
-from .mpeg_video_texture import get_video_texture_extension
-from .mpeg_audio_source import get_audio_source_extension
+from .mpeg_video_texture import get_video_texture_extension, add_video_atlas_texture_transform
+from .mpeg_audio_source import get_audio_source_extension, AudioSourceIds
 from .mpeg_anchor import AnchorRegistry
 from .mpeg_media import MediaLibrary
+from .mpeg_shared_media import SharedMedia
+from .mpeg_video_atlas import VideoAtlas
+from .mpeg_settings import get_mpeg_settings
+from .mpeg_stats import ExportStatistics
+from .mpeg_marker import MarkerImages
+from .mpeg_validation import validate_export
+from .mpeg_spatial_index import add_spatial_index
+from .mpeg_scene_split import SceneSplit
+from .mpeg_manifest import ChangeManifest
+from ..blender.utils import MovieTextureCache
 
 class glTF2ExportMpegExtension:
 
-    audio_source_id = 0
-
     def gather_node_hook(self, gltf2_object, blender_node, export_settings):
-        if not self.enabled:
+        if get_mpeg_settings(export_settings) is None:
             return
         if blender_node.type == "SPEAKER":
-            ext = get_audio_source_extension(blender_node, self.audio_source_id, export_settings)
+            ext = get_audio_source_extension(blender_node, AudioSourceIds.get(blender_node), export_settings)
             if ext is None:
                 return
             _add_gltf_extension(gltf2_object, ext)
-            self.audio_source_id += 1
         if blender_node.xr_anchor.enabled:
             ext = AnchorRegistry.get_node_anchor_extension(blender_node)
             if ext is None:
@@ -35,7 +42,7 @@ class glTF2ExportMpegExtension:
             _add_gltf_extension(gltf2_object, ext)
 
     def gather_texture_hook(self, texture, blender_shader_sockets, export_settings):
-        if not self.enabled:
+        if get_mpeg_settings(export_settings) is None:
             return
         if len(blender_shader_sockets) != 1:
             raise Exception("Unsupported shader sockets configuration")
@@ -44,15 +51,52 @@ class glTF2ExportMpegExtension:
             return
         _add_gltf_extension(texture, ext)
 
+    def gather_image_hook(self, gltf2_image, blender_shader_sockets, export_settings):
+        settings = get_mpeg_settings(export_settings)
+        if (settings is None) or not settings.optimize_markers:
+            return
+        MarkerImages.optimize(gltf2_image, blender_shader_sockets, export_settings, settings.marker_max_size)
+
+    def gather_texture_info_hook(self, texture_info, blender_shader_sockets, export_settings):
+        if get_mpeg_settings(export_settings) is None:
+            return
+        if len(blender_shader_sockets) != 1:
+            return
+        add_video_atlas_texture_transform(texture_info, blender_shader_sockets[0], export_settings)
+
     def gather_gltf_extensions_hook(self, gltf2_object, export_settings):
-        if self.enabled:
-            if export_settings["mpeg_media_exports"]:
+        settings = get_mpeg_settings(export_settings)
+        if settings is not None:
+            VideoAtlas.finalize(export_settings)
+            _fix_up_buffer_references(gltf2_object, export_settings)
+            _fix_anchoring_marker_nodes(gltf2_object, export_settings)
+            if settings.spatial_index:
+                # the index has its own buffer, added once the core buffer references are fixed up
+                add_spatial_index(gltf2_object, export_settings)
+            # strict validation fails the export before media are exported
+            validate_export(gltf2_object, settings.validation)
+            if settings.media_exports:
                 try:
-                    MediaLibrary.export(export_settings)
+                    if SharedMedia.is_active():
+                        SharedMedia.add(MediaLibrary.get_export_jobs(export_settings), settings.media_export_workers)
+                    elif settings.background_media_export and not bpy.app.background:
+                        MediaLibrary.export_in_background(export_settings)
+                    else:
+                        for error in MediaLibrary.export(export_settings).errors:
+                            print(error)
                 except BaseException as e:
                     print(e)
-            _fix_up_buffer_references(gltf2_object, export_settings)
-            _fix_anchoring_marker_nodes(gltf2_object, export_settings)
+            if settings.split_collections:
+                # last, the gathered glTF is replaced with the base document
+                try:
+                    SceneSplit.split(gltf2_object, export_settings)
+                except BaseException as e:
+                    print(e)
+            if settings.write_manifest:
+                # written by the post export callback, before the core exporter writes the .gltf
+                ChangeManifest.capture(gltf2_object)
+            if settings.print_statistics:
+                _report_statistics(export_settings)
     
 
 def _add_gltf_extension(gltf_object, extension):
@@ -61,6 +105,13 @@ def _add_gltf_extension(gltf_object, extension):
     gltf_object.extensions[extension.name] = extension
 
 
+def _report_statistics(export_settings):
+    ExportStatistics.set("movie texture searches", MovieTextureCache.misses)
+    ExportStatistics.set("movie texture cache hits", MovieTextureCache.hits)
+    ExportStatistics.set("movie texture cache hit rate", MovieTextureCache.hit_rate())
+    print(ExportStatistics.report())
+
+
 def _fix_up_buffer_references(gltf2_object, export_settings):
     # the core gltf exporter uses an hardcoded buffer_id=0 resulting in invalid buffer references
     # the core gltf buffer is created last, just before json serialization
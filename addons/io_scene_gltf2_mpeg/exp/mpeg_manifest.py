@@ -0,0 +1,177 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from .mpeg_media_export import MediaExport
+from .mpeg_scene_split import gltf_to_json
+from .mpeg_shared_media import SharedMedia
+
+log = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = '.manifest.json'
+MANIFEST_VERSION = 2
+HASH_CHUNK_SIZE = 1 << 20
+
+SEGMENTED_SUFFIXES = ('.mpd', '.m3u8')
+
+
+class ChangeManifest:
+    """
+    Writes `<name>.manifest.json` next to an exported glTF: the size and sha256 of every file the export
+    references, and which of them changed or were removed since the previous manifest,
+    so that only those need to be uploaded.
+    The exported .gltf is written by the core exporter after the post export callbacks,
+    so its entry is computed from the gathered glTF.
+    """
+
+    # the gathered glTF of the current export
+    gltf2_object = None
+
+    @classmethod
+    def reset(cls):
+        cls.gltf2_object = None
+
+    @classmethod
+    def capture(cls, gltf2_object):
+        """
+        keeps the gathered glTF, its extensions are only serialized once traversed by the core exporter
+        """
+        cls.gltf2_object = gltf2_object
+
+    @classmethod
+    def schedule(cls, export_settings):
+        """
+        writes the manifest once the media files of the export are complete
+        """
+        if export_settings['gltf_format'] == 'GLB':
+            log.warning('the change manifest requires the glTF Separate or glTF Embedded format')
+            return
+        if cls.gltf2_object is None:
+            return
+        filepath = Path(export_settings['gltf_filepath'])
+        gltf = gltf_to_json(cls.gltf2_object)
+        cls.gltf2_object = None
+        if SharedMedia.is_active():
+            SharedMedia.on_done.append(lambda: write_manifest(filepath, gltf))
+        elif MediaExport.pending is not None:
+            MediaExport.pending.on_done.append(lambda: write_manifest(filepath, gltf))
+        else:
+            write_manifest(filepath, gltf)
+
+
+def write_manifest(gltf_path, gltf=None):
+    """
+    `gltf` is the json of the .gltf when it is not written yet, its entry is then the sha256 of its content.
+    returns (changed, removed) file paths, relative to the glTF directory
+    """
+    gltf_path = Path(gltf_path).resolve()
+    manifest_path = gltf_path.with_name(gltf_path.stem + MANIFEST_SUFFIX)
+    previous = {}
+    if manifest_path.exists():
+        try:
+            previous = json.loads(manifest_path.read_text(encoding='utf-8')).get('files', {})
+        except ValueError:
+            pass
+
+    base_dir = gltf_path.parent
+    files = {}
+    for path in sorted(get_exported_files(gltf_path, gltf)):
+        if (path == gltf_path) and (gltf is not None):
+            entry = {'content_sha256': hash_json(gltf)}
+        else:
+            entry = {'size': path.stat().st_size, 'sha256': hash_file(path)}
+        files[Path(os.path.relpath(path, base_dir)).as_posix()] = entry
+
+    changed = sorted(name for name, entry in files.items() if previous.get(name) != entry)
+    removed = sorted(name for name in previous if name not in files)
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'files': files,
+        'changed': changed,
+        'removed': removed
+    }
+    with open(manifest_path, 'w', encoding='utf-8', newline='\n') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f'{manifest_path.name}: {len(files)} files, {len(changed)} changed, {len(removed)} removed')
+    return changed, removed
+
+
+def get_exported_files(gltf_path, gltf=None):
+    """
+    returns the existing local files referenced by a .gltf / .glb, including the documents listed in its
+    `extras.subScenes` and the segments of DASH / HLS media. `gltf` is the json of the .gltf when it is
+    not written yet.
+    """
+    gltf_path = Path(gltf_path).resolve()
+    files = {gltf_path}
+    pending = [(gltf_path, gltf)]
+    while pending:
+        doc_path, gltf = pending.pop()
+        if gltf is None:
+            gltf = read_gltf_json(doc_path)
+        for uri in _get_uris(gltf):
+            path = _local_path(doc_path.parent, uri)
+            if (path is None) or (path in files) or not path.is_file():
+                continue
+            files.add(path)
+            if path.suffix in ('.gltf', '.glb'):
+                pending.append((path, None))
+            elif path.suffix in SEGMENTED_SUFFIXES:
+                files.update(p for p in path.parent.glob(f'{path.stem}-*') if p.is_file())
+    return files
+
+
+def read_gltf_json(path):
+    path = Path(path)
+    if path.suffix == '.glb':
+        with open(path, 'rb') as f:
+            # 12 bytes header, followed by the JSON chunk
+            f.seek(12)
+            length, _ = struct.unpack('<II', f.read(8))
+            return json.loads(f.read(length))
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def _get_uris(gltf):
+    for item in gltf.get('buffers', []) + gltf.get('images', []):
+        if 'uri' in item:
+            yield item['uri']
+    for media in gltf.get('extensions', {}).get('MPEG_media', {}).get('media', []):
+        for alternative in media.get('alternatives', []):
+            yield alternative.get('uri', '')
+    for sub_scene in gltf.get('extras', {}).get('subScenes', []):
+        yield sub_scene.get('uri', '')
+
+
+def _local_path(base_dir, uri):
+    if not uri or uri.startswith('data:') or urlparse(uri).scheme:
+        return None
+    return (base_dir / unquote(uri)).resolve()
+
+
+def hash_json(gltf):
+    # independent of how the json is indented when written
+    content = json.dumps(gltf, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
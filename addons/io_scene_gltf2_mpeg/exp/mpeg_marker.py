@@ -0,0 +1,216 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+import numpy as np
+
+import hashlib
+import logging
+import struct
+import zlib
+from dataclasses import dataclass
+
+from io_scene_gltf2.io.exp import gltf2_io_binary_data
+
+from ..blender.utils import get_tex_from_socket
+from .mpeg_stats import ExportStatistics
+from .mpeg_node_index import NodeIndex
+
+log = logging.getLogger(__name__)
+
+# Harris detector sensitivity
+HARRIS_K = 0.04
+# corners are responses above this fraction of the strongest one
+CORNER_THRESHOLD = 0.01
+# the marker is divided in GRID x GRID cells, trackers need corners spread over the whole image
+COVERAGE_GRID = 8
+# markers with corners in less than this fraction of the cells are reported as weak
+MIN_COVERAGE = 0.5
+# markers with a lower luminance standard deviation are reported as weak
+MIN_CONTRAST = 0.1
+
+
+@dataclass
+class MarkerReport:
+    width: int
+    height: int
+    corners: int
+    coverage: float
+    contrast: float
+    """the downsampled image, png encoded, None if the image is exported unchanged"""
+    png: bytes = None
+
+    @property
+    def weak(self):
+        return (self.coverage < MIN_COVERAGE) or (self.contrast < MIN_CONTRAST)
+
+
+class MarkerImages:
+    """
+    Downsamples the images of 2D markers and scores how well they can be tracked.
+    Reports are cached across exports per image content hash, the pixels are still read on each export.
+    """
+
+    # names of the images used by the scene's 2D markers
+    images = set()
+    # (pixels hash, max size) -> MarkerReport
+    cache = {}
+
+    @classmethod
+    def reset(cls):
+        cls.images = set()
+
+    @classmethod
+    def capture(cls, scene):
+        for obj in (NodeIndex.markers if NodeIndex.captured else scene.objects):
+            if (obj.type != 'MESH') or not obj.xr_marker.enabled or (obj.xr_marker.type != 'MARKER_2D'):
+                continue
+            for slot in obj.material_slots:
+                material = slot.material
+                if (material is None) or (material.node_tree is None):
+                    continue
+                for node in material.node_tree.nodes:
+                    if (node.type == 'TEX_IMAGE') and (node.image is not None):
+                        cls.images.add(node.image.name)
+
+    @classmethod
+    def optimize(cls, gltf2_image, blender_shader_sockets, export_settings, max_size):
+        if not cls.images or (len(blender_shader_sockets) != 1):
+            return
+        tex = get_tex_from_socket(blender_shader_sockets[0], export_settings)
+        if (tex is None) or (tex.shader_node.image.name not in cls.images):
+            return
+
+        image = tex.shader_node.image
+        report = cls.get_report(image, max_size)
+        ExportStatistics.add("marker images")
+        if report.weak:
+            ExportStatistics.add("weak marker images")
+            log.warning(f'marker image {image.name} may be hard to track: corners in {report.coverage:.0%} '
+                        f'of the image, contrast {report.contrast:.2f}')
+        if report.png is not None:
+            _replace_image_data(gltf2_image, report.png)
+
+    @classmethod
+    def get_report(cls, image, max_size):
+        pixels = read_image_pixels(image)
+        key = (hashlib.blake2b(pixels.tobytes(), digest_size=16).hexdigest(), max_size)
+        if key not in cls.cache:
+            cls.cache[key] = analyze_marker(pixels, max_size)
+        return cls.cache[key]
+
+
+def read_image_pixels(image):
+    """
+    returns the image pixels as a float32 (height, width, 4) array, top row first
+    """
+    w, h = image.size
+    pixels = np.empty(w * h * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    return pixels.reshape(h, w, 4)[::-1]
+
+
+def analyze_marker(pixels, max_size) -> MarkerReport:
+    h, w = pixels.shape[:2]
+    scale = min(1.0, max_size / max(w, h))
+    png = None
+    if scale < 1.0:
+        pixels = downsample(pixels, max(1, round(w * scale)), max(1, round(h * scale)))
+        png = encode_png(pixels)
+
+    gray = pixels[..., :3] @ np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+    corners = harris_corners(gray)
+    cells = np.zeros((COVERAGE_GRID, COVERAGE_GRID), dtype=bool)
+    ys, xs = np.nonzero(corners)
+    cells[ys * COVERAGE_GRID // gray.shape[0], xs * COVERAGE_GRID // gray.shape[1]] = True
+    return MarkerReport(
+        width=gray.shape[1],
+        height=gray.shape[0],
+        corners=len(ys),
+        coverage=float(cells.mean()),
+        contrast=float(gray.std()),
+        png=png
+    )
+
+
+def downsample(pixels, width, height):
+    """
+    area averaging of a (h, w, c) array
+    """
+    h, w = pixels.shape[:2]
+    rows = np.floor(np.arange(height) * h / height).astype(np.int64)
+    cols = np.floor(np.arange(width) * w / width).astype(np.int64)
+    row_counts = np.diff(np.append(rows, h))[:, None, None]
+    col_counts = np.diff(np.append(cols, w))[None, :, None]
+    summed = np.add.reduceat(np.add.reduceat(pixels, rows, axis=0), cols, axis=1)
+    return (summed / (row_counts * col_counts)).astype(np.float32)
+
+
+def harris_corners(gray, window=3):
+    """
+    returns the mask of the pixels whose Harris response is a strong local maximum
+    """
+    dy, dx = np.gradient(gray)
+    ixx = _box_filter(dx * dx, window)
+    iyy = _box_filter(dy * dy, window)
+    ixy = _box_filter(dx * dy, window)
+    response = ixx * iyy - ixy * ixy - HARRIS_K * (ixx + iyy) ** 2
+    strongest = response.max()
+    if strongest <= 0.0:
+        return np.zeros(gray.shape, dtype=bool)
+
+    padded = np.pad(response, 1, mode='constant', constant_values=-np.inf)
+    neighbours = np.max([
+        padded[1 + y:1 + y + gray.shape[0], 1 + x:1 + x + gray.shape[1]]
+        for y in (-1, 0, 1) for x in (-1, 0, 1) if (x, y) != (0, 0)
+    ], axis=0)
+    return (response > CORNER_THRESHOLD * strongest) & (response >= neighbours)
+
+
+def _box_filter(a, window):
+    r = window // 2
+    padded = np.pad(a, r, mode='edge')
+    s = np.cumsum(np.cumsum(padded, axis=0), axis=1)
+    s = np.pad(s, ((1, 0), (1, 0)))
+    h, w = a.shape
+    return (s[window:window + h, window:window + w] - s[:h, window:window + w]
+            - s[window:window + h, :w] + s[:h, :w]) / (window * window)
+
+
+def encode_png(pixels):
+    """
+    encodes float RGBA pixels (h, w, 4), top row first, as an 8 bit RGBA png
+    """
+    h, w = pixels.shape[:2]
+    data = np.clip(np.round(pixels * 255.0), 0, 255).astype(np.uint8)
+    # each row starts with its filter type, 0: None
+    rows = np.concatenate((np.zeros((h, 1), dtype=np.uint8), data.reshape(h, w * 4)), axis=1)
+
+    def chunk(tag, payload):
+        return struct.pack('>I', len(payload)) + tag + payload + struct.pack('>I', zlib.crc32(tag + payload))
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 6, 0, 0, 0)),
+        chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)),
+        chunk(b'IEND', b'')
+    ))
+
+
+def _replace_image_data(gltf2_image, png):
+    if isinstance(gltf2_image.buffer_view, gltf2_io_binary_data.BinaryData):
+        gltf2_image.buffer_view = gltf2_io_binary_data.BinaryData(png)
+        gltf2_image.mime_type = 'image/png'
+    elif hasattr(gltf2_image.uri, 'data'):
+        # images written next to the .gltf are gathered as ImageData, and written once the glTF is serialized
+        from io_scene_gltf2.io.exp.gltf2_io_image_data import ImageData
+        gltf2_image.uri = ImageData(png, 'image/png', gltf2_image.uri.name)
+        if gltf2_image.mime_type is not None:
+            gltf2_image.mime_type = 'image/png'
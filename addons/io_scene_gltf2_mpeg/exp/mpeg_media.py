@@ -10,9 +10,10 @@
 
 import bpy
 
+import logging
 import os
-import shutil
 import struct
+from functools import lru_cache
 from pathlib import Path
 
 from io_scene_gltf2.io.com import gltf2_io_extensions
@@ -21,50 +22,334 @@ from io_scene_gltf2.io.com import gltf2_io  # Accessor, BufferView, Buffer
 
 from typing import List
 from ..com.MPEG_media import Media, MediaAlternative, MediaAlternativeTrack, media_to_dict
+from ..com.mpeg_gop import analyze_gops, format_gop_report, Mp4Error
+from .mpeg_settings import MPEG_SETTINGS
+from .mpeg_stats import ExportStatistics
+from .mpeg_media_export import MediaJob, MediaExport, BITEXACT_ARGS, run_tool
+from .mpeg_packaging import get_segmented_alternatives
+from .mpeg_shared_media import SharedMedia
+from .mpeg_media_store import MediaStore
+
+log = logging.getLogger(__name__)
 
 
 class MediaLibrary:
 
+    # (source file, used range) -> Media
     medias = {}
+    # source files copied to the export dir -> output file name
+    files = {}
+    # media produced at export time (eg. video atlas), output file name -> build(output_path)
+    generated = {}
+    # output file names of the media kept in the media store
+    stored = set()
+
+    @classmethod
+    def reset(cls):
+        cls.medias = {}
+        cls.files = {}
+        cls.generated = {}
+        cls.stored = set()
 
     @classmethod
-    def get_video_media(cls, image, export_settings) -> Media:
+    def get_video_media(cls, image, export_settings, image_user=None, size=None) -> Media:
+        """
+        returns the media of a movie texture, scaled to `size` if it differs from the image size
+        """
         filepath = cls.abspath(image.filepath)
+        settings = export_settings[MPEG_SETTINGS]
+        used_range = get_movie_range(image_user, settings, image.fps) if image_user is not None else None
+        size = tuple(image.size) if size is None else tuple(size)
+        scaled = size != tuple(image.size)
 
         # FIXME: this results in missing tracks definitions
-        if filepath in cls.medias:
-            return cls.medias[filepath]
-
-        m = Media(alternatives=[MediaAlternative('video/mp4', filepath.name)], autoplay=True, loop=True)
-        cls.medias[filepath] = m
-        
+        key = (filepath, used_range, size)
+        if key in cls.medias:
+            return cls.medias[key]
+
+        m = Media(alternatives=[MediaAlternative('video/mp4', cls.uri(cls.file_name(filepath)))], autoplay=True, loop=True)
+        start_offset, end_offset = 0.0, None
+        if used_range is not None:
+            start_time, start_offset, end_offset, loop = used_range
+            m.loop = loop
+            if start_time > 0.0:
+                m.start_time = start_time
+        ranged = (start_offset > 0.0) or (end_offset is not None)
+        # scaled videos are re-encoded, they start with a keyframe
+        loop_encode = (not scaled) and m.loop and cls.check_loop(image, filepath, start_offset, settings)
+        trim = (settings.trim_media and ranged) or loop_encode
+        start, duration = (start_offset, (end_offset - start_offset) if end_offset is not None else None) if trim else (0.0, None)
+
+        if trim or scaled:
+            name = filepath.stem
+            if scaled:
+                name += f'.{size[0]}x{size[1]}'
+            if trim:
+                if ranged:
+                    name += f'.{_format_range(start_offset, end_offset)}'
+            else:
+                m.start_time_offset = start_offset if start_offset > 0.0 else None
+                m.end_time_offset = end_offset
+            if loop_encode:
+                name += '.loop'
+            name += filepath.suffix
+            name = cls.derived_name(filepath, name, settings.segment_duration if loop_encode else None)
+            m.alternatives[0].uri = cls.uri(name)
+            if scaled:
+                cls.add_generated_media(name, lambda output_path: scale_media(
+                    settings.video_encoder, filepath, size, start, duration, output_path))
+                ExportStatistics.add("video pixels/s saved", (image.size[0] * image.size[1] - size[0] * size[1]) * settings.fps)
+            elif loop_encode:
+                cls.add_generated_media(name, lambda output_path: encode_loop(
+                    settings.video_encoder, filepath, start, duration, settings.segment_duration, output_path))
+            else:
+                cls.add_generated_media(name, lambda output_path: trim_media(
+                    settings.video_encoder, filepath, start, duration, output_path))
+        else:
+            if start_offset > 0.0:
+                m.start_time_offset = start_offset
+            m.end_time_offset = end_offset
+            cls.files[filepath] = cls.file_name(filepath)
+
+        # re-encoded videos' codecs parameters are only known once built
+        if not (scaled or loop_encode):
+            cls._add_segmented_alternatives(m, filepath, 'video', start, duration, settings)
+        cls.medias[key] = m
         return m
 
 
     @classmethod
     def get_audio_media(cls, sound, export_settings) -> Media:
         filepath = cls.abspath(sound.filepath)
-        codec = str(export_settings["mpeg_audio_object_codec"]).lower()
+        codec = str(export_settings[MPEG_SETTINGS].audio_object_codec).lower()
         mime_type = f'audio/{codec}'
 
         # FIXME: this results in missing tracks definitions
-        if filepath in cls.medias:
-            return cls.medias[filepath]
+        key = (filepath, None)
+        if key in cls.medias:
+            return cls.medias[key]
         
-        m = Media(alternatives=[MediaAlternative(mime_type, filepath.name)], autoplay=True, loop=True)
-        cls.medias[filepath] = m
+        m = Media(alternatives=[MediaAlternative(mime_type, cls.uri(cls.file_name(filepath)))], autoplay=True, loop=True)
+        cls._add_segmented_alternatives(m, filepath, 'audio', 0.0, None, export_settings[MPEG_SETTINGS])
+        cls.medias[key] = m
+        cls.files[filepath] = cls.file_name(filepath)
         return m
 
+    @classmethod
+    def check_loop(cls, image, filepath, loop_start, settings) -> bool:
+        """
+        reports the keyframe interval of a movie and the frames decoded each time it loops back to `loop_start`,
+        returns True if it should be re-encoded with a keyframe at the loop start
+        """
+        if not settings.analyze_keyframes:
+            return False
+        try:
+            stat = filepath.stat()
+            report = get_gop_report(filepath, stat.st_size, stat.st_mtime_ns, loop_start)
+        except (OSError, Mp4Error) as e:
+            # eg. not an MP4 file
+            log.debug(f'{filepath.name}: keyframes not analyzed, {e}')
+            return False
+        if report is None:
+            return False
+        ExportStatistics.add("analyzed videos")
+        ExportStatistics.max("max keyframe interval", report.max_keyframe_interval)
+        if report.loop_seconds <= settings.max_loop_decode:
+            return False
+        ExportStatistics.add("videos slow to loop")
+        if settings.closed_gop_loops:
+            log.info(f'{image.name}: re-encoded with a keyframe at the loop start, {format_gop_report(report)}')
+            return True
+        log.warning(f'{image.name}: the player stalls at each loop, {format_gop_report(report)}')
+        return False
+
+    @classmethod
+    def _add_segmented_alternatives(cls, media, filepath, kind, start, duration, settings):
+        """
+        adds the DASH and/or HLS alternatives, ahead of the progressive one
+        """
+        if settings.media_packaging == 'NONE':
+            return
+        # an audio and a video media may share the stem, or even the source file
+        name = f'{Path(media.alternatives[-1].uri).name}.{kind}'
+        name = cls.derived_name(filepath, name, kind, start, duration, settings.media_packaging, settings.segment_duration)
+        segmented = get_segmented_alternatives(
+            settings.video_encoder, settings.media_packaging, filepath, name, kind, start, duration, settings.segment_duration)
+        for alternative, build, outputs in segmented:
+            cls.add_generated_media(alternative.uri, build, outputs)
+            if MediaStore.is_active():
+                cls.stored.add(alternative.uri)
+            alternative.uri = cls.uri(alternative.uri)
+        media.alternatives[:0] = [alternative for alternative, _, _ in segmented]
+
+    @classmethod
+    def file_name(cls, filepath):
+        """
+        returns the output name of a media file copied as is, named after its content in the media store
+        """
+        if not MediaStore.is_active():
+            return SharedMedia.claim(filepath.name, (filepath,))
+        name = MediaStore.source_name(filepath)
+        cls.stored.add(name)
+        return name
+
+    @classmethod
+    def derived_name(cls, filepath, name, *params):
+        """
+        returns the output name of a media built from `filepath`, named after its source's content
+        and how it is built (`name` and `params`) in the media store
+        """
+        if not MediaStore.is_active():
+            return SharedMedia.claim(name, (filepath, *params))
+        name = MediaStore.derived_name(filepath, name, *params)
+        cls.stored.add(name)
+        return name
+
+    @classmethod
+    def add_generated_media(cls, name, build, outputs=()):
+        """
+        registers a media file which doesn't exist yet, `build(output_path)` creates it on export.
+        `outputs` are glob patterns of the other files it writes next to output_path
+        """
+        cls.generated[name] = (build, tuple(outputs))
+
+    @classmethod
+    def uri(cls, name):
+        """
+        returns the URI of a media file, relative to the exported .gltf
+        """
+        if (name in cls.stored) and (MediaStore.mode == 'URI'):
+            return MediaStore.uri(name)
+        return SharedMedia.uri(name)
+
     @classmethod
     def abspath(cls, filepath):
         return Path(bpy.path.abspath(filepath)).resolve()
 
     @classmethod
-    def export(cls, export_settings):
-        output_dir = Path(export_settings['gltf_texturedirectory'])
+    def get_export_jobs(cls, export_settings) -> List[MediaJob]:
+        if SharedMedia.is_active():
+            output_dir = SharedMedia.get_output_dir(export_settings)
+        else:
+            output_dir = Path(export_settings['gltf_texturedirectory'])
         os.makedirs(output_dir, exist_ok=True)
-        for src, _ in cls.medias.items():
-            shutil.copy(src, output_dir/src.name)
+        if MediaStore.is_active():
+            os.makedirs(MediaStore.store_dir, exist_ok=True)
+        jobs = [cls._get_job(name, output_dir, size=src.stat().st_size, src=src) for src, name in sorted(cls.files.items())]
+        jobs += [cls._get_job(name, output_dir, build=build, outputs=outputs)
+                 for name, (build, outputs) in sorted(cls.generated.items(), key=lambda g: g[0])]
+        return jobs
+
+    @classmethod
+    def _get_job(cls, name, output_dir, **kwargs) -> MediaJob:
+        if name not in cls.stored:
+            return MediaJob(name, output_dir/name, **kwargs)
+        link_path = output_dir/name if MediaStore.mode == 'HARDLINK' else None
+        return MediaJob(name, MediaStore.store_dir/name, stored=True, link_path=link_path, **kwargs)
+
+    @classmethod
+    def export(cls, export_settings) -> MediaExport:
+        """
+        copies and builds the media files, blocking until done
+        """
+        settings = export_settings[MPEG_SETTINGS]
+        return MediaExport(cls.get_export_jobs(export_settings), settings.media_export_workers).start().wait()
+
+    @classmethod
+    def export_in_background(cls, export_settings):
+        """
+        copies and builds the media files once the glTF export returns, in the media export operator
+        """
+        settings = export_settings[MPEG_SETTINGS]
+        MediaExport.pending = MediaExport(cls.get_export_jobs(export_settings), settings.media_export_workers)
+        bpy.app.timers.register(_invoke_media_export_operator, first_interval=0.0)
+
+
+def _invoke_media_export_operator():
+    # timers run without a window, modal operators need one
+    wm = bpy.context.window_manager
+    with bpy.context.temp_override(window=wm.windows[0]):
+        bpy.ops.mpeg.export_media('INVOKE_DEFAULT')
+
+
+
+def get_movie_range(image_user, settings, movie_fps=None):
+    """
+    returns the range of a movie shown by an image texture over the scene frame range:
+    (start time, start offset, end offset or None if the movie plays to its end, loop)
+    times are in seconds. The start time is in scene time, the offsets are in the movie's time,
+    at `movie_fps` (the scene framerate if unknown).
+    """
+    # scene frame f shows movie frame ((f - frame_start) % frame_duration) + frame_offset,
+    # only frame_start is in scene frames, the other image user values are in movie frames
+    fps = movie_fps or settings.fps
+    offset = max(0, image_user.frame_offset)
+    start_time = max(0, image_user.frame_start - settings.frame_start) / settings.fps
+    # frames of the movie already played when the scene starts
+    skipped = max(0, settings.frame_start - image_user.frame_start)
+    duration = image_user.frame_duration
+    if image_user.use_cyclic:
+        # the media loops over its whole range, the phase of a loop started before the scene isn't kept
+        end = (offset + duration) / fps if duration > 0 else None
+        return (start_time, offset / fps, end, True)
+    if duration <= 0:
+        return (start_time, (offset + skipped) / fps, None, False)
+    # the last frame is held once the scene frame range ends
+    duration = max(1, min(duration, settings.frame_end - image_user.frame_start + 1))
+    # a movie over before the scene starts holds its last frame
+    skipped = min(skipped, duration - 1)
+    start_offset = (offset + skipped) / fps
+    return (start_time, start_offset, start_offset + (duration - skipped) / fps, False)
+
+
+def _format_range(start, end):
+    return f'{start:.3f}-{end:.3f}' if end is not None else f'{start:.3f}-'
+
+
+def trim_media(encoder, src, start, duration, output_path):
+    """
+    stream-copies the [start, start + duration] range of a media using an ffmpeg compatible tool.
+    without re-encoding, the output starts at the keyframe preceding `start`, an edit list skips to `start`
+    """
+    cmd = [encoder, '-y', '-ss', f'{start:.6f}', '-i', str(src)]
+    if duration is not None:
+        cmd += ['-t', f'{duration:.6f}']
+    cmd += ['-map', '0', '-c', 'copy', *BITEXACT_ARGS, str(output_path)]
+    run_tool(cmd)
+
+
+def encode_loop(encoder, src, start, duration, keyframe_interval, output_path):
+    """
+    re-encodes the [start, start + duration] range of a video using an ffmpeg compatible tool, as closed GOPs
+    starting at `start`, so that looping back to the first frame doesn't decode frames of the previous GOP
+    """
+    cmd = [encoder, '-y', '-ss', f'{start:.6f}', '-i', str(src)]
+    if duration is not None:
+        cmd += ['-t', f'{duration:.6f}']
+    cmd += ['-map', '0', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-flags', '+cgop',
+            '-force_key_frames', f'expr:gte(t,n_forced*{keyframe_interval})', '-c:a', 'copy', *BITEXACT_ARGS,
+            str(output_path)]
+    run_tool(cmd)
+
+
+@lru_cache(maxsize=None)
+def get_gop_report(filepath, size, mtime, loop_start):
+    """
+    cached per file size and modification time, the sample tables of long movies take a while to read
+    """
+    return analyze_gops(filepath, loop_start)
+
+
+def scale_media(encoder, src, size, start, duration, output_path):
+    """
+    re-encodes a video at a lower resolution using an ffmpeg compatible tool, optionally trimmed to [start, start + duration]
+    """
+    cmd = [encoder, '-y', '-ss', f'{start:.6f}', '-i', str(src)]
+    if duration is not None:
+        cmd += ['-t', f'{duration:.6f}']
+    cmd += ['-vf', f'scale={size[0]}:{size[1]}', '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-c:a', 'copy', *BITEXACT_ARGS,
+            str(output_path)]
+    run_tool(cmd)
 
     
 #############################################################################
@@ -106,8 +391,8 @@ class MediaFrame:
             if use_headers:
                 header = _get_immutable_header(accessor)
                 if self._header_byte_offset > 0:
-                    header.byte_offet = self._header_byte_offset
-                self._header_byte_offset += header.byte_length
+                    header.byte_offset = self._header_byte_offset
+                self._header_byte_offset = _align(self._header_byte_offset + header.byte_length, 4)
                 extension_dict["bufferView"] = header
             ext = gltf2_io_extensions.Extension(
                     name="MPEG_accessor_timed",
@@ -117,23 +402,40 @@ class MediaFrame:
                 accessor.extensions = {}
             accessor.extensions[ext.name] = ext
             if interleave:
+                byte_offset = _align(byte_offset, ComponentType.get_size(accessor.component_type))
                 accessor.byte_offset = byte_offset
             
-            byte_offset += _accessor_element_size_with_padding(accessor)
+            byte_offset += _accessor_element_size(accessor)
 
         if interleave and (byte_offset > 0):
+            # see: https://registry.khronos.org/glTF/specs/2.0/glTF-2.0.html#data-alignment
+            byte_offset = _align(byte_offset, 4)
             buffer_view.byte_stride = byte_offset
              
         buffer_view.byte_length = count * byte_offset
         self.buffer_views.append(buffer_view)
         self.accessors.append(accessors)
+
+    def resize_buffer_view(self, index, count):
+        """
+        updates a buffer view after the count of its accessors changed, call `finalize` again afterwards
+        """
+        buffer_view = self.buffer_views[index]
+        element_size = 0
+        for accessor in self.accessors[index]:
+            accessor.count = count
+            element_size += _accessor_element_size(accessor)
+        if buffer_view.byte_stride is not None:
+            element_size = buffer_view.byte_stride
+        buffer_view.byte_length = count * element_size
         
     
     def finalize(self):
         self.buffer.byte_length = self._header_byte_offset
         for buffer_view in self.buffer_views:
-            buffer_view.byte_offset = self.buffer.byte_length
-            self.buffer.byte_length += buffer_view.byte_length
+            # accessors of 16 bit components may leave a buffer view unaligned
+            buffer_view.byte_offset = _align(self.buffer.byte_length, 4)
+            self.buffer.byte_length = buffer_view.byte_offset + buffer_view.byte_length
 
     @staticmethod
     def create_media_buffer(media:Media, tracks=None, name=None):
@@ -179,28 +481,36 @@ def _get_immutable_header(accessor, byte_offset=None):
 def _calc_immutable_header_size(accessor):
     # calculates the size of the header refered to by the MPEG_accessor_timed.bufferView
     # see: ISO/IEC 23090-14 - Table 8 – Definition of timed accessor information header fields
-    maxMin = None
     count = DataType.num_elements(accessor.type)
+    component = _HEADER_COMPONENT_FORMATS.get(accessor.component_type)
+    if component is None:
+        raise NotImplementedError(accessor.component_type)
+    # max and min values
+    maxMin = component * count * 2
 
-    if accessor.component_type == ComponentType.Float:
-        maxMin = "f" * count * 2
-    elif accessor.component_type == ComponentType.UnsignedByte:
-        maxMin = "B" * count
-    elif accessor.component_type == ComponentType.Byte:
-        maxMin = "b" * count
-    elif accessor.component_type == ComponentType.UnsignedShort:
-        maxMin = "H" * count
-    elif accessor.component_type == ComponentType.Short:
-        maxMin = "h" * count
-    else:
-        raise NotImplementedError(self.component)
-    
     return struct.calcsize(f'<fII{maxMin}III')
 
 
-def _accessor_element_size_with_padding(accessor):
+_HEADER_COMPONENT_FORMATS = {
+    ComponentType.Float: "f",
+    ComponentType.UnsignedByte: "B",
+    ComponentType.Byte: "b",
+    ComponentType.UnsignedShort: "H",
+    ComponentType.Short: "h",
+    ComponentType.UnsignedInt: "I",
+}
+
+
+def _accessor_element_size(accessor):
     # FIXME: some matrix configurations are not properly padded
     # see: https://registry.khronos.org/glTF/specs/2.0/glTF-2.0.html#data-alignment
+    # vector elements (eg. RGB video frames) are aligned to 4 bytes, the 4 bytes alignment of vertex attributes
+    # doesn't apply to timed scalars (eg. audio samples), which are tightly packed
     length = ComponentType.get_size(accessor.component_type) * DataType.num_elements(accessor.type)
-    padding = (4 - (length % 4))
-    return length + padding if padding > 0 else length
\ No newline at end of file
+    if accessor.type == DataType.Scalar:
+        return length
+    return _align(length, 4)
+
+
+def _align(n, alignment):
+    return n + (-n % alignment)
\ No newline at end of file
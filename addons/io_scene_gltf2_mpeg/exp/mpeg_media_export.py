@@ -0,0 +1,272 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+COPY_CHUNK_SIZE = 1 << 20
+
+# ffmpeg output options leaving out the encoder version, so that unchanged media are rebuilt identically
+BITEXACT_ARGS = ['-fflags', '+bitexact', '-flags', '+bitexact']
+
+# the export running the job of the current worker thread
+_worker = threading.local()
+
+
+@dataclass
+class MediaJob:
+    name: str
+    output_path: Path
+    """expected output size in bytes, 0 when unknown (generated media)"""
+    size: int = 0
+    """copied file"""
+    src: Optional[Path] = None
+    """builds a generated media, build(output_path)"""
+    build: Optional[Callable] = None
+    """time spent copying or building the file, in seconds"""
+    seconds: float = 0.0
+    """the output is in the media store, named after its content: an existing file is up to date"""
+    stored: bool = False
+    """the output was found in the media store"""
+    cached: bool = False
+    """hard link to the output in the export directory"""
+    link_path: Optional[Path] = None
+    """glob patterns of the other files `build` writes next to the output, eg. DASH / HLS segments"""
+    outputs: Tuple[str, ...] = ()
+    """the output is complete"""
+    done: bool = False
+
+    @property
+    def part_path(self):
+        # keep the extension, encoders pick the container from it.
+        # the media store may be written by several Blender instances at once
+        part = f'part.{os.getpid()}' if self.stored else 'part'
+        return self.output_path.with_name(f'{self.output_path.stem}.{part}{self.output_path.suffix}')
+
+    def remove_partial_outputs(self):
+        """
+        removes the files written by an incomplete job
+        """
+        self.part_path.unlink(missing_ok=True)
+        for pattern in self.outputs:
+            for path in self.output_path.parent.glob(pattern):
+                path.unlink(missing_ok=True)
+
+
+class MediaExport:
+    """
+    Copies and builds the media files of an export on a bounded thread pool.
+    Files are written under a temporary name and renamed once complete, so that cancelling
+    never leaves partial media in the output directory. The tools building media are terminated
+    on cancel, so that cancelling doesn't wait for them.
+    """
+
+    # export waiting for the media export operator to run it
+    pending = None
+
+    def __init__(self, jobs: List[MediaJob], workers=4):
+        self.jobs = jobs
+        self.workers = max(1, workers)
+        self.files_done = 0
+        self.bytes_done = 0
+        self.errors = []
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._futures = []
+        # tools started by running jobs, see run_tool
+        self._processes = set()
+        self._start_time = None
+        # called once all files are exported, not when cancelled
+        self.on_done = []
+
+    @property
+    def total_files(self):
+        return len(self.jobs)
+
+    @property
+    def total_bytes(self):
+        return sum(job.size for job in self.jobs)
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='mpeg_media_export')
+        self._futures = [self._executor.submit(self._run, job) for job in self.jobs]
+        return self
+
+    def done(self):
+        return all(f.done() for f in self._futures)
+
+    def wait(self):
+        for f in self._futures:
+            f.result()
+        self._executor.shutdown()
+        self.complete()
+        return self
+
+    def complete(self):
+        """
+        runs the `on_done` callbacks, once all jobs are done
+        """
+        callbacks, self.on_done = self.on_done, []
+        for callback in callbacks:
+            callback()
+
+    def cancel(self):
+        """
+        stops the export without blocking: pending jobs are dropped and running tools terminated.
+        call `cleanup` once `done`, running jobs may still be ending
+        """
+        self._cancelled.set()
+        with self._lock:
+            processes = [*self._processes]
+        for process in processes:
+            process.terminate()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def cleanup(self):
+        """
+        removes the partial outputs of the jobs, once done after a cancel
+        """
+        for job in self.jobs:
+            if not job.done:
+                job.remove_partial_outputs()
+
+    def progress(self):
+        if self.total_bytes:
+            return min(1.0, self.bytes_done / self.total_bytes)
+        return self.files_done / self.total_files if self.total_files else 1.0
+
+    def throughput(self):
+        elapsed = time.perf_counter() - self._start_time if self._start_time is not None else 0.0
+        return self.bytes_done / elapsed if elapsed > 0.0 else 0.0
+
+    def status(self):
+        status = (f'{self.files_done}/{self.total_files} files, '
+                  f'{self.bytes_done / (1 << 20):.1f}/{self.total_bytes / (1 << 20):.1f} MiB, '
+                  f'{self.throughput() / (1 << 20):.1f} MiB/s')
+        cached = sum(1 for job in self.jobs if job.cached)
+        if cached:
+            status += f', {cached} already in the media store'
+        return status
+
+    def _add_bytes(self, n):
+        with self._lock:
+            self.bytes_done += n
+
+    def _track(self, process):
+        with self._lock:
+            self._processes.add(process)
+        # cancelled while starting, `cancel` may have missed it
+        if self.cancelled:
+            process.terminate()
+
+    def _untrack(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+    def _run(self, job: MediaJob):
+        if self.cancelled:
+            return
+        _worker.export = self
+        part = job.part_path
+        t0 = time.perf_counter()
+        try:
+            if job.stored and job.output_path.exists():
+                job.cached = True
+                self._add_bytes(job.size)
+            elif job.src is not None:
+                if job.src.resolve() == job.output_path.resolve():
+                    self._add_bytes(job.size)
+                else:
+                    _copy(job.src, part, self._add_bytes, self._cancelled)
+                    os.replace(part, job.output_path)
+            else:
+                job.build(part)
+                if self.cancelled:
+                    job.remove_partial_outputs()
+                    return
+                self._add_bytes(part.stat().st_size)
+                os.replace(part, job.output_path)
+            if job.link_path is not None:
+                _link(job.output_path, job.link_path)
+            job.seconds = time.perf_counter() - t0
+            job.done = True
+            with self._lock:
+                self.files_done += 1
+        except Exception as e:
+            job.remove_partial_outputs()
+            if not self.cancelled:
+                with self._lock:
+                    self.errors.append(f'{job.name}: {e}')
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def run_tool(cmd):
+    """
+    runs an ffmpeg compatible tool, raises subprocess.CalledProcessError if it fails.
+    tools run by the jobs of a MediaExport are terminated when it is cancelled
+    """
+    export = getattr(_worker, 'export', None)
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if export is not None:
+        export._track(process)
+    try:
+        stdout, stderr = process.communicate()
+    finally:
+        if export is not None:
+            export._untrack(process)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return stdout
+
+
+def _link(src, dst):
+    """
+    hard links a stored media file, and the segments built next to it (<name>-*), into the export directory.
+    files are copied instead when the store is on another file system
+    """
+    for path in [src, *src.parent.glob(f'{src.stem}-*')]:
+        target = dst.with_name(path.name)
+        # named after their content, existing files are up to date
+        if target.exists():
+            continue
+        try:
+            os.link(path, target)
+        except OSError:
+            part = target.with_name(f'{target.stem}.part{target.suffix}')
+            shutil.copyfile(path, part)
+            os.replace(part, target)
+
+
+def _copy(src, dst, on_progress, cancelled):
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        while True:
+            if cancelled.is_set():
+                raise _Cancelled()
+            chunk = fsrc.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            fdst.write(chunk)
+            on_progress(len(chunk))
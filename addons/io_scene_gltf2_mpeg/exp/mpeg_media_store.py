@@ -0,0 +1,80 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import hashlib
+import os
+from pathlib import Path
+
+from ..com.content_hash import get_digest
+
+# length of the hex digests naming the stored files
+NAME_DIGEST_LENGTH = 32
+
+
+class MediaStore:
+    """
+    Content-addressed media directory shared by exports, possibly of different projects.
+    Copied media are named after a hash of their content, media built at export time after a hash of
+    their source's content and of how they are built. Identical media are then stored once, and different
+    files with the same name don't overwrite each other. Exports refer to the stored files with relative
+    URIs, or hard link them into their own directory.
+    """
+
+    # store directory, None when the media are copied next to the exported glTF
+    store_dir = None
+    # 'URI' or 'HARDLINK'
+    mode = 'URI'
+    # directory of the exported glTF, URIs are relative to it
+    gltf_dir = None
+
+    @classmethod
+    def reset(cls):
+        cls.store_dir = None
+        cls.mode = 'URI'
+        cls.gltf_dir = None
+
+    @classmethod
+    def capture(cls, settings, export_settings):
+        cls.store_dir = Path(settings.media_store).resolve()
+        cls.mode = settings.media_store_mode
+        cls.gltf_dir = Path(export_settings['gltf_filedirectory']).resolve()
+
+    @classmethod
+    def is_active(cls):
+        return cls.store_dir is not None
+
+    @classmethod
+    def source_name(cls, filepath: Path) -> str:
+        """
+        returns the stored name of a media file copied as is
+        """
+        # the content hash is shared with the movie proxies, each file is hashed once per session
+        return get_digest(filepath)[:NAME_DIGEST_LENGTH] + filepath.suffix.lower()
+
+    @classmethod
+    def derived_name(cls, filepath: Path, name, *params) -> str:
+        """
+        returns the stored name of a media built from `filepath`, `name` and `params` describing how it is built
+        """
+        recipe = '\n'.join([get_digest(filepath), name.removeprefix(filepath.stem), *map(str, params)])
+        h = hashlib.blake2b(recipe.encode('utf-8'), digest_size=NAME_DIGEST_LENGTH // 2)
+        return h.hexdigest() + Path(name).suffix.lower()
+
+    @classmethod
+    def uri(cls, name):
+        """
+        returns the URI of a stored file, relative to the exported glTF
+        """
+        path = cls.store_dir / name
+        try:
+            return Path(os.path.relpath(path, cls.gltf_dir)).as_posix()
+        except ValueError:
+            # the store is on another drive
+            return path.as_uri()
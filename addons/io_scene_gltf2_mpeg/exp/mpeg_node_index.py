@@ -0,0 +1,60 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+
+class NodeIndex:
+    """
+    Speaker and marker objects, classified once per export for the speaker and marker captures.
+    The objects are walked as the core exporter does: the scene objects, hidden ones included,
+    and the objects of the collections they instance, so speakers and markers only present through
+    collection instances are captured.
+    It is only captured when those captures need it, the node hook checks each node itself.
+    """
+
+    captured = False
+    # speaker object name -> object
+    speakers = {}
+    # marker objects
+    markers = []
+
+    @classmethod
+    def reset(cls):
+        cls.captured = False
+        cls.speakers = {}
+        cls.markers = []
+
+    @classmethod
+    def capture(cls, scene):
+        for obj in _get_exported_objects(scene):
+            if obj.type == 'SPEAKER':
+                cls.speakers[obj.name] = obj
+            if obj.xr_marker.enabled:
+                cls.markers.append(obj)
+        cls.captured = True
+
+    @classmethod
+    def get_speakers(cls, scene):
+        return cls.speakers.values() if cls.captured else [o for o in scene.objects if o.type == 'SPEAKER']
+
+
+def _get_exported_objects(scene):
+    # instanced objects are exported as nodes of the original objects, each object is listed once
+    seen = set()
+    visited = set()
+    pending = [scene.objects]
+    while pending:
+        for obj in pending.pop():
+            if obj.name not in seen:
+                seen.add(obj.name)
+                yield obj
+            collection = obj.instance_collection
+            if (obj.instance_type == 'COLLECTION') and (collection is not None) and (collection.name not in visited):
+                visited.add(collection.name)
+                pending.append(collection.all_objects)
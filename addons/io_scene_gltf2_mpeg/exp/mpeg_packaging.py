@@ -0,0 +1,144 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import json
+import logging
+import subprocess
+from functools import lru_cache
+from pathlib import Path
+
+from ..com.MPEG_media import MediaAlternative, MediaAlternativeTrack
+from .mpeg_media_export import BITEXACT_ARGS, run_tool
+
+log = logging.getLogger(__name__)
+
+DASH_MIME_TYPE = 'application/dash+xml'
+HLS_MIME_TYPE = 'application/vnd.apple.mpegurl'
+
+# the single stream of a media is packaged as adaptation set / rendition 0
+TRACK_ID = 0
+
+H264_PROFILES = {
+    'Constrained Baseline': (66, 0x40),
+    'Baseline': (66, 0x00),
+    'Main': (77, 0x00),
+    'Extended': (88, 0x00),
+    'High': (100, 0x00),
+    'High 10': (110, 0x00),
+    'High 4:2:2': (122, 0x00),
+    'High 4:4:4 Predictive': (244, 0x00),
+}
+
+AAC_OBJECT_TYPES = {'LC': 2, 'HE-AAC': 5, 'HE-AACv2': 29, 'Main': 1, 'SSR': 3, 'LTP': 4}
+
+
+def rfc6381_codecs(stream):
+    """
+    returns the RFC 6381 codecs parameter of an ffprobe stream, or None if the codec isn't supported
+    """
+    codec = stream.get('codec_name')
+    if codec == 'h264':
+        profile, constraints = H264_PROFILES.get(stream.get('profile'), (None, None))
+        level = stream.get('level')
+        if (profile is None) or (level is None):
+            return None
+        return f'avc1.{profile:02x}{constraints:02x}{level:02x}'
+    if codec == 'aac':
+        return f'mp4a.40.{AAC_OBJECT_TYPES.get(stream.get("profile"), 2)}'
+    if codec == 'mp3':
+        return 'mp4a.40.34'
+    if codec == 'opus':
+        return 'opus'
+    if codec == 'vp9':
+        return 'vp09'
+    if codec == 'av1':
+        return 'av01'
+    return None
+
+
+def _ffprobe(encoder):
+    # ffprobe is expected next to the ffmpeg compatible encoder
+    path = Path(encoder)
+    return str(path.with_name(path.name.replace('ffmpeg', 'ffprobe'))) if 'ffmpeg' in path.name else 'ffprobe'
+
+
+@lru_cache(maxsize=None)
+def probe_codecs(encoder, filepath, kind):
+    """
+    returns the codecs parameter of the first `kind` ('video' or 'audio') stream of a media file
+    """
+    cmd = [_ffprobe(encoder), '-v', 'error', '-select_streams', kind[0], '-show_streams', '-of', 'json', str(filepath)]
+    try:
+        streams = json.loads(subprocess.run(cmd, check=True, capture_output=True).stdout).get('streams', [])
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        log.warning(f'{filepath.name}: can not probe codecs, {e}')
+        return None
+    return rfc6381_codecs(streams[0]) if streams else None
+
+
+def get_segmented_alternatives(encoder, packaging, filepath, name, kind, start=0.0, duration=None, segment_duration=2.0):
+    """
+    returns [(MediaAlternative, build(output_path), glob patterns of the segments)] for the DASH and/or HLS
+    packaging of a media file. `name` is the base name of the manifest and segments, they are packaged
+    without re-encoding.
+    """
+    codecs = probe_codecs(encoder, filepath, kind)
+    tracks = [MediaAlternativeTrack(codecs=codecs, track=f'#track={TRACK_ID}')] if codecs is not None else None
+
+    alternatives = []
+    if packaging in ('DASH', 'DASH_HLS'):
+        alternatives.append((
+            MediaAlternative(DASH_MIME_TYPE, f'{name}.mpd', tracks=tracks),
+            lambda output_path: package_dash(encoder, filepath, name, kind, start, duration, output_path, segment_duration),
+            [f'{name}-dash-*']
+        ))
+    if packaging in ('HLS', 'DASH_HLS'):
+        alternatives.append((
+            MediaAlternative(HLS_MIME_TYPE, f'{name}.m3u8', tracks=tracks),
+            lambda output_path: package_hls(encoder, filepath, name, kind, start, duration, output_path, segment_duration),
+            [f'{name}-hls-*']
+        ))
+    return alternatives
+
+
+def _input_args(encoder, filepath, kind, start, duration):
+    cmd = [encoder, '-y']
+    if start > 0.0:
+        cmd += ['-ss', f'{start:.6f}']
+    cmd += ['-i', str(filepath)]
+    if duration is not None:
+        cmd += ['-t', f'{duration:.6f}']
+    return cmd + ['-map', f'0:{kind[0]}:0', '-c', 'copy', *BITEXACT_ARGS]
+
+
+def package_dash(encoder, filepath, name, kind, start, duration, output_path, segment_duration=2.0):
+    cmd = _input_args(encoder, filepath, kind, start, duration) + [
+        '-f', 'dash',
+        '-seg_duration', str(segment_duration),
+        '-adaptation_sets', f'id={TRACK_ID},streams=0',
+        # segments of several media share the output directory
+        '-init_seg_name', f'{name}-dash-init-$RepresentationID$.$ext$',
+        '-media_seg_name', f'{name}-dash-$RepresentationID$-$Number%05d$.$ext$',
+        str(output_path)
+    ]
+    run_tool(cmd)
+
+
+def package_hls(encoder, filepath, name, kind, start, duration, output_path, segment_duration=2.0):
+    cmd = _input_args(encoder, filepath, kind, start, duration) + [
+        '-f', 'hls',
+        '-hls_time', str(segment_duration),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_type', 'fmp4',
+        '-hls_fmp4_init_filename', f'{name}-hls-init.mp4',
+        '-hls_segment_filename', str(Path(output_path).parent / f'{name}-hls-%05d.m4s'),
+        str(output_path)
+    ]
+    run_tool(cmd)
@@ -0,0 +1,121 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+import numpy as np
+
+from .mpeg_media import MediaLibrary
+from ..blender.utils import get_movie_images_from_material
+
+# movie textures are scaled down by powers of 2, up to this divisor
+MAX_DOWNSCALE = 8
+
+
+class ResolutionHints:
+    """
+    Largest size, in pixels, at which the meshes using each movie texture are seen from the scene cameras.
+    Meshes are approximated by their bounding box, as seen from the cameras at the current frame.
+    """
+
+    # movie file -> projected size in pixels
+    sizes = {}
+
+    @classmethod
+    def reset(cls):
+        cls.sizes = {}
+
+    @classmethod
+    def capture(cls, scene):
+        cameras = [o for o in scene.objects if o.type == 'CAMERA']
+        if not cameras:
+            return
+
+        textured = []
+        for obj in scene.objects:
+            if obj.type != 'MESH':
+                continue
+            movies = {MediaLibrary.abspath(img.filepath) for img in _get_movie_images(obj)}
+            if movies:
+                textured.append((obj, movies))
+        if not textured:
+            return
+
+        # world space bounding box corners, (meshes, 8, 4)
+        corners = np.array([[(*c, 1.0) for c in obj.bound_box] for obj, _ in textured], dtype=np.float64)
+        corners = corners @ np.array([np.array(obj.matrix_world, dtype=np.float64).T for obj, _ in textured])
+
+        render = scene.render
+        resolution = (render.resolution_x * render.resolution_percentage / 100.0,
+                      render.resolution_y * render.resolution_percentage / 100.0)
+        projected = np.zeros(len(textured))
+        for camera in cameras:
+            projected = np.maximum(projected, project_bounds(corners, camera, resolution))
+
+        for (_, movies), size in zip(textured, projected):
+            for filepath in movies:
+                cls.sizes[filepath] = max(size, cls.sizes.get(filepath, 0.0))
+
+    @classmethod
+    def get_size(cls, img):
+        """
+        returns the resolution at which a movie texture is exported:
+        its own size, divided by the largest power of 2 that keeps it above its projected size
+        """
+        width, height = img.size
+        projected = cls.sizes.get(MediaLibrary.abspath(img.filepath))
+        if projected is None:
+            return (width, height)
+        divisor = 1
+        while (divisor < MAX_DOWNSCALE) and (max(width, height) / (divisor * 2) >= projected):
+            divisor *= 2
+        # video encoders require even dimensions
+        return (max(2, (width // divisor) & ~1), max(2, (height // divisor) & ~1)) if divisor > 1 else (width, height)
+
+
+def project_bounds(corners, camera, resolution):
+    """
+    returns the largest screen space extent, in pixels, of each bounding box (meshes, 8, 4) seen from a camera.
+    boxes behind the camera are 0, boxes crossing the near plane fill the screen.
+    """
+    view = np.linalg.inv(np.array(camera.matrix_world, dtype=np.float64)).T
+    p = corners @ view
+    # blender cameras look down -Z
+    depth = -p[..., 2]
+    cam = camera.data
+    # the sensor size and ortho scale apply to the largest dimension, unless the sensor fit says otherwise
+    if cam.sensor_fit == 'HORIZONTAL':
+        fit, sensor = resolution[0], cam.sensor_width
+    elif cam.sensor_fit == 'VERTICAL':
+        fit, sensor = resolution[1], cam.sensor_height
+    else:
+        fit, sensor = max(resolution), cam.sensor_width
+    size = max(resolution)
+    if cam.type == 'ORTHO':
+        xy = p[..., :2] * (fit / cam.ortho_scale)
+    else:
+        focal = cam.lens / sensor * fit
+        xy = p[..., :2] * (focal / np.maximum(depth, cam.clip_start))[..., None]
+
+    half = np.array(resolution) / 2.0
+    xy = np.clip(xy, -half, half)
+    extent = (xy.max(axis=1) - xy.min(axis=1)).max(axis=1)
+
+    in_front = depth > cam.clip_start
+    extent[~in_front.any(axis=1)] = 0.0
+    extent[in_front.any(axis=1) & ~in_front.all(axis=1)] = size
+    return extent
+
+
+def _get_movie_images(obj):
+    for slot in obj.material_slots:
+        material = slot.material
+        if (material is None) or (material.node_tree is None):
+            continue
+        yield from get_movie_images_from_material(material)
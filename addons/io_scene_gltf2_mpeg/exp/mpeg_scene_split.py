@@ -0,0 +1,100 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import logging
+from pathlib import Path
+
+from io_scene_gltf2.io.com import gltf2_io
+
+from ..com import gltf_split
+
+log = logging.getLogger(__name__)
+
+
+class SceneSplit:
+    """
+    Splits the exported glTF per top-level collection, before the core exporter writes the .gltf.
+    Objects are grouped by the scene collection's child collection they belong to,
+    objects linked directly to the scene collection stay in the base document.
+    """
+
+    # object name -> top-level collection name
+    collections = {}
+
+    @classmethod
+    def reset(cls):
+        cls.collections = {}
+
+    @classmethod
+    def capture(cls, scene):
+        for collection in scene.collection.children:
+            for obj in collection.all_objects:
+                cls.collections.setdefault(obj.name, collection.name)
+
+    @classmethod
+    def split(cls, gltf2_object, export_settings):
+        """
+        writes the sub-documents and replaces the gathered glTF with the base document, which the core
+        exporter then writes as usual. Must run last in the glTF extensions hook: the core .bin is already
+        written, the root extensions are plain dicts.
+        """
+        if export_settings['gltf_format'] != 'GLTF_SEPARATE':
+            log.warning('splitting per collection requires the glTF Separate (.gltf + .bin + textures) format')
+            return []
+
+        filepath = Path(export_settings['gltf_filepath'])
+        gltf = gltf_to_json(gltf2_object)
+
+        groups = {}
+        nodes = gltf.get("nodes") or []
+        for i in gltf["scenes"][gltf.get("scene") or 0].get("nodes") or []:
+            name = cls.collections.get(nodes[i].get("name"))
+            if name is not None:
+                groups.setdefault(name, []).append(i)
+        if not groups:
+            return []
+
+        documents = gltf_split.split(gltf, gltf_split.load_buffers(gltf, filepath.parent), groups)
+        documents = gltf_split.finalize(documents, filepath)
+        base = documents[0]
+        # the core exporter writes the base .gltf, from the gathered glTF
+        gltf_split.write(documents[1:], filepath.parent)
+        if base.data is not None:
+            (filepath.parent / base.bin_uri).write_bytes(base.data)
+        for name, value in vars(gltf2_io.Gltf.from_dict(base.gltf)).items():
+            setattr(gltf2_object, name, value)
+
+        # the base document may not need the original binary data anymore
+        written = {doc.bin_uri for doc in documents}
+        for buffer in gltf.get("buffers") or []:
+            uri = buffer.get("uri")
+            if (uri is not None) and not uri.startswith('data:') and (uri not in written):
+                (filepath.parent / uri).unlink(missing_ok=True)
+        for doc in documents:
+            media = len(doc.gltf.get("extensions", {}).get(gltf_split.MPEG_MEDIA, {}).get("media", []))
+            print(f'{doc.uri}: {len(doc.gltf.get("nodes", []))} nodes, {media} media, '
+                  f'{len(doc.data) if doc.data is not None else 0} bytes of binary data')
+        return documents
+
+
+def gltf_to_json(gltf2_object):
+    """
+    returns the json of a gathered glTF, as the core exporter writes it
+    """
+    return _without_none(gltf2_object.to_dict())
+
+
+def _without_none(value):
+    # io_scene_gltf2 serializes unset properties as None, they are removed when the .gltf is written
+    if isinstance(value, dict):
+        return {k: _without_none(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_without_none(v) for v in value]
+    return value
@@ -0,0 +1,117 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from dataclasses import dataclass
+
+MPEG_SETTINGS = "mpeg_settings"
+
+
+@dataclass(frozen=True)
+class MPEGExportSettings:
+    """
+    MPEG exporter properties and scene constants, captured once before export.
+    Export hooks read these instead of looking up bpy.context, so the export doesn't depend
+    on the active scene changing while it runs.
+    """
+    enabled: bool
+    media_exports: bool
+    background_media_export: bool
+    media_export_workers: int
+    media_store: str
+    media_store_mode: str
+    enable_video_textures: bool
+    video_atlas: bool
+    video_atlas_size: int
+    video_atlas_max_tile_size: int
+    video_encoder: str
+    trim_media: bool
+    media_packaging: str
+    segment_duration: float
+    analyze_keyframes: bool
+    max_loop_decode: float
+    closed_gop_loops: bool
+    video_resolution_hints: bool
+    enable_spatial_audio: bool
+    audio_object_codec: str
+    audio_sample_format: str
+    bake_audio_animation: bool
+    audio_animation_tolerance: float
+    cluster_audio_sources: bool
+    audio_cluster_size: float
+    max_audio_sources: int
+    split_collections: bool
+    write_manifest: bool
+    validation: str
+    optimize_markers: bool
+    marker_max_size: int
+    spatial_index: bool
+    print_statistics: bool
+    # scene constants
+    fps: float
+    frame_start: int
+    frame_end: int
+    audio_distance_model: str
+
+    @staticmethod
+    def from_scene(scene, abspath=lambda p: p) -> 'MPEGExportSettings':
+        props = scene.MPEG_ExporterProperties
+        return MPEGExportSettings(
+            enabled=props.enabled,
+            media_exports=props.media_export,
+            background_media_export=props.background_media_export,
+            media_export_workers=props.media_export_workers,
+            media_store=abspath(props.media_store),
+            media_store_mode=props.media_store_mode,
+            enable_video_textures=props.enable_video_textures,
+            video_atlas=props.video_atlas,
+            video_atlas_size=props.video_atlas_size,
+            video_atlas_max_tile_size=props.video_atlas_max_tile_size,
+            video_encoder=abspath(props.video_encoder),
+            trim_media=props.trim_media,
+            media_packaging=props.media_packaging,
+            segment_duration=props.segment_duration,
+            analyze_keyframes=props.analyze_keyframes,
+            max_loop_decode=props.max_loop_decode,
+            closed_gop_loops=props.closed_gop_loops,
+            video_resolution_hints=props.video_resolution_hints,
+            enable_spatial_audio=props.enable_spatial_audio,
+            audio_object_codec=props.audio_object_codec,
+            audio_sample_format=props.audio_sample_format,
+            bake_audio_animation=props.bake_audio_animation,
+            audio_animation_tolerance=props.audio_animation_tolerance,
+            cluster_audio_sources=props.cluster_audio_sources,
+            audio_cluster_size=props.audio_cluster_size,
+            max_audio_sources=props.max_audio_sources,
+            split_collections=props.split_collections,
+            write_manifest=props.write_manifest,
+            validation=props.validation,
+            optimize_markers=props.optimize_markers,
+            marker_max_size=props.marker_max_size,
+            spatial_index=props.spatial_index,
+            print_statistics=props.print_statistics,
+            fps=scene.render.fps / scene.render.fps_base,
+            frame_start=scene.frame_start,
+            frame_end=scene.frame_end,
+            audio_distance_model=scene.audio_distance_model
+        )
+
+    @property
+    def duration(self):
+        return (self.frame_end - self.frame_start + 1) / self.fps
+
+
+def get_mpeg_settings(export_settings) -> MPEGExportSettings:
+    """
+    returns the MPEG settings when MPEG_* extensions are enabled for this export, None otherwise
+    """
+    settings = export_settings.get(MPEG_SETTINGS)
+    if (settings is None) or not settings.enabled:
+        return None
+    return settings
@@ -0,0 +1,113 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from pathlib import Path
+from typing import List
+
+from .mpeg_media_export import MediaJob, MediaExport
+
+
+class SharedMedia:
+    """
+    Media shared by several glTF exports written to the same directory (eg. one per scene).
+    While active, media URIs are relative to `media_dir` and the media jobs of each export are
+    collected instead of run, then copied and built once for all exports.
+    """
+
+    # media directory, relative to the exported .gltf files, None when inactive
+    media_dir = None
+    # output path -> MediaJob
+    jobs = {}
+    # output path -> number of exports referencing the media
+    references = {}
+    # output name -> (source path, how it is built) of the media written under that name
+    names = {}
+    workers = 1
+    # called once the shared media files are exported
+    on_done = []
+
+    @classmethod
+    def begin(cls, media_dir='media'):
+        cls.media_dir = media_dir
+        cls.jobs = {}
+        cls.references = {}
+        cls.names = {}
+        cls.workers = 1
+        cls.on_done = []
+
+    @classmethod
+    def end(cls):
+        cls.media_dir = None
+        cls.jobs = {}
+        cls.references = {}
+        cls.names = {}
+        cls.on_done = []
+
+    @classmethod
+    def is_active(cls):
+        return cls.media_dir is not None
+
+    @classmethod
+    def uri(cls, name):
+        return f'{cls.media_dir}/{name}' if cls.is_active() else name
+
+    @classmethod
+    def claim(cls, name, key):
+        """
+        returns the output name of a media, `key` identifies its source and how it is built.
+        Exports of media with the same name but another key get a numbered name, eg. `clip.1.mp4`
+        """
+        if not cls.is_active():
+            return name
+        stem, suffix = Path(name).stem, Path(name).suffix
+        candidate = name
+        i = 0
+        while cls.names.setdefault(candidate, key) != key:
+            i += 1
+            candidate = f'{stem}.{i}{suffix}'
+        return candidate
+
+    @classmethod
+    def get_output_dir(cls, export_settings):
+        return Path(export_settings['gltf_filedirectory']) / cls.media_dir
+
+    @classmethod
+    def add(cls, jobs: List[MediaJob], workers=1):
+        cls.workers = max(cls.workers, workers)
+        for job in jobs:
+            shared = cls.jobs.setdefault(job.output_path, job)
+            # media store files are named after their content, whatever their source
+            if (shared.src != job.src) and not job.stored:
+                raise ValueError(f'{job.name}: exported from both {shared.src} and {job.src}')
+            cls.references[job.output_path] = cls.references.get(job.output_path, 0) + 1
+
+    @classmethod
+    def export(cls) -> MediaExport:
+        """
+        copies and builds each shared media file once, blocking until done
+        """
+        export = MediaExport([*cls.jobs.values()], cls.workers)
+        export.on_done = cls.on_done
+        return export.start().wait()
+
+    @classmethod
+    def report(cls):
+        """
+        returns the work saved compared to exporting the media of each export separately
+        """
+        files = size = 0
+        seconds = 0.0
+        for path, job in cls.jobs.items():
+            n = cls.references[path] - 1
+            files += n
+            size += n * (job.size or (path.stat().st_size if path.exists() else 0))
+            seconds += n * job.seconds
+        return (f'{len(cls.jobs)} shared media files, {files} copies saved '
+                f'({size / (1 << 20):.1f} MiB, {seconds:.2f} s)')
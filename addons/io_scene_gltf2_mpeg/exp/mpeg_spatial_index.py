@@ -0,0 +1,361 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from io_scene_gltf2.io.com import gltf2_io
+from io_scene_gltf2.io.com.gltf2_io_constants import ComponentType, DataType
+
+from .mpeg_stats import ExportStatistics
+
+# root extras holding the index
+MPEG_SPATIAL_INDEX = "MPEG_spatial_index"
+MPEG_AUDIO_SPATIAL = "MPEG_audio_spatial"
+MPEG_ANCHOR = "MPEG_anchor"
+
+# MPEG_anchor trackable type of the floor, the only trackable whose pose is known at export
+TRACKABLE_FLOOR = 0
+# audio sources with a larger distance_max are audible anywhere in practice, Blender defaults it to FLT_MAX
+MAX_INDEXED_RADIUS = 1.0e4
+# bounds of the grid size
+MAX_GRID_DIM = 64
+MIN_GRID_CELLS = 64
+CELLS_PER_ENTRY = 8
+MIN_CELL_SIZE = 0.01
+
+
+@dataclass
+class SpatialGrid:
+    """
+    Uniform grid over bounding spheres. Cell (x, y, z) is at `origin + (x, y, z) * cell_size`, its index is
+    `(z * dims[1] + y) * dims[0] + x`, and the spheres overlapping it are
+    `entries[offsets[index]:offsets[index + 1]]`.
+    """
+    origin: np.ndarray
+    cell_size: float
+    dims: np.ndarray
+    offsets: np.ndarray
+    entries: np.ndarray
+
+
+def build_grid(centers, radii) -> SpatialGrid:
+    """
+    bins the spheres in the cells they overlap, sized for about CELLS_PER_ENTRY cells per sphere
+    """
+    lo = (centers - radii[:, None]).min(axis=0)
+    hi = (centers + radii[:, None]).max(axis=0)
+    extent = hi - lo
+    # cells smaller than the typical sphere only duplicate entries
+    cell_size = max(float(np.median(2.0 * radii)), float(extent.max()) / MAX_GRID_DIM, MIN_CELL_SIZE)
+    budget = max(MIN_GRID_CELLS, CELLS_PER_ENTRY * len(radii))
+    while True:
+        dims = np.maximum(np.ceil(extent / cell_size).astype(np.int64), 1)
+        if dims.prod() <= budget:
+            break
+        cell_size *= max(float(dims.prod() / budget) ** (1.0 / 3.0), 1.01)
+
+    first = np.clip(((centers - radii[:, None] - lo) // cell_size).astype(np.int64), 0, dims - 1)
+    last = np.clip(((centers + radii[:, None] - lo) // cell_size).astype(np.int64), 0, dims - 1)
+    span = last - first + 1
+    counts = span.prod(axis=1)
+    # one row per (sphere, cell of its bounding box)
+    entries = np.repeat(np.arange(len(radii)), counts)
+    k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cells = first[entries] + np.stack([
+        k % span[entries, 0],
+        (k // span[entries, 0]) % span[entries, 1],
+        k // (span[entries, 0] * span[entries, 1])
+    ], axis=1)
+
+    # drop the cells of the bounding box the sphere doesn't reach
+    cell_lo = lo + cells * cell_size
+    nearest = np.clip(centers[entries], cell_lo, cell_lo + cell_size)
+    keep = ((nearest - centers[entries]) ** 2).sum(axis=1) <= radii[entries] ** 2
+    entries, cells = entries[keep], cells[keep]
+
+    ids = (cells[:, 2] * dims[1] + cells[:, 1]) * dims[0] + cells[:, 0]
+    order = np.lexsort((entries, ids))
+    offsets = np.searchsorted(ids[order], np.arange(dims.prod() + 1))
+    return SpatialGrid(lo, cell_size, dims, offsets, entries[order])
+
+
+def add_spatial_index(gltf2_object, export_settings):
+    """
+    indexes the audio sources and anchored nodes of the exported scenes, so that players cull them
+    by distance without testing each one every frame. The index is written to <name>.spatial_index.bin
+    and described in the root extras. Must run after the core buffer references are fixed up.
+    """
+    entries = _gather_entries(gltf2_object)
+    if entries is None:
+        return
+    nodes, centers, radii, dynamic = entries
+
+    # moving and (practically) unbounded entries are tested by the player on each frame
+    indexed = ~dynamic & np.isfinite(radii) & (radii <= MAX_INDEXED_RADIUS)
+    indexed_ids = np.flatnonzero(indexed)
+    unindexed_ids = np.flatnonzero(~indexed)
+
+    arrays = [
+        ("nodes", nodes, ComponentType.UnsignedInt, DataType.Scalar),
+        ("centers", centers, ComponentType.Float, DataType.Vec3),
+        ("radii", radii, ComponentType.Float, DataType.Scalar),
+    ]
+    index = {}
+    if len(indexed_ids):
+        grid = build_grid(centers[indexed_ids], radii[indexed_ids])
+        arrays += [
+            ("cellOffsets", grid.offsets, ComponentType.UnsignedInt, DataType.Scalar),
+            ("cellEntries", indexed_ids[grid.entries], ComponentType.UnsignedInt, DataType.Scalar),
+        ]
+        index["grid"] = {
+            "origin": [float(v) for v in grid.origin],
+            "cellSize": float(grid.cell_size),
+            "dimensions": [int(v) for v in grid.dims],
+        }
+        ExportStatistics.set("spatial index cells", int(grid.dims.prod()))
+        ExportStatistics.set("spatial index cell entries", len(grid.entries))
+    if len(unindexed_ids):
+        arrays.append(("unindexed", unindexed_ids, ComponentType.UnsignedInt, DataType.Scalar))
+
+    accessors = _write_buffer(gltf2_object, export_settings, arrays)
+    for key in ("nodes", "centers", "radii", "unindexed"):
+        if key in accessors:
+            index[key] = accessors[key]
+    if "grid" in index:
+        index["grid"]["cellOffsets"] = accessors["cellOffsets"]
+        index["grid"]["cellEntries"] = accessors["cellEntries"]
+
+    if gltf2_object.extras is None:
+        gltf2_object.extras = {}
+    gltf2_object.extras[MPEG_SPATIAL_INDEX] = index
+    ExportStatistics.set("spatial index entries", len(indexed_ids))
+    ExportStatistics.set("spatial index unindexed entries", len(unindexed_ids))
+
+
+def _gather_entries(gltf2_object):
+    """
+    returns node indices, bounding sphere centers and radii, and whether they move at runtime,
+    None when the scenes hold no audio source nor anchored node
+    """
+    parents, depths = _hierarchy(gltf2_object)
+    reachable = depths >= 0
+    audio = [i for i, n in enumerate(gltf2_object.nodes)
+             if reachable[i] and n.extensions and (MPEG_AUDIO_SPATIAL in n.extensions)]
+    anchored = [i for i, n in enumerate(gltf2_object.nodes)
+                if reachable[i] and n.extensions and (MPEG_ANCHOR in n.extensions)]
+    if not (audio or anchored):
+        return None
+
+    world = _world_matrices(gltf2_object, parents, depths)
+    dynamic = _dynamic_nodes(gltf2_object, parents, depths)
+
+    nodes, centers, radii = [], [], []
+    for i in audio:
+        for source in gltf2_object.nodes[i].extensions[MPEG_AUDIO_SPATIAL].get("sources", []):
+            nodes.append(i)
+            centers.append(world[i, :3, 3])
+            if source.get("attenuation") == "noAttenuation":
+                radii.append(np.inf)
+            else:
+                radii.append(source.get("attenuationParameters", [np.inf])[0])
+
+    if anchored:
+        lo, hi = _subtree_bounds(gltf2_object, world, parents, depths)
+        for i in anchored:
+            nodes.append(i)
+            if np.all(lo[i] <= hi[i]):
+                centers.append((lo[i] + hi[i]) / 2.0)
+                radii.append(np.linalg.norm(hi[i] - lo[i]) / 2.0)
+            else:
+                # no mesh, a point at the node's origin
+                centers.append(world[i, :3, 3])
+                radii.append(0.0)
+
+    nodes = np.array(nodes, dtype=np.int64)
+    return nodes, np.array(centers, dtype=np.float64), np.array(radii, dtype=np.float64), dynamic[nodes]
+
+
+def _hierarchy(gltf2_object):
+    """
+    returns the parent and depth of the nodes instantiated by a scene, the depth of other nodes is -1
+    """
+    n = len(gltf2_object.nodes)
+    parents = np.full(n, -1, dtype=np.int64)
+    depths = np.full(n, -1, dtype=np.int64)
+    stack = [(i, 0) for scene in gltf2_object.scenes for i in (scene.nodes or [])]
+    while stack:
+        i, depth = stack.pop()
+        if depths[i] >= 0:
+            continue
+        depths[i] = depth
+        for child in gltf2_object.nodes[i].children or []:
+            parents[child] = i
+            stack.append((child, depth + 1))
+    return parents, depths
+
+
+def _iter_levels(depths):
+    for depth in range(1, int(depths.max(initial=0)) + 1):
+        yield np.flatnonzero(depths == depth)
+
+
+def _local_matrices(nodes):
+    n = len(nodes)
+    t = np.zeros((n, 3))
+    r = np.tile([0.0, 0.0, 0.0, 1.0], (n, 1))
+    s = np.ones((n, 3))
+    m = np.tile(np.eye(4), (n, 1, 1))
+    has_matrix = np.zeros(n, dtype=bool)
+    for i, node in enumerate(nodes):
+        if node.matrix is not None:
+            # column-major
+            m[i] = np.reshape(node.matrix, (4, 4)).T
+            has_matrix[i] = True
+            continue
+        if node.translation is not None:
+            t[i] = node.translation
+        if node.rotation is not None:
+            r[i] = node.rotation
+        if node.scale is not None:
+            s[i] = node.scale
+
+    x, y, z, w = r.T
+    rotation = np.stack([
+        1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - z * w), 2.0 * (x * z + y * w),
+        2.0 * (x * y + z * w), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - x * w),
+        2.0 * (x * z - y * w), 2.0 * (y * z + x * w), 1.0 - 2.0 * (x * x + y * y)
+    ], axis=-1).reshape(n, 3, 3)
+    trs = np.tile(np.eye(4), (n, 1, 1))
+    trs[:, :3, :3] = rotation * s[:, None, :]
+    trs[:, :3, 3] = t
+    return np.where(has_matrix[:, None, None], m, trs)
+
+
+def _world_matrices(gltf2_object, parents, depths):
+    world = _local_matrices(gltf2_object.nodes)
+    # parents are resolved a level before their children
+    for level in _iter_levels(depths):
+        world[level] = world[parents[level]] @ world[level]
+    return world
+
+
+def _dynamic_nodes(gltf2_object, parents, depths):
+    """
+    flags the nodes whose transform is animated or depends on a trackable other than the floor,
+    and their descendants
+    """
+    dynamic = np.zeros(len(gltf2_object.nodes), dtype=bool)
+    for animation in gltf2_object.animations or []:
+        for channel in animation.channels:
+            if channel.target.path in ("translation", "rotation", "scale", "matrix"):
+                dynamic[channel.target.node] = True
+
+    anchor_ext = (gltf2_object.extensions or {}).get(MPEG_ANCHOR)
+    if anchor_ext is not None:
+        anchors, trackables = anchor_ext.get("anchors", []), anchor_ext.get("trackables", [])
+        for i, node in enumerate(gltf2_object.nodes):
+            if node.extensions and (MPEG_ANCHOR in node.extensions):
+                trackable = trackables[anchors[node.extensions[MPEG_ANCHOR]["anchor"]]["trackable"]]
+                if trackable.get("type") != TRACKABLE_FLOOR:
+                    dynamic[i] = True
+
+    for level in _iter_levels(depths):
+        dynamic[level] |= dynamic[parents[level]]
+    return dynamic
+
+
+def _subtree_bounds(gltf2_object, world, parents, depths):
+    """
+    returns the world space bounding boxes of the meshes of each node and its descendants,
+    empty boxes have lo > hi
+    """
+    n = len(gltf2_object.nodes)
+    lo = np.full((n, 3), np.inf)
+    hi = np.full((n, 3), -np.inf)
+
+    mesh_nodes, mesh_lo, mesh_hi = [], [], []
+    for i, node in enumerate(gltf2_object.nodes):
+        if (node.mesh is None) or (depths[i] < 0):
+            continue
+        for primitive in gltf2_object.meshes[node.mesh].primitives:
+            position = primitive.attributes.get("POSITION")
+            accessor = gltf2_object.accessors[position] if position is not None else None
+            if (accessor is None) or (accessor.min is None) or (accessor.max is None):
+                continue
+            mesh_nodes.append(i)
+            mesh_lo.append(accessor.min)
+            mesh_hi.append(accessor.max)
+
+    if mesh_nodes:
+        mesh_nodes = np.array(mesh_nodes, dtype=np.int64)
+        bounds = np.stack([np.array(mesh_lo, dtype=np.float64), np.array(mesh_hi, dtype=np.float64)], axis=1)
+        # the 8 corners of each local box, transformed to world space
+        select = np.array([[(c >> axis) & 1 for axis in range(3)] for c in range(8)])
+        corners = bounds[:, select, np.arange(3)]
+        corners = corners @ world[mesh_nodes, :3, :3].transpose(0, 2, 1) + world[mesh_nodes, None, :3, 3]
+        np.minimum.at(lo, mesh_nodes, corners.min(axis=1))
+        np.maximum.at(hi, mesh_nodes, corners.max(axis=1))
+
+    # children are merged into their parents from the deepest level up
+    for level in reversed(list(_iter_levels(depths))):
+        np.minimum.at(lo, parents[level], lo[level])
+        np.maximum.at(hi, parents[level], hi[level])
+    return lo, hi
+
+
+def _write_buffer(gltf2_object, export_settings, arrays):
+    """
+    writes the arrays to <name>.spatial_index.bin, referenced by a buffer of its own,
+    returns the accessor index of each array
+    """
+    uri = Path(export_settings['gltf_filepath']).stem + '.spatial_index.bin'
+    buffer = gltf2_io.Buffer(byte_length=0, extensions=None, extras=None, name=MPEG_SPATIAL_INDEX, uri=uri)
+    gltf2_object.buffers.append(buffer)
+    buffer_index = len(gltf2_object.buffers) - 1
+
+    data = bytearray()
+    accessors = {}
+    for key, array, component_type, data_type in arrays:
+        dtype = '<f4' if component_type == ComponentType.Float else '<u4'
+        array_data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+        gltf2_object.buffer_views.append(gltf2_io.BufferView(
+            buffer=buffer_index,
+            byte_length=len(array_data),
+            byte_offset=len(data),
+            byte_stride=None,
+            extensions=None,
+            extras=None,
+            name=f'{MPEG_SPATIAL_INDEX}.{key}',
+            target=None
+        ))
+        gltf2_object.accessors.append(gltf2_io.Accessor(
+            buffer_view=len(gltf2_object.buffer_views) - 1,
+            byte_offset=0,
+            component_type=component_type,
+            count=len(array),
+            extensions=None,
+            extras=None,
+            max=None,
+            min=None,
+            name=f'{MPEG_SPATIAL_INDEX}.{key}',
+            normalized=None,
+            sparse=None,
+            type=data_type
+        ))
+        accessors[key] = len(gltf2_object.accessors) - 1
+        # all components are 4 bytes, the buffer views stay aligned
+        data += array_data
+    buffer.byte_length = len(data)
+
+    (Path(export_settings['gltf_filedirectory']) / uri).write_bytes(data)
+    return accessors
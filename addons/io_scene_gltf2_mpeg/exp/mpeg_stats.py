@@ -0,0 +1,42 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+
+class ExportStatistics:
+    """
+    Values collected by the export stages, printed once the MPEG extensions are gathered.
+    """
+
+    values = {}
+
+    @classmethod
+    def reset(cls):
+        cls.values = {}
+
+    @classmethod
+    def set(cls, name, value):
+        cls.values[name] = value
+
+    @classmethod
+    def add(cls, name, value=1):
+        cls.values[name] = cls.values.get(name, 0) + value
+
+    @classmethod
+    def max(cls, name, value):
+        cls.values[name] = max(cls.values.get(name, value), value)
+
+    @classmethod
+    def report(cls):
+        lines = ["MPEG export statistics:"]
+        for name, value in cls.values.items():
+            if isinstance(value, float):
+                value = f'{value:.3f}'
+            lines.append(f'  {name}: {value}')
+        return '\n'.join(lines)
@@ -0,0 +1,56 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import logging
+
+from ..com.mpeg_validation import COLLECTIONS, iter_payloads, get_counts, validate_payloads
+from .mpeg_stats import ExportStatistics
+
+log = logging.getLogger(__name__)
+
+# errors listed in the exception raised in strict mode
+MAX_REPORTED_ERRORS = 20
+
+
+class MPEGValidationError(Exception):
+    pass
+
+
+def validate_export(gltf2_object, mode):
+    """
+    validates all MPEG_* payloads of the gathered glTF, once references are replaced with indices.
+    'WARN' logs the errors, 'STRICT' raises MPEGValidationError.
+    """
+    if mode == 'OFF':
+        return []
+    root_extensions = gltf2_object.extensions
+    collections = {scope: [o.extensions for o in _get_collection(gltf2_object, scope)] for scope in COLLECTIONS}
+    lengths = {
+        "accessors": len(gltf2_object.accessors),
+        "bufferViews": len(gltf2_object.buffer_views),
+        "buffers": len(gltf2_object.buffers),
+        "nodes": len(gltf2_object.nodes),
+        "textures": len(gltf2_object.textures),
+    }
+    errors = validate_payloads(iter_payloads(root_extensions, collections), get_counts(root_extensions, lengths))
+    ExportStatistics.set("MPEG validation errors", len(errors))
+    if not errors:
+        return errors
+    if mode == 'STRICT':
+        listed = '\n'.join(errors[:MAX_REPORTED_ERRORS])
+        more = f'\n... {len(errors) - MAX_REPORTED_ERRORS} more' if len(errors) > MAX_REPORTED_ERRORS else ''
+        raise MPEGValidationError(f'{len(errors)} invalid MPEG_* values:\n{listed}{more}')
+    for error in errors:
+        log.warning(error)
+    return errors
+
+
+def _get_collection(gltf2_object, scope):
+    return getattr(gltf2_object, scope) or []
@@ -0,0 +1,210 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from io_scene_gltf2.io.com import gltf2_io, gltf2_io_extensions
+from io_scene_gltf2.io.com.gltf2_io_constants import ComponentType, DataType
+
+from ..com.MPEG_media import Media, MediaAlternative
+from .mpeg_media import MediaLibrary, MediaFrame
+from .mpeg_media_export import BITEXACT_ARGS, run_tool
+from .mpeg_settings import MPEG_SETTINGS
+
+log = logging.getLogger(__name__)
+
+KHR_TEXTURE_TRANSFORM = "KHR_texture_transform"
+
+# pixels left around each tile, prevents texture filtering from bleeding across neighbouring videos
+ATLAS_PADDING = 2
+
+
+@dataclass
+class AtlasTile:
+    filepath: Path
+    width: int
+    height: int
+    x: int = 0
+    y: int = 0
+
+
+class VideoAtlas:
+    """
+    Packs small movie textures into a single video, so that the player runs a single decoder for all of them.
+    Tiles are placed as textures are gathered (online shelf packing), the atlas size, accessor and
+    texture transforms are only known once all textures have been gathered, see `finalize`.
+    """
+
+    tiles = {}
+    shelves = []
+    texture_transforms = []
+    extension = None
+    frame = None
+
+    @classmethod
+    def reset(cls):
+        cls.tiles = {}
+        cls.shelves = []
+        cls.texture_transforms = []
+        cls.extension = None
+        cls.frame = None
+
+    @classmethod
+    def get_video_texture_extension(cls, img, export_settings):
+        """
+        returns the MPEG_texture_video extension shared by all atlased textures,
+        or None if the image doesn't fit in the atlas
+        """
+        settings = export_settings[MPEG_SETTINGS]
+        filepath = MediaLibrary.abspath(img.filepath)
+        if filepath not in cls.tiles:
+            w, h = img.size
+            if max(w, h) > settings.video_atlas_max_tile_size:
+                return None
+            tile = AtlasTile(filepath, w, h)
+            if not cls._place(tile, settings.video_atlas_size):
+                return None
+            cls.tiles[filepath] = tile
+
+        if cls.extension is None:
+            cls._create_extension(export_settings)
+        return cls.extension
+
+    @classmethod
+    def add_texture_transform(cls, texture_info, img):
+        filepath = MediaLibrary.abspath(img.filepath)
+        tile = cls.tiles.get(filepath)
+        if tile is None:
+            return
+
+        if texture_info.extensions is None:
+            texture_info.extensions = {}
+        ext = texture_info.extensions.get(KHR_TEXTURE_TRANSFORM)
+        if ext is None:
+            ext = gltf2_io_extensions.Extension(name=KHR_TEXTURE_TRANSFORM, extension={}, required=False)
+            texture_info.extensions[KHR_TEXTURE_TRANSFORM] = ext
+
+        # keep the original transform, the atlas transform is applied on top of it in `finalize`
+        transform = ext.extension
+        original = (transform.get("offset", [0.0, 0.0]), transform.get("scale", [1.0, 1.0]), transform.get("rotation", 0.0))
+        cls.texture_transforms.append((tile, transform, original))
+
+    @classmethod
+    def _place(cls, tile, atlas_size):
+        w = tile.width + 2 * ATLAS_PADDING
+        h = tile.height + 2 * ATLAS_PADDING
+        for shelf in cls.shelves:
+            if (h <= shelf["height"]) and (shelf["x"] + w <= atlas_size):
+                tile.x, tile.y = shelf["x"] + ATLAS_PADDING, shelf["y"] + ATLAS_PADDING
+                shelf["x"] += w
+                return True
+        y = sum(shelf["height"] for shelf in cls.shelves)
+        if (y + h > atlas_size) or (w > atlas_size):
+            return False
+        cls.shelves.append({"y": y, "height": h, "x": w})
+        tile.x, tile.y = ATLAS_PADDING, y + ATLAS_PADDING
+        return True
+
+    @classmethod
+    def _create_extension(cls, export_settings):
+        # the accessor count is updated once the atlas size is known
+        accessor = gltf2_io.Accessor(
+            buffer_view=None,
+            byte_offset=0,
+            component_type=ComponentType.UnsignedByte,
+            count=0,
+            extensions=None,
+            extras=None,
+            max=None,
+            min=None,
+            name="MPEG_texture_video.accessor",
+            normalized=False,
+            sparse=None,
+            type=DataType.Vec3
+        )
+        media = Media(alternatives=[MediaAlternative('video/mp4', MediaLibrary.uri(cls.media_name(export_settings)))], autoplay=True, loop=True)
+        cls.frame = MediaFrame(media)
+        cls.frame.add_buffer_view(accessors=[accessor], suggestedUpdateRate=export_settings[MPEG_SETTINGS].fps)
+        cls.extension = {
+            "accessor": accessor,
+            "width": 0,
+            "height": 0,
+            "format": "RGB"
+        }
+
+    @staticmethod
+    def media_name(export_settings):
+        return Path(export_settings['gltf_filepath']).stem + '.video_atlas.mp4'
+
+    @classmethod
+    def finalize(cls, export_settings):
+        """
+        sets the atlas size on the gathered extension, accessor and buffer,
+        and applies the tile transforms to the texture infos.
+        must run before the glTF is serialized.
+        """
+        if cls.extension is None:
+            return
+
+        # video encoders require even dimensions
+        width = max(t.x + t.width + ATLAS_PADDING for t in cls.tiles.values())
+        height = max(t.y + t.height + ATLAS_PADDING for t in cls.tiles.values())
+        width += width % 2
+        height += height % 2
+
+        cls.extension["width"] = width
+        cls.extension["height"] = height
+        cls.frame.resize_buffer_view(0, width * height)
+        cls.frame.finalize()
+
+        for tile, transform, (offset, scale, rotation) in cls.texture_transforms:
+            k = (tile.width / width, tile.height / height)
+            a = (tile.x / width, tile.y / height)
+            if rotation and (k[0] != k[1]):
+                log.warning(f'{tile.filepath.name}: rotated texture transform combined with non-uniform atlas scale')
+            transform["offset"] = [a[0] + k[0] * offset[0], a[1] + k[1] * offset[1]]
+            transform["scale"] = [k[0] * scale[0], k[1] * scale[1]]
+
+        tiles = [*cls.tiles.values()]
+        settings = export_settings[MPEG_SETTINGS]
+        MediaLibrary.add_generated_media(
+            cls.media_name(export_settings),
+            lambda output_path: encode_video_atlas(
+                settings.video_encoder, tiles, width, height, settings.fps, settings.duration, output_path)
+        )
+
+
+def encode_video_atlas(encoder, tiles, width, height, fps, duration, output_path):
+    """
+    composes the atlas video using an ffmpeg compatible encoder, each tile loops over the atlas duration
+    """
+    cmd = [encoder, '-y']
+    for tile in tiles:
+        cmd += ['-stream_loop', '-1', '-i', str(tile.filepath)]
+
+    graph = [f'color=c=black:s={width}x{height}:r={fps}:d={duration}[t0]']
+    for i, tile in enumerate(tiles):
+        graph.append(f'[t{i}][{i}:v]overlay=x={tile.x}:y={tile.y}:eof_action=repeat[t{i + 1}]')
+
+    cmd += [
+        '-filter_complex', ';'.join(graph),
+        '-map', f'[t{len(tiles)}]',
+        '-t', str(duration),
+        '-an',
+        '-c:v', 'libx264',
+        '-pix_fmt', 'yuv420p',
+        *BITEXACT_ARGS,
+        str(output_path)
+    ]
+    run_tool(cmd)
@@ -13,21 +13,24 @@ import bpy
 from io_scene_gltf2.io.com import gltf2_io, gltf2_io_extensions
 from io_scene_gltf2.io.com.gltf2_io_constants import ComponentType, DataType
 
-from ..blender.utils import get_tex_from_socket
+from ..blender.utils import get_movie_tex_from_socket
 from ..exp.mpeg_media import MediaLibrary, MediaFrame
+from ..exp.mpeg_video_atlas import VideoAtlas
+from ..exp.mpeg_resolution import ResolutionHints
+from ..exp.mpeg_settings import MPEG_SETTINGS
 
 MPEG_TEXTURE_VIDEO = "MPEG_texture_video"
 
 
 def get_video_texture_extension(shader_socket: bpy.types.NodeSocket, export_settings):
-        if not export_settings["mpeg_enable_video_textures"]:
+        if not export_settings[MPEG_SETTINGS].enable_video_textures:
             return
         
-        tex = get_tex_from_socket(shader_socket, export_settings)
+        tex = get_movie_tex_from_socket(shader_socket, export_settings)
         if tex is None:
             return None
 
-        ext = _get_video_texture_extension(tex.shader_node.image, export_settings)
+        ext = _get_video_texture_extension(tex.shader_node.image, export_settings, tex.shader_node.image_user)
         if ext is None:
             return None
 
@@ -37,7 +40,19 @@ def get_video_texture_extension(shader_socket: bpy.types.NodeSocket, export_sett
         )
 
 
-def _get_video_texture_extension(img, export_settings):
+def add_video_atlas_texture_transform(texture_info, shader_socket: bpy.types.NodeSocket, export_settings):
+        settings = export_settings[MPEG_SETTINGS]
+        if not (settings.enable_video_textures and settings.video_atlas):
+            return
+
+        tex = get_movie_tex_from_socket(shader_socket, export_settings)
+        if tex is None:
+            return
+
+        VideoAtlas.add_texture_transform(texture_info, tex.shader_node.image)
+
+
+def _get_video_texture_extension(img, export_settings, image_user=None):
     # glTF assumes sRGB images
     # TODO: investigate non RGB data (num channels, yuv ...)
     if img is None:
@@ -53,21 +68,32 @@ def _get_video_texture_extension(img, export_settings):
         return None
     if img.depth != 24:
         return None
+
+    # the atlas loops over whole videos, regardless of the image user range
+    if export_settings[MPEG_SETTINGS].video_atlas:
+        ext = VideoAtlas.get_video_texture_extension(img, export_settings)
+        if ext is not None:
+            return ext
     
+    size = tuple(img.size)
+    if export_settings[MPEG_SETTINGS].video_resolution_hints:
+        size = ResolutionHints.get_size(img)
+
     return {
-        "accessor": _get_video_texture_accessor(img, export_settings),
-        "width": img.size[0],
-        "height": img.size[1],
+        "accessor": _get_video_texture_accessor(img, export_settings, image_user, size),
+        "width": size[0],
+        "height": size[1],
         "format": "RGB" 
     }
 
 
-def _get_video_texture_accessor(image, export_settings) -> gltf2_io.Accessor:
+def _get_video_texture_accessor(image, export_settings, image_user=None, size=None) -> gltf2_io.Accessor:
     # several assumptions here:
     # 1. pipeline decodes RGB24 image textures
     # 2. single image texture per buffer, so buffer.byte_length is known
 
-    count = image.size[0] * image.size[1]
+    width, height = size if size is not None else image.size
+    count = width * height
 
     accessor = gltf2_io.Accessor(
         buffer_view=None, 
@@ -84,8 +110,8 @@ def _get_video_texture_accessor(image, export_settings) -> gltf2_io.Accessor:
         type=DataType.Vec3
     )
 
-    media = MediaLibrary.get_video_media(image, export_settings)
+    media = MediaLibrary.get_video_media(image, export_settings, image_user, size)
     frame = MediaFrame(media)
-    frame.add_buffer_view(accessors=[accessor], suggestedUpdateRate=bpy.context.scene.render.fps)
+    frame.add_buffer_view(accessors=[accessor], suggestedUpdateRate=export_settings[MPEG_SETTINGS].fps)
     frame.finalize()
     return accessor
@@ -0,0 +1,94 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from ..blender.ui.markers import XRMarkerType
+
+MPEG_ANCHOR = "MPEG_anchor"
+
+# MPEG_anchor trackable type -> xr_anchor.trackable_type, see exp.mpeg_anchor._get_trackable_dict
+TRACKABLE_TYPES = {
+    0: 'TRACKABLE_FLOOR',
+    1: 'TRACKABLE_VIEWER',
+    2: 'TRACKABLE_CONTROLLER',
+    3: 'TRACKABLE_PLANE',
+    4: 'TRACKABLE_MARKER_2D',
+    5: 'TRACKABLE_MARKER_3D',
+    6: 'TRACKABLE_MARKER_GEO',
+    7: 'TRACKABLE_APPLICATION',
+}
+
+
+def import_anchors(gltf):
+    """
+    sets the xr_anchor properties of the anchored nodes, and the xr_marker properties of the nodes
+    2D marker trackables reference. Runs once all the nodes are created.
+    """
+    root = (gltf.data.extensions or {}).get(MPEG_ANCHOR)
+    if root is None:
+        return
+    trackables = root.get("trackables", [])
+    anchors = root.get("anchors", [])
+
+    # markers first, the anchors' marker node property only accepts existing markers
+    for trackable in trackables:
+        if trackable.get("type") == 4:
+            marker = _get_object(gltf, trackable.get("markerNode"))
+            if marker is not None:
+                marker.xr_marker.enabled = True
+                marker.xr_marker.type = XRMarkerType.MARKER_2D
+                marker.xr_marker.name = marker.name
+
+    for i, node in enumerate(gltf.data.nodes or []):
+        ext = (node.extensions or {}).get(MPEG_ANCHOR)
+        if ext is None:
+            continue
+        obj = _get_object(gltf, i)
+        anchor = anchors[ext["anchor"]] if 0 <= ext.get("anchor", -1) < len(anchors) else None
+        if (obj is None) or (anchor is None):
+            continue
+        trackable = trackables[anchor["trackable"]] if 0 <= anchor.get("trackable", -1) < len(trackables) else {}
+        _set_xr_anchor(obj, anchor, trackable, gltf)
+
+
+def _set_xr_anchor(obj, anchor, trackable, gltf):
+    xr_anchor = obj.xr_anchor
+    xr_anchor.enabled = True
+    xr_anchor.requiresAnchoring = anchor.get("requiresAnchoring", False)
+    if "minimumRequiredSpace" in anchor:
+        xr_anchor.minimumRequiredSpace = anchor["minimumRequiredSpace"]
+    xr_anchor.aligned = anchor.get("aligned", 0) != 0
+
+    trackable_type = TRACKABLE_TYPES.get(trackable.get("type"))
+    if trackable_type is None:
+        print(f'{MPEG_ANCHOR}: unsupported trackable {trackable} on {obj.name}')
+        return
+    xr_anchor.trackable_type = trackable_type
+    if trackable_type == 'TRACKABLE_CONTROLLER':
+        xr_anchor.trackable_controller = trackable.get("path", "")
+    elif trackable_type == 'TRACKABLE_PLANE':
+        xr_anchor.trackable_plane = 'HORIZONTAL_PLANE' if trackable.get("geometricConstraint", 0) == 0 else 'VERTICAL_PLANE'
+    elif trackable_type == 'TRACKABLE_MARKER_2D':
+        marker = _get_object(gltf, trackable.get("markerNode"))
+        if marker is not None:
+            try:
+                xr_anchor.trackable_marker_node_name = marker.xr_marker.name
+            except TypeError:
+                # the marker isn't in the active scene
+                print(f'{MPEG_ANCHOR}: marker {marker.name} of {obj.name} not found in the scene')
+    elif trackable_type == 'TRACKABLE_MARKER_GEO':
+        xr_anchor.trackable_marker_geo = trackable.get("coordinates", (0.0, 0.0, 0.0))[:3]
+    elif trackable_type == 'TRACKABLE_APPLICATION':
+        xr_anchor.trackable_id = str(trackable.get("id", ""))
+
+
+def _get_object(gltf, node_index):
+    if not isinstance(node_index, int) or (node_index not in gltf.vnodes):
+        return None
+    return gltf.vnodes[node_index].blender_object
@@ -0,0 +1,124 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+import numpy as np
+
+from io_scene_gltf2.io.imp.gltf2_io_binary import BinaryData
+
+from ..com.MPEG_audio_spatial import MPEG_audio_spatial
+from .mpeg_media import ImportedMedia
+
+MPEG_AUDIO_SPATIAL = "MPEG_audio_spatial"
+
+# (MPEG_audio_spatial source property, speaker property, conversion)
+ANIMATED_PROPERTIES = (
+    ("pregain", "volume", lambda db: np.minimum(10.0 ** (db / 20.0), 1.0)),
+    ("playbackSpeed", "pitch", None)
+)
+
+
+def import_audio_sources(vnode, gltf_node, blender_object, gltf):
+    """
+    turns a node's MPEG_audio_spatial sources into speakers:
+    the empty created by the core importer is replaced by the speaker object,
+    speakers of nodes with a mesh, camera or light are added as children
+    """
+    ext = MPEG_audio_spatial.from_dict(gltf_node.extensions[MPEG_AUDIO_SPATIAL])
+    for i, source in enumerate(ext.sources or []):
+        name = blender_object.name if i == 0 else f'{blender_object.name}.source.{i}'
+        speaker = _create_speaker(source, name, gltf)
+        if (i == 0) and (blender_object.type == 'EMPTY'):
+            blender_object = _replace_object_data(vnode, blender_object, speaker)
+        else:
+            obj = bpy.data.objects.new(name, speaker)
+            for collection in blender_object.users_collection:
+                collection.objects.link(obj)
+            obj.parent = blender_object
+
+
+def _create_speaker(source, name, gltf):
+    speaker = bpy.data.speakers.new(name)
+    media = ImportedMedia.get(gltf)
+    for accessor in source.accessors:
+        m = media.get_accessor_media(gltf, accessor)
+        if m is not None:
+            speaker.sound = media.get_sound(m)
+            break
+
+    if source.referenceDistance is not None:
+        speaker.distance_reference = source.referenceDistance
+    # see exp.mpeg_audio_source._get_audio_attenuation_args
+    if source.attenuationParameters and len(source.attenuationParameters) >= 2:
+        speaker.distance_max, speaker.attenuation = source.attenuationParameters[:2]
+    for prop, data_path, convert in ANIMATED_PROPERTIES:
+        value = getattr(source, prop)
+        if value is not None:
+            setattr(speaker, data_path, float(convert(value)) if convert else value)
+
+    animation = (source.extras or {}).get("animation")
+    if animation:
+        _import_speaker_animation(speaker, animation, gltf)
+    return speaker
+
+
+def _import_speaker_animation(speaker, animation, gltf):
+    # samplers are baked over the scene frame range, see exp.mpeg_animation.get_scene_frames
+    scene = bpy.context.scene
+    fps = scene.render.fps / scene.render.fps_base
+    action = None
+    for prop, data_path, convert in ANIMATED_PROPERTIES:
+        sampler = animation.get(prop)
+        if sampler is None:
+            continue
+        times = BinaryData.get_data_from_accessor(gltf, sampler["input"]).reshape(-1)
+        values = BinaryData.get_data_from_accessor(gltf, sampler["output"]).reshape(-1)
+        if convert is not None:
+            values = convert(values)
+        if action is None:
+            action = bpy.data.actions.new(f'{speaker.name}Action')
+            speaker.animation_data_create().action = action
+        fcurve = action.fcurves.new(data_path)
+        fcurve.keyframe_points.add(len(times))
+        co = np.empty((len(times), 2), dtype=np.float32)
+        co[:, 0] = scene.frame_start + times * fps
+        co[:, 1] = values
+        fcurve.keyframe_points.foreach_set('co', co.reshape(-1))
+        # the baked keyframes are reduced to linear segments
+        for keyframe in fcurve.keyframe_points:
+            keyframe.interpolation = 'LINEAR'
+        fcurve.update()
+
+
+def _replace_object_data(vnode, blender_object, data):
+    """
+    replaces an object by an object of the same name, transform and hierarchy, holding `data`.
+    the core importer creates the children of a node after its hook, so they are parented to the new object.
+    """
+    obj = bpy.data.objects.new(blender_object.name, data)
+    for collection in blender_object.users_collection:
+        collection.objects.link(obj)
+    obj.parent = blender_object.parent
+    obj.matrix_parent_inverse = blender_object.matrix_parent_inverse
+    obj.rotation_mode = blender_object.rotation_mode
+    obj.location = blender_object.location
+    obj.rotation_quaternion = blender_object.rotation_quaternion
+    obj.rotation_euler = blender_object.rotation_euler
+    obj.scale = blender_object.scale
+    # glTF extras
+    for key in blender_object.keys():
+        obj[key] = blender_object[key]
+    for child in blender_object.children:
+        child.parent = obj
+    name = blender_object.name
+    bpy.data.objects.remove(blender_object)
+    obj.name = name
+    vnode.blender_object = obj
+    return obj
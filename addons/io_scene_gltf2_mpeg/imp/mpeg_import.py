@@ -0,0 +1,42 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from io_scene_gltf2.io.com.gltf2_io_extensions import Extension
+
+from .mpeg_audio_source import import_audio_sources, MPEG_AUDIO_SPATIAL
+from .mpeg_video_texture import import_video_textures
+from .mpeg_anchor import import_anchors
+
+
+class glTF2ImportMpegExtension:
+
+    def __init__(self):
+        # declares the extensions as supported, so that the core importer accepts them when required
+        self.extensions = [
+            Extension(name="MPEG_media", extension={}, required=True),
+            Extension(name="MPEG_buffer_circular", extension={}, required=True),
+            Extension(name="MPEG_accessor_timed", extension={}, required=True),
+            Extension(name="MPEG_texture_video", extension={}, required=True),
+            Extension(name="MPEG_audio_spatial", extension={}, required=True),
+            Extension(name="MPEG_anchor", extension={}, required=True)
+        ]
+
+    def gather_import_node_after_hook(self, vnode, gltf_node, blender_object, gltf):
+        # called before the node's children are created, which are then parented to the speaker replacing the node
+        if (gltf_node is None) or (blender_object is None) or not gltf_node.extensions:
+            return
+        if MPEG_AUDIO_SPATIAL in gltf_node.extensions:
+            import_audio_sources(vnode, gltf_node, blender_object, gltf)
+
+    def gather_import_material_after_hook(self, gltf_material, vertex_color, blender_mat, gltf):
+        import_video_textures(gltf_material, blender_mat, gltf)
+
+    def gather_import_scene_after_nodes_hook(self, gltf_scene, blender_scene, gltf):
+        import_anchors(gltf)
@@ -0,0 +1,105 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from ..com.MPEG_media import MPEG_media
+from ..exp.mpeg_packaging import DASH_MIME_TYPE, HLS_MIME_TYPE
+
+MPEG_MEDIA_IMPORT = "mpeg_media_import"
+
+SEGMENTED_MIME_TYPES = (DASH_MIME_TYPE, HLS_MIME_TYPE)
+
+
+class ImportedMedia:
+    """
+    The MPEG_media of an imported glTF, and the Blender sounds and movies created for them.
+    Datablocks are created the first time a media is referenced, once per file, and only reference
+    the media file: Blender reads it when it is first played or displayed, not during the import.
+    """
+
+    def __init__(self, gltf):
+        ext = (gltf.data.extensions or {}).get("MPEG_media")
+        self.media = MPEG_media.from_dict(ext).media if ext else []
+        self.base_dir = Path(gltf.filename).parent
+        # resolved file path -> datablock
+        self.sounds = {}
+        self.movies = {}
+
+    @staticmethod
+    def get(gltf) -> 'ImportedMedia':
+        """
+        returns the media of the glTF being imported, parsed once per import
+        """
+        imported = gltf.import_settings.get(MPEG_MEDIA_IMPORT)
+        if imported is None:
+            imported = gltf.import_settings[MPEG_MEDIA_IMPORT] = ImportedMedia(gltf)
+        return imported
+
+    def get_accessor_media(self, gltf, accessor_index):
+        """
+        returns the media decoded into a timed accessor, through its MPEG_buffer_circular
+        """
+        accessor = gltf.data.accessors[accessor_index]
+        buffer_view = accessor.buffer_view
+        if buffer_view is None:
+            buffer_view = (accessor.extensions or {}).get("MPEG_accessor_timed", {}).get("bufferView")
+        if buffer_view is None:
+            return None
+        buffer = gltf.data.buffers[gltf.data.buffer_views[buffer_view].buffer]
+        circular = (buffer.extensions or {}).get("MPEG_buffer_circular")
+        if (circular is None) or not (0 <= circular.get("media", -1) < len(self.media)):
+            return None
+        return self.media[circular["media"]]
+
+    def get_path(self, media):
+        """
+        returns the local file of a media's progressive alternative, DASH / HLS manifests are skipped
+        """
+        alternatives = sorted(media.alternatives, key=lambda a: a.mime_type in SEGMENTED_MIME_TYPES)
+        for alternative in alternatives:
+            uri = alternative.uri
+            if uri and not uri.startswith('data:') and not urlparse(uri).scheme:
+                return (self.base_dir / unquote(uri)).resolve()
+        return None
+
+    def get_sound(self, media):
+        path = self.get_path(media)
+        if path is None:
+            print(f'MPEG_media: no local file for {media.name or media.alternatives[0].uri}')
+            return None
+        if path in self.sounds:
+            return self.sounds[path]
+        sound = None
+        try:
+            # sounds are opened when the depsgraph is evaluated, not when loaded
+            sound = bpy.data.sounds.load(str(path), check_existing=True)
+        except RuntimeError as e:
+            print(f'MPEG_media: {e}')
+        self.sounds[path] = sound
+        return sound
+
+    def get_movie(self, media):
+        path = self.get_path(media)
+        if path is None:
+            print(f'MPEG_media: no local file for {media.name or media.alternatives[0].uri}')
+            return None
+        if path in self.movies:
+            return self.movies[path]
+        # unlike bpy.data.images.load, this doesn't open the file to detect its type:
+        # the first frame is decoded the first time the image is displayed or its size is read
+        image = bpy.data.images.new(path.name, width=1, height=1)
+        image.source = 'MOVIE'
+        image.filepath = str(path)
+        self.movies[path] = image
+        return image
@@ -0,0 +1,89 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import bpy
+
+from .mpeg_media import ImportedMedia
+
+MPEG_TEXTURE_VIDEO = "MPEG_texture_video"
+
+# (material texture info, Principled BSDF inputs it is connected to, by blender version)
+TEXTURE_SLOTS = (
+    (lambda m: m.pbr_metallic_roughness and m.pbr_metallic_roughness.base_color_texture, ('Base Color',)),
+    (lambda m: m.emissive_texture, ('Emission Color', 'Emission')),
+)
+
+
+def import_video_textures(gltf_material, blender_mat, gltf):
+    """
+    sets the movie of the MPEG_texture_video textures of a material on the image texture nodes the core
+    importer created for them, in place of their fallback image
+    """
+    if (blender_mat.node_tree is None) or not gltf.data.textures:
+        return
+    bsdf = next((n for n in blender_mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+    if bsdf is None:
+        return
+    for get_texture_info, inputs in TEXTURE_SLOTS:
+        tex_info = get_texture_info(gltf_material)
+        if tex_info is None:
+            continue
+        ext = (gltf.data.textures[tex_info.index].extensions or {}).get(MPEG_TEXTURE_VIDEO)
+        if ext is None:
+            continue
+        socket = next((bsdf.inputs[i] for i in inputs if i in bsdf.inputs), None)
+        node = _find_image_node(socket)
+        if node is None:
+            print(f'{MPEG_TEXTURE_VIDEO}: no image texture node found in {blender_mat.name}')
+            continue
+        media = ImportedMedia.get(gltf)
+        m = media.get_accessor_media(gltf, ext["accessor"])
+        image = None if m is None else media.get_movie(m)
+        if image is not None:
+            node.image = image
+            _set_image_user(node.image_user, m, image.fps)
+
+
+def _find_image_node(socket):
+    """
+    returns the first image texture node upstream of a socket
+    """
+    sockets = [socket] if socket is not None else []
+    visited = set()
+    while sockets:
+        s = sockets.pop(0)
+        for link in s.links:
+            node = link.from_node
+            if node.type == 'TEX_IMAGE':
+                return node
+            if node.name not in visited:
+                visited.add(node.name)
+                sockets.extend(i for i in node.inputs if i.is_linked)
+    return None
+
+
+def _set_image_user(image_user, media, movie_fps=None):
+    """
+    inverse of exp.mpeg_media.get_movie_range:
+    media without an endTimeOffset play over the scene frame range
+    """
+    scene = bpy.context.scene
+    fps = scene.render.fps / scene.render.fps_base
+    # the media time offsets are in the movie's time
+    movie_fps = movie_fps or fps
+    start_offset = media.start_time_offset or 0.0
+    image_user.frame_start = scene.frame_start + round((media.start_time or 0.0) * fps)
+    image_user.frame_offset = round(start_offset * movie_fps)
+    if media.end_time_offset is not None:
+        image_user.frame_duration = max(1, round((media.end_time_offset - start_offset) * movie_fps))
+    else:
+        image_user.frame_duration = scene.frame_end - image_user.frame_start + 1
+    image_user.use_cyclic = bool(media.loop)
+    image_user.use_auto_refresh = bool(media.autoplay)
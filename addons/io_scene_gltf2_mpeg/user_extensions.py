@@ -0,0 +1,22 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+# glTF user extensions, imported by the add-on's __init__ on the first export or import.
+
+from .exp.mpeg_export import glTF2ExportMpegExtension
+from .imp.mpeg_import import glTF2ImportMpegExtension
+
+
+class glTF2ExportUserExtension(glTF2ExportMpegExtension):
+    pass
+
+
+class glTF2ImportUserExtension(glTF2ImportMpegExtension):
+    pass
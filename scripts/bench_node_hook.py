@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Measures the overhead of the MPEG node hook on the objects it doesn't extend, outside Blender.
+
+    python scripts/bench_node_hook.py [--nodes 100000] [--instances 1] [--runs 5]
+
+The hook is called `--nodes` times, as the core exporter does for each node, on `--nodes / --instances`
+empties of a collection instanced `--instances` times, and a few speakers. The time to build the speaker and
+marker index, walked once per export by the captures, is measured next to it.
+The stand-in objects are plain python objects, in Blender each property read goes through RNA.
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / 'scripts' / 'standin'), str(ROOT / 'addons')]
+
+import bpy
+import io_scene_gltf2_mpeg
+from io_scene_gltf2.io.com import gltf2_io
+from mpeg_standin import scene as standin_scene
+from mpeg_standin.export import create_export_settings
+
+
+def measure(fn, runs):
+    durations = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - t0)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=100000)
+    parser.add_argument('--instances', type=int, default=1, help='nodes per object, eg. collection instances')
+    parser.add_argument('--speakers', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    io_scene_gltf2_mpeg.register()
+    from io_scene_gltf2_mpeg.exp.mpeg_node_index import NodeIndex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scene = standin_scene.create_scene()
+        bpy.context.scene = scene
+        if args.instances > 1:
+            collection = bpy.types.Collection(name='Instanced')
+            for i in range(max(1, args.nodes // args.instances)):
+                collection.objects.append(bpy.types.Object(name=f'Empty.{i:06}', type='EMPTY'))
+            for i in range(args.instances):
+                standin_scene.create_collection_instance(scene, f'Instance.{i:06}', collection)
+        else:
+            for i in range(args.nodes):
+                standin_scene.create_empty(scene, f'Empty.{i:06}')
+        sound = Path(tmp) / 'sound.mp3'
+        sound.touch()
+        for i in range(args.speakers):
+            standin_scene.create_speaker(scene, f'Speaker.{i:06}', str(sound))
+
+        export_settings = create_export_settings(Path(tmp) / 'scene.gltf')
+        io_scene_gltf2_mpeg.glTF2_pre_export_callback(export_settings)
+        hook = io_scene_gltf2_mpeg.glTF2ExportUserExtension().gather_node_hook
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        # plain nodes only, as many as the core exporter visits
+        objects = [i.object for i in depsgraph.object_instances if i.object.type == 'EMPTY']
+        node = gltf2_io.Node(name='node', children=[])
+
+        def hooks():
+            for obj in objects:
+                hook(node, obj, export_settings)
+
+        def build():
+            NodeIndex.reset()
+            NodeIndex.capture(scene)
+
+        hook_time = measure(hooks, args.runs)
+        index_time = measure(build, args.runs)
+
+    scale = 100000 / len(objects)
+    print(f'{len(objects)} plain nodes, instanced {args.instances} times, {args.speakers} speakers')
+    print(f'node hook        {hook_time * scale * 1000:8.2f} ms per 100k nodes')
+    print(f'speaker index    {index_time * scale * 1000:8.2f} ms per 100k nodes, once per export')
+
+
+if __name__ == '__main__':
+    main()
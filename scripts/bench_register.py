@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measures the add-on's start-up cost (import + register()) outside Blender,
+using the stand-in `bpy` from scripts/standin.
+
+    python scripts/bench_register.py [--runs 20]
+
+Each run uses a fresh interpreter, as this is the cost paid by every batch worker.
+It also reports the export-side modules loaded at registration, which should be none.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+STANDIN = ROOT / 'scripts' / 'standin'
+ADDONS = ROOT / 'addons'
+
+# modules which must not be loaded until the first export
+EXPORT_MODULES = (
+    'aud',
+    'io_scene_gltf2',
+    'io_scene_gltf2_mpeg.user_extensions',
+    'io_scene_gltf2_mpeg.exp.mpeg_export',
+    'io_scene_gltf2_mpeg.blender.media_proxy',
+)
+
+
+def run_child():
+    sys.path[:0] = [str(STANDIN), str(ADDONS)]
+    t0 = time.perf_counter()
+    import io_scene_gltf2_mpeg
+    t1 = time.perf_counter()
+    io_scene_gltf2_mpeg.register()
+    t2 = time.perf_counter()
+    print(json.dumps({
+        "import": t1 - t0,
+        "register": t2 - t1,
+        "export_modules": [m for m in EXPORT_MODULES if m in sys.modules]
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child()
+
+    results = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, __file__, '--child'], check=True, capture_output=True, text=True)
+        results.append(json.loads(out.stdout))
+
+    for key in ('import', 'register'):
+        values = [r[key] * 1000 for r in results]
+        print(f'{key:<10} median {statistics.median(values):8.3f} ms    min {min(values):8.3f} ms')
+
+    loaded = sorted({m for r in results for m in r["export_modules"]})
+    print(f'export modules loaded at registration: {", ".join(loaded) if loaded else "none"}')
+    return 1 if loaded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
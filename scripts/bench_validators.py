@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Measures the MPEG_* payload validation on a generated glTF document, outside Blender.
+
+    python scripts/bench_validators.py [--objects 10000] [--runs 10]
+
+The document has one node per object: speakers with an MPEG_audio_spatial source, an accessor,
+a circular buffer and a media, every 10th node is anchored and every 10th texture is a video.
+The compiled validators are compared with interpreting the same schemas on each payload.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / 'scripts' / 'standin'), str(ROOT / 'addons')]
+
+from io_scene_gltf2_mpeg.com.mpeg_validation import (
+    SCHEMAS, COLLECTIONS, iter_payloads, get_counts, get_validator, validate_gltf
+)
+
+TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+
+def build_gltf(n):
+    gltf = {
+        "nodes": [], "textures": [], "accessors": [], "bufferViews": [], "buffers": [],
+        "extensions": {"MPEG_media": {"media": []}, "MPEG_anchor": {"trackables": [{"type": 0}], "anchors": []}},
+    }
+    for i in range(n):
+        media = len(gltf["extensions"]["MPEG_media"]["media"])
+        gltf["extensions"]["MPEG_media"]["media"].append({
+            "alternatives": [{"mimeType": "audio/mp3", "uri": f"sound.{i:06}.mp3",
+                              "tracks": [{"track": "#track=0", "codecs": "mp4a.40.34"}]}],
+            "autoplay": True, "loop": True,
+        })
+        gltf["buffers"].append({"byteLength": 4608, "extensions": {"MPEG_buffer_circular": {"media": media, "count": 2}}})
+        gltf["bufferViews"].append({"buffer": len(gltf["buffers"]) - 1, "byteLength": 4608})
+        gltf["accessors"].append({
+            "bufferView": i, "componentType": 5126, "count": 1152, "type": "SCALAR",
+            "extensions": {"MPEG_accessor_timed": {"suggestedUpdateRate": 38.28, "bufferView": i}},
+        })
+        node = {"extensions": {"MPEG_audio_spatial": {"sources": [{
+            "id": i, "type": "Object", "accessors": [i], "attenuation": "linearDistance",
+            "attenuationParameters": [1.0, 100.0], "referenceDistance": 1.0, "targetSampleRate": 44100,
+        }]}}}
+        if i % 10 == 0:
+            gltf["extensions"]["MPEG_anchor"]["anchors"].append({"trackable": 0, "requiresAnchoring": True})
+            node["extensions"]["MPEG_anchor"] = {"anchor": len(gltf["extensions"]["MPEG_anchor"]["anchors"]) - 1}
+            gltf["textures"].append({"extensions": {"MPEG_texture_video": {
+                "accessor": i, "width": 256, "height": 256, "format": "RGB"}}})
+        gltf["nodes"].append(node)
+    return gltf
+
+
+def interpret(schema, value, path, errors, counts):
+    """
+    reference validator, walking the schema on each value
+    """
+    if "type" in schema and not TYPES[schema["type"]](value):
+        errors.append(f'{path}: expected {schema["type"]}')
+        return
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(f'{path}: {value!r} not allowed')
+        return
+    if ("minimum" in schema and value < schema["minimum"]) \
+            or ("exclusiveMinimum" in schema and value <= schema["exclusiveMinimum"]) \
+            or ("maximum" in schema and value > schema["maximum"]):
+        errors.append(f'{path}: out of range')
+        return
+    if "ref" in schema and value >= counts.get(schema["ref"], value + 1):
+        errors.append(f'{path}: invalid reference')
+        return
+    for key in schema.get("required", ()):
+        if key not in value:
+            errors.append(f'{path}: missing {key}')
+    for key, s in schema.get("properties", {}).items():
+        if key in value:
+            interpret(s, value[key], f'{path}.{key}', errors, counts)
+    if "discriminator" in schema:
+        s = schema["discriminator"]["mapping"].get(value.get(schema["discriminator"]["property"]))
+        if s is not None:
+            interpret(s, value, path, errors, counts)
+    if len(value) < schema.get("minItems", 0) if isinstance(value, list) else False:
+        errors.append(f'{path}: too few items')
+    for i, item in enumerate(value if "items" in schema else ()):
+        interpret(schema["items"], item, f'{path}[{i}]', errors, counts)
+
+
+def validate_interpreted(gltf):
+    root_extensions = gltf.get("extensions", {})
+    collections = {scope: [o.get("extensions") for o in gltf.get(scope, [])] for scope in COLLECTIONS}
+    counts = get_counts(root_extensions, {k: len(gltf.get(k, [])) for k in ("accessors", "bufferViews", "buffers", "nodes", "textures")})
+    errors = []
+    for extension, scope, path, payload in iter_payloads(root_extensions, collections):
+        schema = SCHEMAS.get((extension, scope))
+        if schema is not None:
+            interpret(schema, payload, path, errors, counts)
+    return errors
+
+
+def measure(fn, runs):
+    durations = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        errors = fn()
+        durations.append(time.perf_counter() - t0)
+    assert not errors, errors[:5]
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objects', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    gltf = build_gltf(args.objects)
+    root_extensions = gltf["extensions"]
+    collections = {scope: [o.get("extensions") for o in gltf.get(scope, [])] for scope in COLLECTIONS}
+    payloads = sum(1 for _ in iter_payloads(root_extensions, collections))
+    values = len(gltf["extensions"]["MPEG_media"]["media"]) + len(gltf["extensions"]["MPEG_anchor"]["anchors"]) + payloads
+
+    get_validator.cache_clear()
+    t0 = time.perf_counter()
+    for extension, scope in SCHEMAS:
+        get_validator(extension, scope)
+    compile_time = time.perf_counter() - t0
+
+    compiled = measure(lambda: validate_gltf(gltf), args.runs)
+    interpreted = measure(lambda: validate_interpreted(gltf), args.runs)
+
+    print(f'{args.objects} objects, {payloads} extension payloads, ~{values} validated objects')
+    print(f'compile      {compile_time * 1000:8.3f} ms (once per process, {len(SCHEMAS)} schemas)')
+    print(f'compiled     {compiled * 1000:8.3f} ms    {compiled / values * 1e6:6.2f} us per object')
+    print(f'interpreted  {interpreted * 1000:8.3f} ms    {interpreted / values * 1e6:6.2f} us per object')
+    print(f'speed-up     {interpreted / compiled:8.2f} x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Reports the player-side cost of an exported .gltf: per media frame size, bandwidth at
+the accessors' suggestedUpdateRate, circular buffer memory, concurrent decoders, and
+stride / alignment problems in the MPEG_* buffers. With --gops, it also reads the MP4 media
+files and reports their keyframe intervals and the frames decoded each time they loop.
+
+    python scripts/mpeg_analyze.py scene.gltf [--json] [--strict] [--gops]
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'addons' / 'io_scene_gltf2_mpeg'))
+
+from com.mpeg_analysis import analyze_file, format_report
+from com.mpeg_gop import analyze_gltf_gops, format_gop_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('gltf', type=Path)
+    parser.add_argument('--json', action='store_true', help='print the report as json')
+    parser.add_argument('--strict', action='store_true', help='exit with an error when issues are found')
+    parser.add_argument('--gops', action='store_true', help='report the keyframe intervals of the MP4 media files')
+    args = parser.parse_args()
+
+    report = analyze_file(args.gltf)
+    gops = analyze_gltf_gops(args.gltf) if args.gops else []
+    if args.json:
+        result = report.to_dict()
+        if args.gops:
+            result["gops"] = [asdict(g) for g in gops]
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_report(report))
+        for g in gops:
+            print(f'media {g.index} {g.uri}: {format_gop_report(g.report) if g.report else g.error}')
+    return 1 if (args.strict and report.issues) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Runs the add-on's export hooks on a generated scene, outside Blender, using the
+stand-in runtime from scripts/standin (bpy, aud and io_scene_gltf2 stand-ins).
+
+    python scripts/profile_export.py --speakers 200 --videos 20 --materials 500 --nodes 10000
+    python scripts/profile_export.py --profile            # cProfile, sorted by cumulative time
+    python scripts/profile_export.py --repeat 50          # load test, repeated exports
+    python scripts/profile_export.py --collections 4 --split  # split per collection
+    python scripts/profile_export.py --scenes 4           # exports sharing their media, as the multi-scene export
+    python scripts/profile_export.py --media-store /tmp/store --store-mode HARDLINK  # content-addressed media
+
+The generated media files are empty placeholders, so media export measures file handling only.
+"""
+
+import argparse
+import cProfile
+import pstats
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / 'scripts' / 'standin'), str(ROOT / 'addons')]
+
+import bpy
+import io_scene_gltf2_mpeg
+from mpeg_standin import scene as standin_scene
+from mpeg_standin.export import create_export_settings, export
+
+
+def build_scene(args, media_dir):
+    scene = standin_scene.create_scene()
+    scene.MPEG_ExporterProperties.split_collections = args.split
+    scene.MPEG_ExporterProperties.media_packaging = args.packaging
+    scene.MPEG_ExporterProperties.write_manifest = args.manifest
+    scene.MPEG_ExporterProperties.media_store = str(args.media_store or '')
+    scene.MPEG_ExporterProperties.media_store_mode = args.store_mode
+    scene.MPEG_ExporterProperties.audio_sample_format = args.audio_samples
+    scene.MPEG_ExporterProperties.spatial_index = args.spatial_index
+    scene.MPEG_ExporterProperties.print_statistics = True
+    scene.MPEG_ExporterProperties.cluster_audio_sources = args.max_audio_sources is not None
+    if args.max_audio_sources is not None:
+        scene.MPEG_ExporterProperties.max_audio_sources = args.max_audio_sources
+    collections = [standin_scene.create_collection(scene, f'Collection.{i:03}') for i in range(args.collections)]
+
+    def collection(i):
+        return collections[i % len(collections)] if collections else None
+
+    for i in range(args.nodes):
+        standin_scene.create_empty(scene, f'Empty.{i:06}', collection(i))
+
+    for i in range(args.speakers):
+        sound = media_dir / f'sound.{i % max(1, args.sounds):04}.mp3'
+        sound.touch()
+        # speakers on a 20 x n grid, 3 units apart
+        location = ((i % 20) * 3.0, (i // 20) * 3.0, 0.0)
+        speaker = standin_scene.create_speaker(scene, f'Speaker.{i:06}', str(sound), collection(i), location)
+        if args.speaker_distance is not None:
+            speaker.data.distance_max = args.speaker_distance
+
+    images = []
+    for i in range(args.videos):
+        video = media_dir / f'video.{i:04}.mp4'
+        video.touch()
+        images.append(standin_scene.create_movie_image(video.name, str(video), size=(args.video_size, args.video_size)))
+
+    materials = []
+    for i in range(args.materials):
+        image = images[i % len(images)] if images else None
+        materials.append(standin_scene.create_material(f'Material.{i:06}', image))
+
+    # meshes in front of the cameras, from 2 to 100 units away
+    scene.MPEG_ExporterProperties.video_resolution_hints = args.resolution_hints
+    for i in range(args.cameras):
+        standin_scene.create_camera(scene, f'Camera.{i:03}', location=(i * 2.0, 0.0, 0.0))
+    for i in range(args.meshes if materials else 0):
+        material, _ = materials[i % len(materials)]
+        standin_scene.create_mesh(scene, f'Mesh.{i:06}', material, location=(0.0, 0.0, -2.0 - (i % 50) * 2.0), collection=collection(i))
+
+    return scene, materials
+
+
+def run(args, scene, materials, output_dir):
+    if args.scenes <= 1:
+        return export_scene(scene, materials, output_dir / 'scene.gltf')
+
+    # the generated scene stands for each scene of a .blend, see MPEG_OT_ExportScenes
+    from io_scene_gltf2_mpeg.exp.mpeg_shared_media import SharedMedia
+    SharedMedia.begin('media')
+    try:
+        for i in range(args.scenes):
+            export_scene(scene, materials, output_dir / f'scene.{i:03}.gltf')
+        for error in SharedMedia.export().errors:
+            print(error)
+        print(SharedMedia.report())
+    finally:
+        SharedMedia.end()
+
+
+def export_scene(scene, materials, filepath):
+    export_settings = create_export_settings(filepath)
+    return export(
+        scene, materials, export_settings,
+        user_extensions=[io_scene_gltf2_mpeg.glTF2ExportUserExtension()],
+        pre_export_callbacks=[io_scene_gltf2_mpeg.glTF2_pre_export_callback],
+        post_export_callbacks=[io_scene_gltf2_mpeg.glTF2_post_export_callback]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, default=1000, help='plain nodes (empties)')
+    parser.add_argument('--speakers', type=int, default=50)
+    parser.add_argument('--speaker-distance', type=float, default=None, help='distance_max of the speakers')
+    parser.add_argument('--sounds', type=int, default=10, help='distinct sound files shared by the speakers')
+    parser.add_argument('--videos', type=int, default=10, help='distinct movie images')
+    parser.add_argument('--video-size', type=int, default=256)
+    parser.add_argument('--materials', type=int, default=100, help='materials, using the movie images in turn')
+    parser.add_argument('--meshes', type=int, default=0, help='meshes using the materials in turn')
+    parser.add_argument('--cameras', type=int, default=0)
+    parser.add_argument('--resolution-hints', action='store_true', help='scale videos to their size seen from the cameras')
+    parser.add_argument('--max-audio-sources', type=int, default=None, help='merge nearby speakers up to this number of sources')
+    parser.add_argument('--packaging', choices=('NONE', 'DASH', 'HLS', 'DASH_HLS'), default='NONE',
+                        help='add segmented media alternatives')
+    parser.add_argument('--collections', type=int, default=0, help='collections, the objects are linked to in turn')
+    parser.add_argument('--split', action='store_true', help='split the export per collection')
+    parser.add_argument('--audio-samples', choices=('FLOAT', 'SHORT'), default='FLOAT', help='audio sample accessors format')
+    parser.add_argument('--spatial-index', action='store_true', help='write the spatial index of audio sources and anchors')
+    parser.add_argument('--manifest', action='store_true', help='write the change manifest')
+    parser.add_argument('--scenes', type=int, default=1, help='exports sharing a single copy of the media')
+    parser.add_argument('--media-store', type=Path, default=None, help='content-addressed media store directory')
+    parser.add_argument('--store-mode', choices=('URI', 'HARDLINK'), default='URI', help='how exports refer to the media store')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--profile', action='store_true')
+    parser.add_argument('--output', type=Path, default=None, help='output directory, temporary by default')
+    args = parser.parse_args()
+
+    io_scene_gltf2_mpeg.register()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        media_dir = tmp / 'media'
+        media_dir.mkdir()
+        output_dir = args.output or (tmp / 'out')
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        scene, materials = build_scene(args, media_dir)
+
+        profiler = cProfile.Profile() if args.profile else None
+        durations = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            run(args, scene, materials, output_dir)
+            if profiler:
+                profiler.disable()
+            durations.append(time.perf_counter() - t0)
+
+    print(f'{args.repeat} export(s): median {statistics.median(durations) * 1000:.2f} ms, '
+          f'min {min(durations) * 1000:.2f} ms, max {max(durations) * 1000:.2f} ms')
+    if profiler:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+if __name__ == '__main__':
+    main()
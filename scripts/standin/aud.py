@@ -0,0 +1,24 @@
+"""
+Stand-in for Blender's `aud` module.
+"""
+
+RATE_44100 = 44100
+RATE_48000 = 48000
+CHANNELS_MONO = 1
+CHANNELS_STEREO = 2
+FORMAT_FLOAT32 = 36
+CONTAINER_MP3 = 3
+CODEC_MP3 = 3
+
+
+class Sound:
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    @staticmethod
+    def file(filepath):
+        return Sound(filepath)
+
+    def write(self, *args):
+        raise NotImplementedError('aud stand-in does not encode audio')
@@ -0,0 +1,27 @@
+"""
+Stand-in for Blender's `bpy` module.
+
+Covers what the add-on needs to be imported, registered and to run its export hooks
+outside Blender (see scripts/profile_export.py), it does not emulate Blender's behavior.
+"""
+
+from types import SimpleNamespace
+
+from . import app, path, props, types, utils
+
+context = SimpleNamespace(scene=None)
+context.evaluated_depsgraph_get = lambda: types.Depsgraph(scene=context.scene)
+
+
+class _IDCollection(list):
+    def get(self, name, default=None):
+        return next((item for item in self if item.name == name), default)
+
+
+data = SimpleNamespace(
+    objects=_IDCollection(),
+    images=_IDCollection(),
+    sounds=_IDCollection(),
+    materials=_IDCollection(),
+    scenes=_IDCollection(),
+)
@@ -0,0 +1,4 @@
+version = (4, 2, 0)
+background = True
+
+from . import handlers, timers
@@ -0,0 +1,11 @@
+"""
+Stand-in for bpy.app.handlers: handlers are stored, never called.
+"""
+
+depsgraph_update_post = []
+load_post = []
+
+
+def persistent(func):
+    func._bpy_persistent = True
+    return func
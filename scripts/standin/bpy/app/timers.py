@@ -0,0 +1,19 @@
+"""
+Stand-in for bpy.app.timers: timers are stored, never run.
+"""
+
+_registered = {}
+
+
+def register(function, first_interval=0, persistent=False):
+    _registered[function] = first_interval
+
+
+def unregister(function):
+    if function not in _registered:
+        raise ValueError("Error: function is not registered")
+    del _registered[function]
+
+
+def is_registered(function):
+    return function in _registered
@@ -0,0 +1,7 @@
+import os
+
+
+def abspath(path, start=None):
+    if path.startswith('//'):
+        return os.path.join(start or os.getcwd(), path[2:])
+    return path
@@ -0,0 +1,79 @@
+class _PropertyDeferred:
+    """
+    mirrors bpy.props: properties are declared as class annotations and resolved on register_class
+    """
+
+    def __init__(self, function, keywords):
+        self.function = function
+        self.keywords = keywords
+
+    def default(self):
+        if self.function is PointerProperty:
+            t = self.keywords.get('type')
+            return t() if (t is not None) and issubclass(t, _registrable_base()) else None
+        if self.function is CollectionProperty:
+            return []
+        if 'default' in self.keywords:
+            return self.keywords['default']
+        if self.function is EnumProperty:
+            items = self.keywords.get('items')
+            return items[0][0] if isinstance(items, (list, tuple)) and items else ''
+        return _DEFAULTS.get(self.function)
+
+    def __get__(self, instance, owner):
+        # properties added to a registered type after its definition, eg. `bpy.types.Object.xr_anchor = PointerProperty(...)`
+        if instance is None:
+            return self
+        values = instance.__dict__.setdefault('_deferred_properties', {})
+        if id(self) not in values:
+            values[id(self)] = self.default()
+        return values[id(self)]
+
+    def __repr__(self):
+        return f'<{self.function.__name__} {self.keywords}>'
+
+
+def _registrable_base():
+    from .types import PropertyGroup
+    return PropertyGroup
+
+
+def BoolProperty(**keywords):
+    return _PropertyDeferred(BoolProperty, keywords)
+
+
+def IntProperty(**keywords):
+    return _PropertyDeferred(IntProperty, keywords)
+
+
+def FloatProperty(**keywords):
+    return _PropertyDeferred(FloatProperty, keywords)
+
+
+def FloatVectorProperty(**keywords):
+    keywords.setdefault('default', (0.0,) * keywords.get('size', 3))
+    return _PropertyDeferred(FloatVectorProperty, keywords)
+
+
+def StringProperty(**keywords):
+    return _PropertyDeferred(StringProperty, keywords)
+
+
+def EnumProperty(**keywords):
+    return _PropertyDeferred(EnumProperty, keywords)
+
+
+def PointerProperty(**keywords):
+    return _PropertyDeferred(PointerProperty, keywords)
+
+
+def CollectionProperty(**keywords):
+    return _PropertyDeferred(CollectionProperty, keywords)
+
+
+_DEFAULTS = {
+    BoolProperty: False,
+    IntProperty: 0,
+    FloatProperty: 0.0,
+    StringProperty: '',
+}
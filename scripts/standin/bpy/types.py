@@ -0,0 +1,192 @@
+class bpy_struct:
+
+    def __init__(self, **kwargs):
+        from .utils import property_defaults
+        for klass in reversed(type(self).__mro__):
+            for name, value in property_defaults(klass).items():
+                setattr(self, name, value)
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def as_pointer(self):
+        return id(self)
+
+
+class ID(bpy_struct):
+    name = ''
+    animation_data = None
+
+    # custom properties
+    def _id_properties(self):
+        return self.__dict__.setdefault('_id_props', {})
+
+    def __contains__(self, key):
+        return key in self._id_properties()
+
+    def __getitem__(self, key):
+        return self._id_properties()[key]
+
+    def __setitem__(self, key, value):
+        self._id_properties()[key] = value
+
+    def __delitem__(self, key):
+        del self._id_properties()[key]
+
+    def get(self, key, default=None):
+        return self._id_properties().get(key, default)
+
+    def keys(self):
+        return self._id_properties().keys()
+
+
+class PropertyGroup(bpy_struct):
+    pass
+
+
+class Panel(bpy_struct):
+    pass
+
+
+class Operator(bpy_struct):
+    pass
+
+
+class Menu(bpy_struct):
+
+    @classmethod
+    def append(cls, draw_func):
+        cls._draw_funcs = [*cls.__dict__.get('_draw_funcs', ()), draw_func]
+
+    @classmethod
+    def remove(cls, draw_func):
+        cls._draw_funcs = [f for f in cls.__dict__.get('_draw_funcs', ()) if f is not draw_func]
+
+
+class TOPBAR_MT_file_export(Menu):
+    pass
+
+
+class Scene(ID):
+    pass
+
+
+class Collection(ID):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.objects = []
+        self.children = []
+
+    @property
+    def all_objects(self):
+        result = [*self.objects]
+        for child in self.children:
+            result += [o for o in child.all_objects if o not in result]
+        return result
+
+
+class Object(ID):
+    type = 'EMPTY'
+    data = None
+    matrix_world = ((1.0, 0.0, 0.0, 0.0), (0.0, 1.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, 0.0, 0.0, 1.0))
+    bound_box = ((-1.0, -1.0, -1.0),) * 8
+    material_slots = ()
+    instance_type = 'NONE'
+    instance_collection = None
+
+    @property
+    def original(self):
+        return self
+
+
+class Camera(ID):
+    type = 'PERSP'
+    lens = 50.0
+    sensor_width = 36.0
+    sensor_height = 24.0
+    sensor_fit = 'AUTO'
+    ortho_scale = 6.0
+    clip_start = 0.1
+
+
+class Image(ID):
+    source = 'FILE'
+    filepath = ''
+    size = (0, 0)
+    depth = 24
+    fps = 0
+    use_deinterlace = False
+    has_data = False
+
+    def filepath_from_user(self, image_user=None):
+        return self.filepath
+
+
+class Sound(ID):
+    filepath = ''
+    channels = 'MONO'
+
+
+class Speaker(ID):
+    sound = None
+    volume = 1.0
+    pitch = 1.0
+    distance_max = 100.0
+    distance_reference = 1.0
+    attenuation = 1.0
+
+
+class Material(ID):
+    use_nodes = True
+    node_tree = None
+
+
+class NodeTree(ID):
+    nodes = ()
+
+
+class Node(bpy_struct):
+    name = ''
+    type = ''
+
+
+class ShaderNodeTexImage(Node):
+    type = 'TEX_IMAGE'
+    image = None
+    image_user = None
+
+
+class ShaderNodeOutputMaterial(Node):
+    type = 'OUTPUT_MATERIAL'
+    inputs = {}
+
+
+class NodeSocket(bpy_struct):
+    node = None
+    id_data = None
+    # stand-in only: the image texture node linked to this socket, if any
+    linked_image_node = None
+
+
+class DepsgraphObjectInstance:
+    __slots__ = ('object', 'is_instance', 'instance_object')
+
+    def __init__(self, object, is_instance=False, instance_object=None):
+        self.object = object
+        self.is_instance = is_instance
+        self.instance_object = instance_object
+
+
+class Depsgraph(bpy_struct):
+    scene = None
+
+    @property
+    def object_instances(self):
+        """
+        the scene objects, then the objects of the collections they instance
+        """
+        for obj in self.scene.objects:
+            yield DepsgraphObjectInstance(object=obj)
+            if (obj.instance_type == 'COLLECTION') and (obj.instance_collection is not None):
+                for instanced in obj.instance_collection.all_objects:
+                    yield DepsgraphObjectInstance(object=instanced, is_instance=True, instance_object=obj)
@@ -0,0 +1,30 @@
+from .props import _PropertyDeferred
+
+_registered = set()
+
+
+def register_class(cls):
+    if cls in _registered:
+        raise ValueError(f'register_class(...): already registered as a subclass {cls.__name__!r}')
+    _registered.add(cls)
+
+
+def unregister_class(cls):
+    if cls not in _registered:
+        raise RuntimeError(f'unregister_class(...): missing bl_rna attribute from {cls.__name__!r}')
+    _registered.discard(cls)
+
+
+def is_registered(cls):
+    return cls in _registered
+
+
+def property_defaults(cls):
+    """
+    returns the default values of the properties annotated on a class
+    """
+    return {
+        name: p.default()
+        for name, p in getattr(cls, '__annotations__', {}).items()
+        if isinstance(p, _PropertyDeferred)
+    }
@@ -0,0 +1,3 @@
+"""
+Stand-in for the parts of Blender's glTF add-on (io_scene_gltf2) used by the MPEG add-on.
+"""
@@ -0,0 +1,102 @@
+"""
+Minimal version of io_scene_gltf2's GlTF2Exporter: traverses gathered glTF properties,
+replacing references with indices in the same way, so the MPEG hooks see the same objects.
+"""
+
+import json
+
+from io_scene_gltf2.io.com import gltf2_io, gltf2_io_extensions
+from io_scene_gltf2.io.exp import gltf2_io_binary_data
+
+
+def _append_unique_and_get_index(target, obj):
+    if obj in target:
+        return target.index(obj)
+    target.append(obj)
+    return len(target) - 1
+
+
+class GlTF2Exporter:
+
+    def __init__(self, export_settings):
+        self.export_settings = export_settings
+        self._buffer = bytearray()
+        self.glTF = gltf2_io.Gltf(
+            accessors=[], animations=[], asset=gltf2_io.Asset(generator="rt-xr-blender-exporter stand-in", version="2.0"),
+            buffers=[], buffer_views=[], cameras=[], extensions={}, extensions_required=[], extensions_used=[],
+            images=[], materials=[], meshes=[], nodes=[], samplers=[], scenes=[], skins=[], textures=[]
+        )
+        self._root_lists = {
+            gltf2_io.Accessor: self.glTF.accessors,
+            gltf2_io.BufferView: self.glTF.buffer_views,
+            gltf2_io.Buffer: self.glTF.buffers,
+            gltf2_io.Image: self.glTF.images,
+            gltf2_io.Material: self.glTF.materials,
+            gltf2_io.Node: self.glTF.nodes,
+            gltf2_io.Sampler: self.glTF.samplers,
+            gltf2_io.Scene: self.glTF.scenes,
+            gltf2_io.Texture: self.glTF.textures,
+        }
+
+    def add_scene(self, scene):
+        self.glTF.scene = self.traverse(scene)
+
+    def add_material(self, material):
+        return self.traverse(material)
+
+    def traverse(self, node):
+        if type(node) in self._root_lists:
+            self._traverse_property(node)
+            return _append_unique_and_get_index(self._root_lists[type(node)], node)
+        if isinstance(node, list):
+            for i in range(len(node)):
+                node[i] = self.traverse(node[i])
+            return node
+        if isinstance(node, dict):
+            for key in node.keys():
+                node[key] = self.traverse(node[key])
+            return node
+        if isinstance(node, gltf2_io.GltfProperty):
+            return self._traverse_property(node)
+        if isinstance(node, gltf2_io_binary_data.BinaryData):
+            return self.traverse(self._add_binary(node))
+        if isinstance(node, gltf2_io_extensions.Extension):
+            extension = self.traverse(node.extension)
+            _append_unique_and_get_index(self.glTF.extensions_used, node.name)
+            if node.required:
+                _append_unique_and_get_index(self.glTF.extensions_required, node.name)
+            if isinstance(node, gltf2_io_extensions.ChildOfRootExtension):
+                root_extension_list = self.glTF.extensions.setdefault(node.name, {})
+                for element in node.path:
+                    root_extension_list = root_extension_list.setdefault(element, [])
+                return _append_unique_and_get_index(root_extension_list, extension)
+            return extension
+        return node
+
+    def _traverse_property(self, node):
+        for name in node.fields:
+            setattr(node, name, self.traverse(getattr(node, name)))
+        return node
+
+    def _add_binary(self, binary_data):
+        self._buffer += b'\0' * (-len(self._buffer) % 4)
+        buffer_view = gltf2_io.BufferView(
+            buffer=0,  # hardcoded, as in io_scene_gltf2
+            byte_length=binary_data.byte_length,
+            byte_offset=len(self._buffer),
+            target=binary_data.bufferViewTarget
+        )
+        self._buffer += binary_data.data
+        return buffer_view
+
+    def finalize_buffer(self, output_path, buffer_name):
+        with open(output_path / buffer_name, 'wb') as f:
+            f.write(self._buffer)
+        self.glTF.buffers.append(gltf2_io.Buffer(byte_length=len(self._buffer), uri=buffer_name))
+
+    def traverse_extensions(self):
+        self.traverse(self.glTF.extensions)
+
+    def write(self, filepath):
+        with open(filepath, 'w') as f:
+            json.dump(gltf2_io.to_json(self.glTF), f, indent=2)
@@ -0,0 +1,29 @@
+"""
+Node tree search stand-in: sockets are linked to an image texture node through
+`NodeSocket.linked_image_node` instead of walking node links.
+"""
+
+from dataclasses import dataclass
+
+import bpy
+
+
+@dataclass
+class NodeNav:
+    shader_node: bpy.types.Node
+
+
+class FilterByType:
+
+    def __init__(self, type):
+        self.type = type
+
+    def __call__(self, node):
+        return isinstance(node, self.type)
+
+
+def from_socket(start_socket, shader_node_filter):
+    node = getattr(start_socket, 'linked_image_node', None)
+    if (node is None) or not shader_node_filter(node):
+        return []
+    return [NodeNav(node)]
@@ -0,0 +1,103 @@
+"""
+glTF properties, with the same constructor keywords as io_scene_gltf2's generated classes.
+"""
+
+
+def _camel(name):
+    head, *tail = name.split('_')
+    return head + ''.join(t.title() for t in tail)
+
+
+def to_json(value):
+    if isinstance(value, GltfProperty):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    return value
+
+
+class GltfProperty:
+    fields = ()
+
+    def __init__(self, **kwargs):
+        unknown = set(kwargs) - set(self.fields)
+        if unknown:
+            raise TypeError(f'{type(self).__name__}: unexpected arguments {unknown}')
+        for name in self.fields:
+            setattr(self, name, kwargs.get(name))
+
+    def to_dict(self):
+        result = {}
+        for name in self.fields:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if isinstance(value, (list, dict)) and not value and name != 'children':
+                continue
+            result[_camel(name)] = to_json(value)
+        return result
+
+    @classmethod
+    def from_dict(cls, obj):
+        # nested properties are kept as plain dicts, serialized as is
+        return cls(**{name: obj.get(_camel(name)) for name in cls.fields})
+
+
+class Accessor(GltfProperty):
+    fields = ('buffer_view', 'byte_offset', 'component_type', 'count', 'extensions', 'extras',
+              'max', 'min', 'name', 'normalized', 'sparse', 'type')
+
+
+class BufferView(GltfProperty):
+    fields = ('buffer', 'byte_length', 'byte_offset', 'byte_stride', 'extensions', 'extras', 'name', 'target')
+
+
+class Buffer(GltfProperty):
+    fields = ('byte_length', 'extensions', 'extras', 'name', 'uri')
+
+
+class Image(GltfProperty):
+    fields = ('buffer_view', 'extensions', 'extras', 'mime_type', 'name', 'uri')
+
+
+class Sampler(GltfProperty):
+    fields = ('extensions', 'extras', 'mag_filter', 'min_filter', 'name', 'wrap_s', 'wrap_t')
+
+
+class Texture(GltfProperty):
+    fields = ('extensions', 'extras', 'name', 'sampler', 'source')
+
+
+class TextureInfo(GltfProperty):
+    fields = ('extensions', 'extras', 'index', 'tex_coord')
+
+
+class MaterialPBRMetallicRoughness(GltfProperty):
+    fields = ('base_color_factor', 'base_color_texture', 'extensions', 'extras', 'metallic_factor',
+              'metallic_roughness_texture', 'roughness_factor')
+
+
+class Material(GltfProperty):
+    fields = ('alpha_cutoff', 'alpha_mode', 'double_sided', 'emissive_factor', 'emissive_texture',
+              'extensions', 'extras', 'name', 'normal_texture', 'occlusion_texture', 'pbr_metallic_roughness')
+
+
+class Node(GltfProperty):
+    fields = ('camera', 'children', 'extensions', 'extras', 'matrix', 'mesh', 'name', 'rotation',
+              'scale', 'skin', 'translation', 'weights')
+
+
+class Scene(GltfProperty):
+    fields = ('extensions', 'extras', 'name', 'nodes')
+
+
+class Asset(GltfProperty):
+    fields = ('copyright', 'extensions', 'extras', 'generator', 'min_version', 'version')
+
+
+class Gltf(GltfProperty):
+    fields = ('accessors', 'animations', 'asset', 'buffers', 'buffer_views', 'cameras', 'extensions',
+              'extensions_required', 'extensions_used', 'extras', 'images', 'materials', 'meshes',
+              'nodes', 'samplers', 'scene', 'scenes', 'skins', 'textures')
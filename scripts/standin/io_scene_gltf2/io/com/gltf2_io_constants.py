@@ -0,0 +1,46 @@
+from enum import IntEnum
+
+
+class ComponentType(IntEnum):
+    Byte = 5120
+    UnsignedByte = 5121
+    Short = 5122
+    UnsignedShort = 5123
+    UnsignedInt = 5125
+    Float = 5126
+
+    @classmethod
+    def get_size(cls, component_type):
+        return {
+            cls.Byte: 1,
+            cls.UnsignedByte: 1,
+            cls.Short: 2,
+            cls.UnsignedShort: 2,
+            cls.UnsignedInt: 4,
+            cls.Float: 4
+        }[component_type]
+
+
+class DataType:
+    Scalar = "SCALAR"
+    Vec2 = "VEC2"
+    Vec3 = "VEC3"
+    Vec4 = "VEC4"
+    Mat2 = "MAT2"
+    Mat3 = "MAT3"
+    Mat4 = "MAT4"
+
+    def __new__(cls, *args, **kwargs):
+        raise RuntimeError(f"{cls.__name__} should not be instantiated")
+
+    @classmethod
+    def num_elements(cls, data_type):
+        return {
+            cls.Scalar: 1,
+            cls.Vec2: 2,
+            cls.Vec3: 3,
+            cls.Vec4: 4,
+            cls.Mat2: 4,
+            cls.Mat3: 9,
+            cls.Mat4: 16
+        }[data_type]
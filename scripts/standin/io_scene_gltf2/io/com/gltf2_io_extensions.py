@@ -0,0 +1,19 @@
+class Extension:
+    """Container for extensions. Allows to specify requiredness"""
+    extension = {}  # the actual extension
+    name = ""       # the name of the extension
+    required = True
+
+    def __init__(self, name, extension, required=True):
+        self.name = name
+        self.extension = extension
+        self.required = required
+
+
+class ChildOfRootExtension(Extension):
+    """Container object for extensions that should be appended to the root extensions"""
+    path = []
+
+    def __init__(self, path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.path = path
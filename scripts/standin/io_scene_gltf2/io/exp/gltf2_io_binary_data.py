@@ -0,0 +1,12 @@
+class BinaryData:
+    """Store for gltf binary data that can later be stored in a buffer."""
+
+    def __init__(self, data: bytes, bufferViewTarget=None):
+        if not isinstance(data, bytes):
+            raise TypeError("Data is not a bytes array")
+        self.data = data
+        self.bufferViewTarget = bufferViewTarget
+
+    @property
+    def byte_length(self):
+        return len(self.data)
@@ -0,0 +1,6 @@
+class BinaryData:
+    """Reads accessor data of an imported glTF, only needed to import user extensions."""
+
+    @staticmethod
+    def get_data_from_accessor(gltf, accessor_idx, cache=False):
+        raise NotImplementedError("glTF import is not available in the stand-in runtime")
@@ -0,0 +1,6 @@
+"""
+Helpers to run the MPEG add-on's export pipeline on the stand-in runtime:
+
+    scene   builds stand-in blender data (speakers, movie textures, ...)
+    export  calls the add-on's hooks in the same order as io_scene_gltf2's exporter
+"""
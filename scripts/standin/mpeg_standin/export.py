@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from io_scene_gltf2.io.com import gltf2_io
+from io_scene_gltf2.blender.exp.gltf2_blender_gltf2_exporter import GlTF2Exporter
+
+
+def create_export_settings(filepath):
+    filepath = Path(filepath)
+    return {
+        'gltf_filepath': str(filepath),
+        'gltf_filedirectory': str(filepath.parent),
+        'gltf_texturedirectory': str(filepath.parent),
+        'gltf_binaryfilename': filepath.stem + '.bin',
+        'gltf_format': 'GLTF_SEPARATE',
+    }
+
+
+def _get_translation(obj):
+    # Blender Z-up to glTF Y-up, as io_scene_gltf2 with its default settings
+    x, y, z = (obj.matrix_world[i][3] for i in range(3))
+    return [x, z, -y] if (x, y, z) != (0.0, 0.0, 0.0) else None
+
+
+def _call_hook(extensions, name, *args):
+    for extension in extensions:
+        hook = getattr(extension, name, None)
+        if hook is not None:
+            hook(*args)
+
+
+def export(scene, materials, export_settings, user_extensions, pre_export_callbacks=(), post_export_callbacks=()):
+    """
+    exports the scene's objects and the given materials [(material, base color socket)],
+    calling the user extensions hooks and the export callbacks in the same order as io_scene_gltf2:
+    the .bin is written before the glTF extensions hook, the post export callbacks run before the .gltf
+    is written to export_settings['gltf_filepath']. returns the GlTF2Exporter.
+    """
+    for callback in pre_export_callbacks:
+        callback(export_settings)
+
+    exporter = GlTF2Exporter(export_settings)
+
+    for material, socket in materials:
+        base_color_texture = None
+        if socket.linked_image_node is not None:
+            texture = gltf2_io.Texture(name=socket.linked_image_node.image.name)
+            _call_hook(user_extensions, 'gather_texture_hook', texture, [socket], export_settings)
+            base_color_texture = gltf2_io.TextureInfo(index=texture, tex_coord=0)
+            _call_hook(user_extensions, 'gather_texture_info_hook', base_color_texture, [socket], export_settings)
+        exporter.add_material(gltf2_io.Material(
+            name=material.name,
+            pbr_metallic_roughness=gltf2_io.MaterialPBRMetallicRoughness(base_color_texture=base_color_texture)
+        ))
+
+    nodes = []
+    for obj in scene.objects:
+        node = gltf2_io.Node(name=obj.name, children=[], translation=_get_translation(obj))
+        _call_hook(user_extensions, 'gather_node_hook', node, obj, export_settings)
+        nodes.append(node)
+
+    exporter.add_scene(gltf2_io.Scene(name=scene.name, nodes=nodes))
+    output_dir = Path(export_settings['gltf_filedirectory'])
+    exporter.finalize_buffer(output_dir, export_settings['gltf_binaryfilename'])
+    _call_hook(user_extensions, 'gather_gltf_extensions_hook', exporter.glTF, export_settings)
+    exporter.traverse_extensions()
+
+    for callback in post_export_callbacks:
+        callback(export_settings)
+
+    exporter.write(export_settings['gltf_filepath'])
+    return exporter
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import bpy
+
+
+def create_scene(name='Scene', fps=30, frame_start=1, frame_end=250):
+    scene = bpy.types.Scene(
+        name=name,
+        frame_start=frame_start,
+        frame_end=frame_end,
+        frame_current=frame_start,
+        render=SimpleNamespace(fps=fps, fps_base=1.0, resolution_x=1920, resolution_y=1080, resolution_percentage=100),
+        audio_distance_model='INVERSE_CLAMPED',
+        objects=[],
+        collection=bpy.types.Collection(name='Scene Collection')
+    )
+    bpy.data.scenes.append(scene)
+    bpy.context.scene = scene
+    return scene
+
+
+def create_collection(scene, name):
+    """
+    creates a collection, child of the scene collection
+    """
+    collection = bpy.types.Collection(name=name)
+    scene.collection.children.append(collection)
+    return collection
+
+
+def _link(scene, obj, collection=None):
+    (collection or scene.collection).objects.append(obj)
+    scene.objects.append(obj)
+    bpy.data.objects.append(obj)
+    return obj
+
+
+def create_empty(scene, name, collection=None):
+    return _link(scene, bpy.types.Object(name=name, type='EMPTY'), collection)
+
+
+def create_collection_instance(scene, name, collection):
+    """
+    creates an empty instancing a collection, whose objects are then only part of the scene through it
+    """
+    return _link(scene, bpy.types.Object(name=name, type='EMPTY', instance_type='COLLECTION', instance_collection=collection))
+
+
+def create_speaker(scene, name, sound_filepath, collection=None, location=(0.0, 0.0, 0.0)):
+    sound = bpy.types.Sound(name=name, filepath=sound_filepath, channels='MONO')
+    bpy.data.sounds.append(sound)
+    speaker = bpy.types.Speaker(name=name, sound=sound)
+    return _link(scene, bpy.types.Object(
+        name=name, type='SPEAKER', data=speaker, matrix_world=_translation(location)), collection)
+
+
+def _translation(location):
+    x, y, z = location
+    return ((1.0, 0.0, 0.0, x), (0.0, 1.0, 0.0, y), (0.0, 0.0, 1.0, z), (0.0, 0.0, 0.0, 1.0))
+
+
+def create_camera(scene, name, location=(0.0, 0.0, 0.0), lens=50.0):
+    """
+    creates a camera looking down -Z
+    """
+    camera = bpy.types.Camera(name=name, lens=lens)
+    return _link(scene, bpy.types.Object(name=name, type='CAMERA', data=camera, matrix_world=_translation(location)))
+
+
+def create_mesh(scene, name, material, location=(0.0, 0.0, 0.0), size=1.0, collection=None):
+    """
+    creates a mesh object using a material, only its bounding box is modeled
+    """
+    h = size / 2.0
+    bound_box = tuple((x, y, z) for x in (-h, h) for y in (-h, h) for z in (-h, h))
+    return _link(scene, bpy.types.Object(
+        name=name, type='MESH', matrix_world=_translation(location), bound_box=bound_box,
+        material_slots=(SimpleNamespace(material=material),)), collection)
+
+
+def create_movie_image(name, filepath, size=(1920, 1080), fps=30):
+    image = bpy.types.Image(name=name, source='MOVIE', filepath=filepath, size=size, depth=24, fps=fps)
+    bpy.data.images.append(image)
+    return image
+
+
+def create_material(name, image=None):
+    """
+    returns a material and its base color socket, linked to an image texture node when image is set
+    """
+    tex_node = None
+    if image is not None:
+        tex_node = bpy.types.ShaderNodeTexImage(name='Image Texture', image=image, image_user=SimpleNamespace(
+            frame_start=1, frame_offset=0, frame_duration=0, use_cyclic=True))
+    node_tree = bpy.types.NodeTree(name=name)
+    material = bpy.types.Material(name=name, node_tree=node_tree)
+    socket = bpy.types.NodeSocket(name='Base Color', id_data=node_tree, linked_image_node=tex_node)
+    # the stand-in search doesn't follow links, the output's surface leads to the texture as through a shader
+    output = bpy.types.ShaderNodeOutputMaterial(name='Material Output', inputs={
+        'Surface': bpy.types.NodeSocket(name='Surface', id_data=node_tree, linked_image_node=tex_node)})
+    node_tree.nodes = [output, tex_node] if tex_node is not None else [output]
+    bpy.data.materials.append(material)
+    return material, socket
@@ -0,0 +1,32 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+"""
+The tests run outside Blender, on top of the stand-in `bpy` and `io_scene_gltf2` of scripts/standin.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / 'scripts' / 'standin'), str(ROOT / 'addons')]
+
+
+@pytest.fixture(scope='module')
+def registered():
+    """
+    registers the add-on, for the tests using its properties or running exports
+    """
+    import io_scene_gltf2_mpeg
+    io_scene_gltf2_mpeg.register()
+    yield io_scene_gltf2_mpeg
+    io_scene_gltf2_mpeg.unregister()
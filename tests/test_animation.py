@@ -0,0 +1,121 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import numpy as np
+import pytest
+
+from io_scene_gltf2_mpeg.exp.mpeg_animation import sample_fcurve, reduce_keyframes
+
+
+class Keyframe:
+
+    def __init__(self, co, interpolation, handle_left=None, handle_right=None):
+        self.co = co
+        self.interpolation = interpolation
+        self.handle_left = handle_left or co
+        self.handle_right = handle_right or co
+
+
+class Keyframes(list):
+
+    def foreach_get(self, attr, a):
+        a[:] = [v for k in self for v in getattr(k, attr)]
+
+
+class FCurve:
+    """
+    fcurve whose `evaluate` is only called when sampling falls back to blender
+    """
+
+    def __init__(self, keyframes, extrapolation='CONSTANT', modifiers=()):
+        self.keyframe_points = Keyframes(keyframes)
+        self.extrapolation = extrapolation
+        self.modifiers = list(modifiers)
+        self.evaluated = 0
+
+    def evaluate(self, frame):
+        self.evaluated += 1
+        return -1.0
+
+
+def test_sample_linear():
+    fcurve = FCurve([Keyframe((1.0, 0.0), 'LINEAR'), Keyframe((11.0, 1.0), 'LINEAR')])
+    values = sample_fcurve(fcurve, np.arange(0.0, 13.0))
+    # constant extrapolation before the first and after the last keyframe
+    assert values == pytest.approx([0.0, 0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.0])
+    assert fcurve.evaluated == 0
+
+
+def test_sample_constant():
+    fcurve = FCurve([Keyframe((1.0, 0.0), 'CONSTANT'), Keyframe((5.0, 1.0), 'LINEAR'), Keyframe((9.0, 3.0), 'LINEAR')])
+    values = sample_fcurve(fcurve, np.arange(0.0, 11.0))
+    assert values == pytest.approx([0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 1.5, 2.0, 2.5, 3.0, 3.0])
+
+
+def test_sample_bezier():
+    # handles at a third of the segment in x: x(t) is linear, y(t) is the exact curve at t = (frame - 1) / 9
+    p = (0.0, 3.0, -1.0, 2.0)
+    fcurve = FCurve([
+        Keyframe((1.0, p[0]), 'BEZIER', handle_right=(4.0, p[1])),
+        Keyframe((10.0, p[3]), 'BEZIER', handle_left=(7.0, p[2])),
+    ])
+    frames = np.linspace(1.0, 10.0, 37)
+    t = (frames - 1.0) / 9.0
+    expected = (1 - t) ** 3 * p[0] + 3 * (1 - t) ** 2 * t * p[1] + 3 * (1 - t) * t ** 2 * p[2] + t ** 3 * p[3]
+    assert sample_fcurve(fcurve, frames) == pytest.approx(expected, abs=0.02)
+
+
+def test_sample_single_keyframe():
+    fcurve = FCurve([Keyframe((4.0, 2.5), 'BEZIER')])
+    assert sample_fcurve(fcurve, np.arange(0.0, 3.0)) == pytest.approx([2.5, 2.5, 2.5])
+    assert sample_fcurve(FCurve([]), np.arange(0.0, 3.0)) is None
+
+
+@pytest.mark.parametrize('fcurve', [
+    FCurve([Keyframe((1.0, 0.0), 'SINE'), Keyframe((11.0, 1.0), 'LINEAR')]),
+    FCurve([Keyframe((1.0, 0.0), 'LINEAR'), Keyframe((11.0, 1.0), 'BOUNCE'), Keyframe((12.0, 1.0), 'LINEAR')]),
+    FCurve([Keyframe((1.0, 0.0), 'LINEAR'), Keyframe((11.0, 1.0), 'LINEAR')], extrapolation='LINEAR'),
+    FCurve([Keyframe((1.0, 0.0), 'LINEAR'), Keyframe((11.0, 1.0), 'LINEAR')], modifiers=['NOISE']),
+], ids=['easing', 'last segment easing', 'extrapolation', 'modifiers'])
+def test_sample_falls_back_to_blender(fcurve):
+    values = sample_fcurve(fcurve, np.arange(0.0, 4.0))
+    assert values == pytest.approx([-1.0] * 4)
+    assert fcurve.evaluated == 4
+
+
+def test_reduce_keeps_ends_of_lines():
+    values = np.array([0.0, 1.0, 2.0, 3.0, 2.0, 1.0, 1.0, 1.0])
+    assert reduce_keyframes(values, 0.01).tolist() == [0, 3, 5, 7]
+
+
+def test_reduce_within_tolerance():
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(size=500))
+    tolerance = 0.5
+    keep = reduce_keyframes(values, tolerance)
+    assert keep[0] == 0 and keep[-1] == len(values) - 1
+    assert len(keep) < len(values)
+    restored = np.interp(np.arange(len(values)), keep, values[keep])
+    assert np.abs(restored - values).max() <= tolerance
+
+
+def test_reduce_relative():
+    # a speed ramp from 0.5 to 4, the error allowed grows with the speed
+    values = np.geomspace(0.5, 4.0, 200)
+    tolerance = 0.01
+    keep = reduce_keyframes(values, tolerance, relative=True)
+    restored = np.interp(np.arange(len(values)), keep, values[keep])
+    assert (np.abs(restored - values) / values).max() <= tolerance
+    assert len(keep) < len(reduce_keyframes(values, tolerance * 0.5))
+
+
+def test_reduce_short():
+    assert reduce_keyframes(np.array([1.0, 2.0]), 0.1).tolist() == [0, 1]
+    assert reduce_keyframes(np.array([1.0, 1.0, 1.0]), 0.0).tolist() == [0, 2]
@@ -0,0 +1,107 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from types import SimpleNamespace
+
+import bpy
+import numpy as np
+import pytest
+
+from mpeg_standin import scene as standin_scene
+from io_scene_gltf2_mpeg.exp.mpeg_audio_clustering import AudioClusters, cluster_positions
+from io_scene_gltf2_mpeg.exp.mpeg_node_index import NodeIndex
+
+
+@pytest.fixture
+def scene(registered, tmp_path):
+    AudioClusters.reset()
+    NodeIndex.reset()
+    scene = standin_scene.create_scene()
+    scene.sound = str(tmp_path / 'sound.mp3')
+    yield scene
+    AudioClusters.reset()
+    NodeIndex.reset()
+
+
+def settings(cell_size=1.0, max_sources=100):
+    return SimpleNamespace(audio_cluster_size=cell_size, max_audio_sources=max_sources)
+
+
+def test_nearby_speakers_merged(scene, tmp_path):
+    for i, x in enumerate((0.1, 0.3, 0.5)):
+        standin_scene.create_speaker(scene, f'Speaker.{i}', scene.sound, location=(x, 0.2, 0.2))
+    standin_scene.create_speaker(scene, 'Far', scene.sound, location=(5.5, 0.2, 0.2))
+    standin_scene.create_speaker(scene, 'Other sound', str(tmp_path / 'other.mp3'), location=(0.4, 0.2, 0.2))
+    AudioClusters.capture(scene, settings())
+
+    # the speaker nearest to the cluster's center carries the merged source
+    assert AudioClusters.sizes == {'Speaker.0': 0, 'Speaker.1': 3, 'Speaker.2': 0, 'Far': 1, 'Other sound': 1}
+    merged = [o.name for o in scene.objects if AudioClusters.is_merged(o)]
+    assert merged == ['Speaker.0', 'Speaker.2']
+    # merged speakers play the same sound in sync, their amplitudes add up
+    assert AudioClusters.get_pregain(scene.objects[1]) == pytest.approx(20.0 * np.log10(3.0))
+    assert AudioClusters.get_pregain(scene.objects[3]) is None
+
+
+def test_different_settings_not_merged(scene):
+    a = standin_scene.create_speaker(scene, 'A', scene.sound, location=(0.1, 0.1, 0.1))
+    b = standin_scene.create_speaker(scene, 'B', scene.sound, location=(0.2, 0.1, 0.1))
+    b.data.volume = 0.5
+    animated = standin_scene.create_speaker(scene, 'Animated', scene.sound, location=(0.3, 0.1, 0.1))
+    animated.animation_data = SimpleNamespace(action=None)
+    AudioClusters.capture(scene, settings())
+    assert not any(AudioClusters.is_merged(o) for o in (a, b, animated))
+    assert AudioClusters.get_pregain(a) is None
+
+
+def test_cells_grow_to_max_sources(scene):
+    for i in range(8):
+        standin_scene.create_speaker(scene, f'Speaker.{i}', scene.sound, location=(i * 10.0 + 0.5, 0.5, 0.5))
+    AudioClusters.capture(scene, settings(max_sources=2))
+    sources = [n for n in AudioClusters.sizes.values() if n > 0]
+    assert len(sources) <= 2
+    assert sum(sources) == 8
+
+
+def test_instanced_speakers(scene):
+    # speakers only part of the scene through a collection instance are exported, and clustered
+    collection = bpy.types.Collection(name='Instanced')
+    for i in range(2):
+        speaker = standin_scene.create_speaker(scene, f'Speaker.{i}', scene.sound, location=(0.1 * i, 0.1, 0.1))
+        scene.objects.remove(speaker)
+        collection.objects.append(speaker)
+    standin_scene.create_collection_instance(scene, 'Instance', collection)
+    NodeIndex.capture(scene)
+    AudioClusters.capture(scene, settings())
+    assert sorted(AudioClusters.sizes.values()) == [0, 2]
+
+
+def test_nested_instances(scene):
+    # a collection instanced twice, itself instancing another collection, is indexed once
+    inner = bpy.types.Collection(name='Inner')
+    speaker = standin_scene.create_speaker(scene, 'Speaker', scene.sound)
+    scene.objects.remove(speaker)
+    inner.objects.append(speaker)
+    outer = bpy.types.Collection(name='Outer')
+    instancer = standin_scene.create_collection_instance(scene, 'Inner.Instance', inner)
+    scene.objects.remove(instancer)
+    outer.objects.append(instancer)
+    for i in range(2):
+        standin_scene.create_collection_instance(scene, f'Outer.{i}', outer)
+    NodeIndex.capture(scene)
+    assert list(NodeIndex.speakers) == ['Speaker']
+
+
+def test_cluster_positions():
+    positions = np.array([[0.1, 0.1, 0.1], [0.9, 0.9, 0.9], [1.1, 0.1, 0.1], [-0.1, 0.1, 0.1]])
+    labels = cluster_positions(positions, 1.0)
+    assert labels[0] == labels[1]
+    assert len(set(labels.tolist())) == 3
+    assert len(cluster_positions(np.zeros((0, 3)), 1.0)) == 0
@@ -0,0 +1,117 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import base64
+import json
+
+import pytest
+
+from io_scene_gltf2_mpeg.com.gltf_split import SUB_SCENES, finalize, load_buffers, split, write
+
+# 3 buffer views of 8 bytes: mesh positions, audio source, animation
+DATA = bytes(range(24))
+
+
+@pytest.fixture
+def gltf():
+    return {
+        "asset": {"version": "2.0"},
+        "scene": 0,
+        "scenes": [{"nodes": [0, 1, 3]}],
+        "nodes": [
+            {"name": "mesh", "mesh": 0},
+            {"name": "group", "children": [2]},
+            {"name": "speaker", "extensions": {"MPEG_audio_spatial": {"sources": [{"id": 0, "accessors": [1]}]}}},
+            {"name": "anchored", "extensions": {"MPEG_anchor": {"anchor": 0}}},
+        ],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "material": 0}]}],
+        "materials": [{"pbrMetallicRoughness": {"baseColorTexture": {"index": 0}}}],
+        "textures": [{"extensions": {"MPEG_texture_video": {"accessor": 3, "width": 16, "height": 16}}}],
+        "accessors": [
+            {"bufferView": 0, "count": 2},
+            {"bufferView": 1, "count": 2},
+            {"bufferView": 2, "count": 2},
+            {"count": 1, "extensions": {"MPEG_accessor_timed": {"bufferView": 3}}},
+        ],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": 8},
+            {"buffer": 0, "byteOffset": 8, "byteLength": 8},
+            {"buffer": 0, "byteOffset": 16, "byteLength": 8},
+            {"buffer": 1, "byteLength": 1024},
+        ],
+        "buffers": [
+            {"byteLength": 24, "uri": "data:application/octet-stream;base64," + base64.b64encode(DATA).decode()},
+            {"byteLength": 1024, "extensions": {"MPEG_buffer_circular": {"media": 1}}},
+        ],
+        "animations": [{
+            "channels": [{"sampler": 0, "target": {"node": 2, "path": "translation"}}],
+            "samplers": [{"input": 2, "output": 2}],
+        }],
+        "extensions": {
+            "MPEG_media": {"media": [{"name": "unused"}, {"name": "video"}]},
+            "MPEG_anchor": {"trackables": [{"type": 0}], "anchors": [{"trackable": 0, "requiresAnchoring": True}]},
+        },
+        "extensionsUsed": ["MPEG_media", "MPEG_anchor", "MPEG_audio_spatial", "MPEG_texture_video",
+                           "MPEG_accessor_timed", "MPEG_buffer_circular"],
+    }
+
+
+def test_split(gltf):
+    base, speakers, meshes = split(gltf, load_buffers(gltf, '.'), {"speakers": [1], "meshes": [0, 3]})
+
+    # the anchored root stays in the base document
+    assert [n["name"] for n in base.gltf["nodes"]] == ["anchored"]
+    assert base.gltf["scenes"][0]["nodes"] == [0]
+    assert "MPEG_media" not in base.gltf["extensions"]
+    assert base.data is None
+
+    assert [n["name"] for n in speakers.gltf["nodes"]] == ["group", "speaker"]
+    assert speakers.gltf["nodes"][0]["children"] == [1]
+    assert speakers.gltf["nodes"][1]["extensions"]["MPEG_audio_spatial"]["sources"][0]["accessors"] == [0]
+    # the source's data is copied first, then the animation's
+    assert bytes(speakers.data) == DATA[8:24]
+    assert speakers.gltf["animations"][0]["channels"][0]["target"]["node"] == 1
+    assert speakers.gltf["animations"][0]["samplers"][0] == {"input": 1, "output": 1}
+
+    assert [n["name"] for n in meshes.gltf["nodes"]] == ["mesh"]
+    assert bytes(meshes.data) == DATA[0:8]
+    assert "animations" not in meshes.gltf
+    # the video texture's circular buffer only brings its own media
+    assert meshes.gltf["extensions"]["MPEG_media"]["media"] == [{"name": "video"}]
+    timed = meshes.gltf["accessors"][1]["extensions"]["MPEG_accessor_timed"]
+    circular = meshes.gltf["buffers"][meshes.gltf["bufferViews"][timed["bufferView"]]["buffer"]]
+    assert circular["extensions"]["MPEG_buffer_circular"]["media"] == 0
+
+
+def test_write(gltf, tmp_path):
+    documents = finalize(split(gltf, load_buffers(gltf, '.'), {"speakers": [1], "meshes": [0]}), tmp_path / 'scene.gltf')
+    write(documents, tmp_path)
+    assert [d.uri for d in documents] == ['scene.gltf', 'scene.speakers.gltf', 'scene.meshes.gltf']
+
+    base = json.loads((tmp_path / 'scene.gltf').read_text())
+    assert base["extras"][SUB_SCENES] == [
+        {"name": "speakers", "uri": "scene.speakers.gltf", "media": 0, "byteLength": 16},
+        {"name": "meshes", "uri": "scene.meshes.gltf", "media": 1, "byteLength": 8},
+    ]
+    meshes = json.loads((tmp_path / 'scene.meshes.gltf').read_text())
+    assert meshes["buffers"][0] == {"byteLength": 8, "uri": "scene.meshes.bin"}
+    assert (tmp_path / 'scene.meshes.bin').read_bytes() == DATA[0:8]
+    assert meshes["extensionsUsed"] == ["MPEG_accessor_timed", "MPEG_buffer_circular", "MPEG_media", "MPEG_texture_video"]
+    # the base document has no binary data left
+    assert not (tmp_path / 'scene.bin').exists()
+    assert "buffers" not in base
+
+
+def test_load_buffers(tmp_path):
+    (tmp_path / 'scene.bin').write_bytes(DATA)
+    read = load_buffers({"buffers": [{"uri": "scene.bin"}, {"byteLength": 4}]}, tmp_path)
+    assert read(0) == DATA
+    with pytest.raises(ValueError):
+        read(1)
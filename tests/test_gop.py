@@ -0,0 +1,121 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import struct
+
+import pytest
+
+from io_scene_gltf2_mpeg.com.mpeg_gop import Mp4Error, analyze_gops, read_tracks
+
+
+def box(box_type, payload):
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type, version, flags, payload):
+    return box(box_type, bytes([version]) + flags.to_bytes(3, 'big') + payload)
+
+
+def trak(track_id, handler, timescale, stts, stss=None, elst=None):
+    tkhd = full_box(b'tkhd', 0, 3, struct.pack('>III', 0, 0, track_id) + bytes(68))
+    mdhd = full_box(b'mdhd', 0, 0, struct.pack('>IIII', 0, 0, timescale, 0) + bytes(4))
+    hdlr = full_box(b'hdlr', 0, 0, struct.pack('>I4s', 0, handler) + bytes(13))
+    tables = full_box(b'stts', 0, 0, struct.pack('>I', len(stts)) + b''.join(struct.pack('>II', *e) for e in stts))
+    if stss is not None:
+        tables += full_box(b'stss', 0, 0, struct.pack(f'>I{len(stss)}I', len(stss), *stss))
+    edts = b''
+    if elst is not None:
+        entries = b''.join(struct.pack('>Iihh', duration, media_time, 1, 0) for duration, media_time in elst)
+        edts = box(b'edts', full_box(b'elst', 0, 0, struct.pack('>I', len(elst)) + entries))
+    return box(b'trak', tkhd + edts + box(b'mdia', mdhd + hdlr + box(b'minf', box(b'stbl', tables))))
+
+
+@pytest.fixture
+def progressive(tmp_path):
+    """
+    300 frames at 30 fps with a keyframe every 120 frames, presented from frame 45, and an audio track
+    """
+    video = trak(1, b'vide', 15360, [(300, 512)], stss=[1, 121, 241], elst=[(0xffffffff, -1), (10000, 45 * 512)])
+    audio = trak(2, b'soun', 48000, [(469, 1024)])
+    path = tmp_path / 'progressive.mp4'
+    path.write_bytes(box(b'ftyp', b'isom' + bytes(4)) + box(b'mdat', bytes(1000)) + box(b'moov', video + audio))
+    return path
+
+
+@pytest.fixture
+def fragmented(tmp_path):
+    """
+    3 fragments of 60 frames at 30 fps, only the first sample of each fragment is a sync sample
+    """
+    video = trak(1, b'vide', 30, [])
+    mvex = box(b'mvex', full_box(b'trex', 0, 0, struct.pack('>5I', 1, 1, 1, 0, 0x10000)))
+    fragments = b''
+    for i in range(3):
+        tfhd = full_box(b'tfhd', 0, 0x20000, struct.pack('>I', 1))
+        # data offset and first sample flags
+        trun = full_box(b'trun', 0, 0x005, struct.pack('>IiI', 60, 0, 0))
+        moof = box(b'moof', full_box(b'mfhd', 0, 0, struct.pack('>I', i + 1)) + box(b'traf', tfhd + trun))
+        fragments += moof + box(b'mdat', bytes(10))
+    path = tmp_path / 'fragmented.mp4'
+    path.write_bytes(box(b'ftyp', b'iso6' + bytes(4)) + box(b'moov', video + mvex) + fragments)
+    return path
+
+
+def test_read_tracks(progressive):
+    tracks = {t.kind: t for t in read_tracks(progressive)}
+    assert tracks['video'].track_id == 1
+    assert tracks['video'].sync_samples == [0, 120, 240]
+    assert tracks['video'].media_start == 45 * 512
+    assert len(tracks['audio'].durations) == 469
+    assert tracks['audio'].sync_samples is None
+
+
+def test_keyframe_intervals(progressive):
+    report = analyze_gops(progressive)
+    assert (report.frames, report.keyframes) == (300, 3)
+    assert report.duration == pytest.approx(10.0)
+    assert report.max_keyframe_interval == pytest.approx(4.0)
+    assert report.mean_keyframe_interval == pytest.approx(10.0 / 3.0)
+
+
+@pytest.mark.parametrize('loop_start, frames', [(0.0, 45), (2.0, 105), (2.5, 0), (4.0, 45)])
+def test_loop_cost(progressive, loop_start, frames):
+    # the edit list starts the presentation at frame 45
+    report = analyze_gops(progressive, loop_start)
+    assert report.loop_frames == frames
+    assert report.loop_seconds == pytest.approx(frames / 30.0)
+
+
+def test_audio_track(progressive):
+    report = analyze_gops(progressive, kind='audio')
+    assert report.keyframes == report.frames == 469
+    assert report.loop_frames == 0
+
+
+def test_fragments(fragmented):
+    report = analyze_gops(fragmented, 3.0)
+    assert (report.frames, report.keyframes) == (180, 3)
+    assert report.max_keyframe_interval == pytest.approx(2.0)
+    assert report.loop_frames == 30
+
+
+def test_no_track(fragmented):
+    assert analyze_gops(fragmented, kind='audio') is None
+
+
+def test_invalid_files(tmp_path):
+    not_mp4 = tmp_path / 'empty.mp4'
+    not_mp4.write_bytes(box(b'ftyp', b'isom' + bytes(4)))
+    with pytest.raises(Mp4Error):
+        read_tracks(not_mp4)
+    truncated = tmp_path / 'truncated.mp4'
+    truncated.write_bytes(struct.pack('>I4s', 100, b'moov') + bytes(10))
+    with pytest.raises(Mp4Error):
+        read_tracks(truncated)
@@ -0,0 +1,45 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import json
+
+from mpeg_standin import scene as standin_scene
+from mpeg_standin.export import create_export_settings, export
+from io_scene_gltf2_mpeg.exp.mpeg_manifest import hash_json
+
+
+def export_scene(addon, scene, filepath):
+    # callbacks and hooks in io_scene_gltf2's order, the .gltf is written after the post export callbacks
+    export(scene, [], create_export_settings(filepath), [addon.glTF2ExportUserExtension()],
+           pre_export_callbacks=[addon.glTF2_pre_export_callback],
+           post_export_callbacks=[addon.glTF2_post_export_callback])
+    return json.loads(filepath.with_name('scene.manifest.json').read_text(encoding='utf-8'))
+
+
+def test_manifest_on_export(registered, tmp_path):
+    scene = standin_scene.create_scene()
+    scene.MPEG_ExporterProperties.write_manifest = True
+    standin_scene.create_empty(scene, 'Empty')
+    filepath = tmp_path / 'scene.gltf'
+
+    manifest = export_scene(registered, scene, filepath)
+    assert manifest["changed"] == sorted(manifest["files"])
+    assert 'scene.gltf' in manifest["files"]
+    # the manifest is written before the .gltf, from the gathered glTF
+    gltf = json.loads(filepath.read_text(encoding='utf-8'))
+    assert manifest["files"]["scene.gltf"] == {'content_sha256': hash_json(gltf)}
+
+    manifest = export_scene(registered, scene, filepath)
+    assert manifest["changed"] == []
+    assert manifest["removed"] == []
+
+    standin_scene.create_empty(scene, 'Empty.1')
+    manifest = export_scene(registered, scene, filepath)
+    assert 'scene.gltf' in manifest["changed"]
@@ -0,0 +1,64 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from io_scene_gltf2_mpeg.exp import mpeg_media
+from io_scene_gltf2_mpeg.exp.mpeg_media_export import MediaExport, MediaJob
+
+
+@pytest.mark.parametrize("terminated", (True, False), ids=['tool terminated', 'tool ending'])
+def test_cancel_removes_partial_outputs(monkeypatch, tmp_path, terminated):
+    started = threading.Event()
+    release = threading.Event()
+
+    def run_tool(cmd):
+        # an encoder writing its output and segments until the export is cancelled
+        output = Path(cmd[-1])
+        output.write_bytes(b'partial')
+        output.with_name('clip-000.m4s').write_bytes(b'segment')
+        started.set()
+        release.wait(5.0)
+        if terminated:
+            raise subprocess.CalledProcessError(-15, cmd)
+
+    monkeypatch.setattr(mpeg_media, 'run_tool', run_tool)
+    src = tmp_path / 'src' / 'clip.mp4'
+    src.parent.mkdir()
+    src.write_bytes(b'movie')
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+
+    def build(output_path):
+        mpeg_media.trim_media('ffmpeg', src, 1.0, 2.0, output_path)
+
+    jobs = [
+        MediaJob('clip.mp4', output_dir / 'clip.mp4', build=build, outputs=('clip-*',)),
+        # not started, a single worker is busy with the first job
+        MediaJob('copy.mp4', output_dir / 'copy.mp4', size=5, src=src),
+    ]
+    export = MediaExport(jobs, workers=1).start()
+    assert started.wait(5.0)
+    export.cancel()
+    release.set()
+    deadline = time.monotonic() + 5.0
+    while not export.done():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    export.cleanup()
+
+    assert list(output_dir.iterdir()) == []
+    assert not any(job.done for job in jobs)
+    assert export.errors == []
@@ -0,0 +1,106 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import pytest
+
+from io_scene_gltf2.io.com import gltf2_io
+from io_scene_gltf2.io.com.gltf2_io_constants import ComponentType, DataType
+from io_scene_gltf2_mpeg.com.MPEG_media import Media, MediaAlternative
+from io_scene_gltf2_mpeg.exp.mpeg_media import MediaFrame
+
+# ISO/IEC 23090-14 timed accessor header: a float and 5 uint32 fields, besides the max and min values
+HEADER_FIXED_SIZE = 4 + 5 * 4
+
+
+def accessor(component_type, type=DataType.Scalar, count=10):
+    return gltf2_io.Accessor(component_type=component_type, type=type, count=count)
+
+
+def media_frame():
+    return MediaFrame(Media(alternatives=[MediaAlternative('audio/mpeg', 'sound.mp3')]))
+
+
+def header(frame, i=0):
+    return frame.accessors[i][0].extensions["MPEG_accessor_timed"].extension["bufferView"]
+
+
+@pytest.mark.parametrize("type", (DataType.Scalar, DataType.Vec2, DataType.Vec3, DataType.Vec4, DataType.Mat4))
+@pytest.mark.parametrize("component_type", list(ComponentType))
+def test_header_size(component_type, type):
+    frame = media_frame()
+    frame.add_buffer_view([accessor(component_type, type)], 30.0, use_headers=True)
+    n = DataType.num_elements(type)
+    assert header(frame).byte_length == HEADER_FIXED_SIZE + 2 * n * ComponentType.get_size(component_type)
+
+
+def test_headers_aligned():
+    frame = media_frame()
+    # 24 + 2 bytes, the next header starts on 4 bytes
+    frame.add_buffer_view([accessor(ComponentType.UnsignedByte)], 30.0, use_headers=True)
+    frame.add_buffer_view([accessor(ComponentType.Float)], 30.0, use_headers=True)
+    assert header(frame, 0).byte_offset is None
+    assert header(frame, 1).byte_offset == 28
+    frame.finalize()
+    # the buffer views follow the headers
+    assert frame.buffer_views[0].byte_offset == 28 + 32
+
+
+def test_scalars_tightly_packed():
+    frame = media_frame()
+    frame.add_buffer_view([accessor(ComponentType.Short, count=3)], 30.0)
+    frame.add_buffer_view([accessor(ComponentType.Float, count=3)], 30.0)
+    assert frame.buffer_views[0].byte_length == 6
+    assert frame.buffer_views[0].byte_stride is None
+    frame.finalize()
+    # the 4 bytes alignment of the float view
+    assert [v.byte_offset for v in frame.buffer_views] == [0, 8]
+    assert frame.buffer.byte_length == 20
+
+
+def test_vectors_aligned():
+    frame = media_frame()
+    frame.add_buffer_view([accessor(ComponentType.UnsignedByte, DataType.Vec3, count=5)], 30.0)
+    assert frame.buffer_views[0].byte_length == 5 * 4
+
+
+def test_interleaved():
+    frame = media_frame()
+    accessors = [
+        accessor(ComponentType.UnsignedByte, count=4),
+        accessor(ComponentType.Float, DataType.Vec3, count=4),
+        accessor(ComponentType.Short, count=4),
+    ]
+    frame.add_buffer_view(accessors, 30.0, interleave=True)
+    # each component aligned to its size, the stride to 4 bytes
+    assert [a.byte_offset for a in accessors] == [0, 4, 16]
+    assert frame.buffer_views[0].byte_stride == 20
+    assert frame.buffer_views[0].byte_length == 4 * 20
+
+
+def test_interleave_single_accessor():
+    with pytest.raises(Exception):
+        media_frame().add_buffer_view([accessor(ComponentType.Float)], 30.0, interleave=True)
+
+
+def test_resize_buffer_view():
+    frame = media_frame()
+    frame.add_buffer_view([accessor(ComponentType.Short, count=3)], 30.0)
+    interleaved = [accessor(ComponentType.Float, count=3), accessor(ComponentType.Short, count=3)]
+    frame.add_buffer_view(interleaved, 30.0, interleave=True)
+    frame.resize_buffer_view(0, 5)
+    frame.resize_buffer_view(1, 7)
+    assert frame.accessors[0][0].count == 5
+    assert [a.count for a in interleaved] == [7, 7]
+    assert frame.buffer_views[0].byte_length == 10
+    # the stride is kept
+    assert frame.buffer_views[1].byte_length == 7 * 8
+    frame.finalize()
+    assert [v.byte_offset for v in frame.buffer_views] == [0, 12]
+    assert frame.buffer.byte_length == 12 + 56
@@ -0,0 +1,50 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import os
+
+from io_scene_gltf2_mpeg.exp.mpeg_media_store import NAME_DIGEST_LENGTH, MediaStore
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_source_name(tmp_path):
+    a = write(tmp_path / 'a' / 'clip.MP4', b'movie')
+    name = MediaStore.source_name(a)
+    assert len(name) == NAME_DIGEST_LENGTH + len('.mp4') and name.endswith('.mp4')
+    # named after the content only
+    assert MediaStore.source_name(write(tmp_path / 'b' / 'other.mp4', b'movie')) == name
+    assert MediaStore.source_name(write(tmp_path / 'c' / 'clip.mp4', b'edited')) != name
+
+
+def test_source_name_after_edit(tmp_path):
+    path = write(tmp_path / 'clip.mp4', b'movie')
+    name = MediaStore.source_name(path)
+    write(path, b'edited')
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert MediaStore.source_name(path) != name
+
+
+def test_derived_name(tmp_path):
+    a = write(tmp_path / 'a' / 'clip.mp4', b'movie')
+    name = MediaStore.derived_name(a, 'clip.0.000-2.000.mp4', None)
+    assert name == MediaStore.derived_name(a, 'clip.0.000-2.000.mp4', None)
+    # a renamed copy of the source builds the same media
+    renamed = write(tmp_path / 'b' / 'renamed.mp4', b'movie')
+    assert MediaStore.derived_name(renamed, 'renamed.0.000-2.000.mp4', None) == name
+    # built differently
+    assert MediaStore.derived_name(a, 'clip.0.000-3.000.mp4', None) != name
+    assert MediaStore.derived_name(a, 'clip.0.000-2.000.mp4', 2.0) != name
+    assert MediaStore.derived_name(write(tmp_path / 'c' / 'clip.mp4', b'edited'), 'clip.0.000-2.000.mp4', None) != name
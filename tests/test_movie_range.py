@@ -0,0 +1,63 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from types import SimpleNamespace
+
+import pytest
+
+from io_scene_gltf2_mpeg.exp.mpeg_media import get_movie_range
+
+
+def settings(fps=25.0, frame_start=1, frame_end=250):
+    return SimpleNamespace(fps=fps, frame_start=frame_start, frame_end=frame_end)
+
+
+def image_user(frame_start=1, frame_offset=0, frame_duration=0, use_cyclic=False):
+    return SimpleNamespace(frame_start=frame_start, frame_offset=frame_offset, frame_duration=frame_duration,
+                           use_cyclic=use_cyclic)
+
+
+def test_whole_movie():
+    assert get_movie_range(image_user(), settings(), 25.0) == (0.0, 0.0, None, False)
+
+
+def test_trim():
+    # 100 frames from the 50th, at the scene framerate
+    assert get_movie_range(image_user(frame_offset=50, frame_duration=100), settings(), 25.0) == (0.0, 2.0, 6.0, False)
+
+
+def test_trim_held_at_scene_end():
+    # the scene ends 50 frames after the movie starts
+    used = get_movie_range(image_user(frame_start=201, frame_duration=100), settings(), 25.0)
+    assert used == (8.0, 0.0, 2.0, False)
+
+
+def test_started_before_scene():
+    # 25 movie frames are played when the scene starts
+    used = get_movie_range(image_user(frame_start=-24, frame_offset=25, frame_duration=100), settings(), 25.0)
+    assert used == (0.0, 2.0, 5.0, False)
+
+
+def test_loop():
+    used = get_movie_range(image_user(frame_start=51, frame_offset=25, frame_duration=50, use_cyclic=True), settings(), 25.0)
+    assert used == (2.0, 1.0, 3.0, True)
+
+
+@pytest.mark.parametrize("cyclic", (False, True))
+def test_fps_mismatch(cyclic):
+    # the start frame is in scene frames (25 fps), the offset and duration in movie frames (50 fps)
+    used = get_movie_range(image_user(frame_start=51, frame_offset=100, frame_duration=100, use_cyclic=cyclic),
+                           settings(fps=25.0), 50.0)
+    assert used == (2.0, 2.0, 4.0, cyclic)
+
+
+def test_movie_fps_unknown():
+    # the scene framerate is used
+    assert get_movie_range(image_user(frame_offset=50), settings(), 0) == (0.0, 2.0, None, False)
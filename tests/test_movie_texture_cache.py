@@ -0,0 +1,25 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from mpeg_standin import scene as standin_scene
+from io_scene_gltf2_mpeg.blender.utils import MovieTextureCache, get_movie_tex_from_socket
+
+
+def test_cache_hits():
+    MovieTextureCache.reset()
+    _, movie_socket = standin_scene.create_material('Movie', standin_scene.create_movie_image('movie', 'movie.mp4'))
+    _, plain_socket = standin_scene.create_material('Plain')
+    # the texture and texture info hooks search the same socket
+    for _ in range(2):
+        assert get_movie_tex_from_socket(movie_socket, {}).shader_node.image.name == 'movie'
+        assert get_movie_tex_from_socket(plain_socket, {}) is None
+    assert (MovieTextureCache.misses, MovieTextureCache.hits) == (2, 2)
+    assert MovieTextureCache.hit_rate() == 0.5
+    MovieTextureCache.reset()
@@ -0,0 +1,101 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from fnmatch import fnmatch
+from pathlib import Path
+
+import pytest
+
+from io_scene_gltf2_mpeg.exp import mpeg_packaging
+from io_scene_gltf2_mpeg.exp.mpeg_packaging import (
+    DASH_MIME_TYPE, HLS_MIME_TYPE, get_segmented_alternatives, rfc6381_codecs)
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    """
+    the commands run by the packaging builds, ffprobe and ffmpeg aren't run
+    """
+    commands = []
+    monkeypatch.setattr(mpeg_packaging, 'probe_codecs', lambda encoder, filepath, kind: 'avc1.64001f')
+    monkeypatch.setattr(mpeg_packaging, 'run_tool', commands.append)
+    return commands
+
+
+def option(cmd, name):
+    return cmd[cmd.index(name) + 1]
+
+
+def segment_names(cmd):
+    """
+    the init and media segment names of a DASH or HLS command, as written in the output directory
+    """
+    if 'dash' in cmd:
+        return [option(cmd, '-init_seg_name'), option(cmd, '-media_seg_name')]
+    return [option(cmd, '-hls_fmp4_init_filename'), Path(option(cmd, '-hls_segment_filename')).name]
+
+
+def test_alternatives(commands, tmp_path):
+    alternatives = get_segmented_alternatives('ffmpeg', 'DASH_HLS', Path('clip.mp4'), 'clip.mp4.video', 'video')
+    assert [(a.mime_type, a.uri) for a, _, _ in alternatives] == [
+        (DASH_MIME_TYPE, 'clip.mp4.video.mpd'), (HLS_MIME_TYPE, 'clip.mp4.video.m3u8')]
+    assert [a.tracks[0].codecs for a, _, _ in alternatives] == ['avc1.64001f'] * 2
+
+    for alternative, build, patterns in alternatives:
+        build(tmp_path / alternative.uri)
+        # the cleanup patterns match the segments the build writes
+        for name in segment_names(commands[-1]):
+            assert any(fnmatch(name, p) for p in patterns)
+    assert [option(cmd, '-f') for cmd in commands] == ['dash', 'hls']
+    assert commands[0][-1] == str(tmp_path / 'clip.mp4.video.mpd')
+    assert option(commands[1], '-hls_segment_filename') == str(tmp_path / 'clip.mp4.video-hls-%05d.m4s')
+
+
+def test_media_of_a_file_dont_collide(commands, tmp_path):
+    # the audio and video media of a file, and a file sharing its stem
+    packaged = {}
+    for filepath, kind in (('clip.mp4', 'video'), ('clip.mp4', 'audio'), ('clip.mov', 'video')):
+        name = f'{filepath}.{kind}'
+        for alternative, build, patterns in get_segmented_alternatives('ffmpeg', 'DASH_HLS', Path(filepath), name, kind):
+            build(tmp_path / alternative.uri)
+            packaged[alternative.uri] = (segment_names(commands[-1]), patterns)
+    assert len(packaged) == 6
+
+    for uri, (names, _) in packaged.items():
+        for other, (_, patterns) in packaged.items():
+            # the cleanup of a manifest's segments never removes the files of another one
+            if other != uri:
+                assert not any(fnmatch(n, p) for n in names + [uri] for p in patterns)
+
+
+def test_no_codecs(monkeypatch):
+    monkeypatch.setattr(mpeg_packaging, 'probe_codecs', lambda encoder, filepath, kind: None)
+    alternatives = get_segmented_alternatives('ffmpeg', 'HLS', Path('clip.mp4'), 'clip.mp4.audio', 'audio')
+    assert [(a.uri, a.tracks) for a, _, _ in alternatives] == [('clip.mp4.audio.m3u8', None)]
+
+
+def test_trimmed_input(commands, tmp_path):
+    alternatives = get_segmented_alternatives('ffmpeg', 'DASH', Path('clip.mp4'), 'clip.mp4.audio', 'audio', 1.5, 4.0)
+    alternatives[0][1](tmp_path / 'clip.mp4.audio.mpd')
+    cmd = commands[0]
+    assert (option(cmd, '-ss'), option(cmd, '-t'), option(cmd, '-map'), option(cmd, '-c')) == \
+        ('1.500000', '4.000000', '0:a:0', 'copy')
+
+
+@pytest.mark.parametrize('stream, codecs', [
+    ({'codec_name': 'h264', 'profile': 'High', 'level': 31}, 'avc1.64001f'),
+    ({'codec_name': 'h264', 'profile': 'Constrained Baseline', 'level': 30}, 'avc1.42401e'),
+    ({'codec_name': 'h264', 'profile': 'High'}, None),
+    ({'codec_name': 'aac', 'profile': 'HE-AAC'}, 'mp4a.40.5'),
+    ({'codec_name': 'mp3'}, 'mp4a.40.34'),
+    ({'codec_name': 'prores'}, None),
+])
+def test_rfc6381_codecs(stream, codecs):
+    assert rfc6381_codecs(stream) == codecs
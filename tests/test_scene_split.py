@@ -0,0 +1,50 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import json
+
+from mpeg_standin import scene as standin_scene
+from mpeg_standin.export import create_export_settings, export
+
+
+def export_scene(addon, scene, filepath):
+    # callbacks and hooks in io_scene_gltf2's order, the .gltf is written after the post export callbacks
+    export(scene, [], create_export_settings(filepath), [addon.glTF2ExportUserExtension()],
+           pre_export_callbacks=[addon.glTF2_pre_export_callback],
+           post_export_callbacks=[addon.glTF2_post_export_callback])
+    return json.loads(filepath.read_text(encoding='utf-8'))
+
+
+def node_names(gltf):
+    return sorted(n["name"] for n in gltf.get("nodes", []))
+
+
+def test_split_on_export(registered, tmp_path):
+    scene = standin_scene.create_scene()
+    scene.MPEG_ExporterProperties.split_collections = True
+    standin_scene.create_empty(scene, 'Base')
+    for name in ('Props', 'Lights'):
+        collection = standin_scene.create_collection(scene, name)
+        for i in range(2):
+            standin_scene.create_empty(scene, f'{name}.{i}', collection)
+
+    # the first export has no previous .gltf to read
+    base = export_scene(registered, scene, tmp_path / 'scene.gltf')
+    assert node_names(base) == ['Base']
+    assert [s["uri"] for s in base["extras"]["subScenes"]] == ['scene.Props.gltf', 'scene.Lights.gltf']
+    props = json.loads((tmp_path / 'scene.Props.gltf').read_text(encoding='utf-8'))
+    assert node_names(props) == ['Props.0', 'Props.1']
+
+    # the second export splits its own glTF, not the previous file
+    standin_scene.create_empty(scene, 'Props.2', scene.collection.children[0])
+    base = export_scene(registered, scene, tmp_path / 'scene.gltf')
+    assert node_names(base) == ['Base']
+    props = json.loads((tmp_path / 'scene.Props.gltf').read_text(encoding='utf-8'))
+    assert node_names(props) == ['Props.0', 'Props.1', 'Props.2']
@@ -0,0 +1,55 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import pytest
+
+from mpeg_standin import scene as standin_scene
+from mpeg_standin.export import create_export_settings
+from io_scene_gltf2_mpeg.exp.mpeg_media import MediaLibrary
+from io_scene_gltf2_mpeg.exp.mpeg_media_export import MediaJob
+from io_scene_gltf2_mpeg.exp.mpeg_settings import MPEG_SETTINGS, MPEGExportSettings
+from io_scene_gltf2_mpeg.exp.mpeg_shared_media import SharedMedia
+
+
+@pytest.fixture
+def shared():
+    SharedMedia.begin('media')
+    yield SharedMedia
+    SharedMedia.end()
+    MediaLibrary.reset()
+
+
+def export_media(scene, src, filepath):
+    # the media gathering of one export of the multi-scene export
+    MediaLibrary.reset()
+    export_settings = create_export_settings(filepath)
+    export_settings[MPEG_SETTINGS] = MPEGExportSettings.from_scene(scene)
+    speaker = standin_scene.create_speaker(scene, 'Speaker', str(src))
+    uri = MediaLibrary.get_audio_media(speaker.data.sound, export_settings).alternatives[-1].uri
+    SharedMedia.add(MediaLibrary.get_export_jobs(export_settings))
+    return uri
+
+
+def test_same_name_different_sources(registered, shared, tmp_path):
+    uris = []
+    for name in ('a', 'b', 'a'):
+        src = tmp_path / name / 'sound.mp3'
+        src.parent.mkdir(exist_ok=True)
+        src.write_bytes(name.encode())
+        # both scenes are named 'Scene'
+        uris.append(export_media(standin_scene.create_scene(), src, tmp_path / 'out' / 'Scene.gltf'))
+    assert uris == ['media/sound.mp3', 'media/sound.1.mp3', 'media/sound.mp3']
+    assert {job.name: job.src.parent.name for job in shared.jobs.values()} == {'sound.mp3': 'a', 'sound.1.mp3': 'b'}
+
+
+def test_conflicting_jobs(shared, tmp_path):
+    shared.add([MediaJob('sound.mp3', tmp_path / 'sound.mp3', src=tmp_path / 'a.mp3')])
+    with pytest.raises(ValueError):
+        shared.add([MediaJob('sound.mp3', tmp_path / 'sound.mp3', src=tmp_path / 'b.mp3')])
@@ -0,0 +1,67 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import numpy as np
+import pytest
+
+from io_scene_gltf2_mpeg.exp.mpeg_spatial_index import CELLS_PER_ENTRY, MIN_GRID_CELLS, build_grid
+
+
+def cell_entries(grid, x, y, z):
+    index = (z * grid.dims[1] + y) * grid.dims[0] + x
+    return grid.entries[grid.offsets[index]:grid.offsets[index + 1]].tolist()
+
+
+def overlapping(grid, centers, radii, x, y, z):
+    """
+    the spheres overlapping a cell, tested one by one
+    """
+    lo = grid.origin + np.array([x, y, z]) * grid.cell_size
+    nearest = np.clip(centers, lo, lo + grid.cell_size)
+    return np.flatnonzero(((nearest - centers) ** 2).sum(axis=1) <= radii ** 2).tolist()
+
+
+@pytest.mark.parametrize('count', [1, 7, 300])
+def test_grid_matches_brute_force(count):
+    rng = np.random.default_rng(count)
+    centers = rng.uniform(-50.0, 50.0, size=(count, 3))
+    radii = rng.uniform(0.0, 10.0, size=count)
+    grid = build_grid(centers, radii)
+
+    assert grid.dims.prod() <= max(MIN_GRID_CELLS, CELLS_PER_ENTRY * count)
+    assert len(grid.offsets) == grid.dims.prod() + 1
+    assert grid.offsets[-1] == len(grid.entries)
+    for x in range(grid.dims[0]):
+        for y in range(grid.dims[1]):
+            for z in range(grid.dims[2]):
+                assert cell_entries(grid, x, y, z) == overlapping(grid, centers, radii, x, y, z)
+
+
+def test_grid_covers_spheres():
+    rng = np.random.default_rng(1)
+    centers = rng.uniform(0.0, 20.0, size=(50, 3))
+    radii = rng.uniform(0.5, 3.0, size=50)
+    grid = build_grid(centers, radii)
+    # points inside a sphere are in a cell listing it
+    for i in range(len(radii)):
+        direction = rng.normal(size=(20, 3))
+        direction /= np.linalg.norm(direction, axis=1)[:, None]
+        points = centers[i] + direction * rng.uniform(0.0, radii[i], size=(20, 1))
+        cells = np.clip(((points - grid.origin) // grid.cell_size).astype(np.int64), 0, grid.dims - 1)
+        for cell in cells:
+            assert i in cell_entries(grid, *cell)
+
+
+def test_grid_of_points():
+    # zero radii in a flat extent still get a valid grid
+    centers = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+    grid = build_grid(centers, np.zeros(3))
+    assert grid.cell_size > 0.0
+    assert sorted(grid.entries.tolist()) == [0, 1, 2]
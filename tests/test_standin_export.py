@@ -0,0 +1,41 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+from pathlib import Path
+
+from mpeg_standin import scene as standin_scene
+from mpeg_standin.export import create_export_settings, export
+
+
+class RecordingExtension:
+
+    def __init__(self, events):
+        self.events = events
+
+    def gather_gltf_extensions_hook(self, gltf2_object, export_settings):
+        self.events.append(('extensions hook', _written(export_settings)))
+
+
+def _written(export_settings):
+    filepath = Path(export_settings['gltf_filepath'])
+    return {p.name for p in (filepath, filepath.with_suffix('.bin')) if p.exists()}
+
+
+def test_callbacks_order(tmp_path):
+    # io_scene_gltf2's save() runs the post export callbacks before writing the .gltf
+    events = []
+    scene = standin_scene.create_scene()
+    standin_scene.create_empty(scene, 'Empty')
+    export_settings = create_export_settings(tmp_path / 'scene.gltf')
+    export(scene, [], export_settings, [RecordingExtension(events)],
+           pre_export_callbacks=[lambda s: events.append(('pre', _written(s)))],
+           post_export_callbacks=[lambda s: events.append(('post', _written(s)))])
+    assert events == [('pre', set()), ('extensions hook', {'scene.bin'}), ('post', {'scene.bin'})]
+    assert (tmp_path / 'scene.gltf').exists()
@@ -0,0 +1,126 @@
+# Copyright (c) 2023 MotionSpell
+# Licensed under the License terms and conditions for use, reproduction,
+# and distribution of 5GMAG software (the “License”).
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at https://www.5g-mag.com/license .
+# Unless required by applicable law or agreed to in writing, software distributed under the License is
+# distributed on an “AS IS” BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+from io_scene_gltf2_mpeg.com.mpeg_validation import validate_gltf
+from io_scene_gltf2_mpeg.exp.mpeg_validation import MPEGValidationError, validate_export
+
+
+def audio_source(source_id, accessor=0):
+    return {"id": source_id, "type": "Object", "accessors": [accessor], "attenuation": "linearDistance",
+            "attenuationParameters": [1.0, 10.0]}
+
+
+GLTF = {
+    "extensions": {
+        "MPEG_media": {"media": [{"name": "video", "alternatives": [{"mimeType": "video/mp4", "uri": "video.mp4"}]}]},
+        "MPEG_anchor": {
+            "trackables": [{"type": 4, "markerNode": 1}, {"type": 0}],
+            "anchors": [{"trackable": 1, "requiresAnchoring": True}],
+        },
+    },
+    "accessors": [{}, {"extensions": {"MPEG_accessor_timed": {"immutable": True, "bufferView": 0}}}],
+    "bufferViews": [{}],
+    "buffers": [{"extensions": {"MPEG_buffer_circular": {"count": 2, "media": 0, "tracks": [0]}}}],
+    "textures": [{"extensions": {"MPEG_texture_video": {"accessor": 1, "width": 1920, "height": 1080, "format": "RGB"}}}],
+    "nodes": [
+        {"extensions": {"MPEG_audio_spatial": {"sources": [audio_source(0), audio_source(1)]}}},
+        {"extensions": {"MPEG_anchor": {"anchor": 0}}},
+        {"extensions": {"MPEG_audio_spatial": {"sources": [audio_source(2)]}}},
+    ],
+}
+
+
+def modified(path, value):
+    """
+    returns a copy of GLTF with the value at path (keys and indices) replaced, or removed if value is None
+    """
+    gltf = copy.deepcopy(GLTF)
+    parent = gltf
+    for key in path[:-1]:
+        parent = parent[key]
+    if value is None:
+        del parent[path[-1]]
+    else:
+        parent[path[-1]] = value
+    return gltf
+
+
+def test_valid():
+    assert validate_gltf(GLTF) == []
+
+
+@pytest.mark.parametrize('path, value, error', [
+    (("textures", 0, "extensions", "MPEG_texture_video", "width"), 0,
+     'textures[0].extensions.MPEG_texture_video.width: 0 out of range (minimum 1)'),
+    (("textures", 0, "extensions", "MPEG_texture_video", "width"), 1.5,
+     'textures[0].extensions.MPEG_texture_video.width: expected integer, got float'),
+    (("textures", 0, "extensions", "MPEG_texture_video", "format"), "YUV",
+     "textures[0].extensions.MPEG_texture_video.format: 'YUV' is not one of"),
+    (("textures", 0, "extensions", "MPEG_texture_video", "accessor"), 2,
+     'textures[0].extensions.MPEG_texture_video.accessor: accessors index 2 out of range, 2 accessors'),
+    (("textures", 0, "extensions", "MPEG_texture_video", "height"), None,
+     'textures[0].extensions.MPEG_texture_video: missing height'),
+    (("buffers", 0, "extensions", "MPEG_buffer_circular", "media"), 1,
+     'buffers[0].extensions.MPEG_buffer_circular.media: media index 1 out of range, 1 media'),
+    (("accessors", 1, "extensions", "MPEG_accessor_timed", "immutable"), 1,
+     'accessors[1].extensions.MPEG_accessor_timed.immutable: expected boolean, got int'),
+    (("extensions", "MPEG_media", "media", 0, "alternatives"), [],
+     'extensions.MPEG_media.media[0].alternatives: 0 items, expected 1..'),
+    (("extensions", "MPEG_anchor", "trackables", 0, "markerNode"), None,
+     'extensions.MPEG_anchor.trackables[0]: missing markerNode'),
+    (("extensions", "MPEG_anchor", "trackables", 0, "markerNode"), 3,
+     'extensions.MPEG_anchor.trackables[0].markerNode: nodes index 3 out of range, 3 nodes'),
+    (("nodes", 1, "extensions", "MPEG_anchor", "anchor"), 1,
+     'nodes[1].extensions.MPEG_anchor.anchor: anchors index 1 out of range, 1 anchors'),
+    (("nodes", 0, "extensions", "MPEG_audio_spatial", "sources", 1, "type"), True,
+     'nodes[0].extensions.MPEG_audio_spatial.sources[1].type: True is not one of'),
+])
+def test_invalid(path, value, error):
+    errors = validate_gltf(modified(path, value))
+    assert len(errors) == 1
+    assert errors[0].startswith(error)
+
+
+def test_duplicate_audio_source_ids():
+    gltf = modified(("nodes", 2, "extensions", "MPEG_audio_spatial", "sources", 0, "id"), 1)
+    assert validate_gltf(gltf) == [
+        'nodes[2].extensions.MPEG_audio_spatial.sources[0]: '
+        'audio source id 1 is already used by nodes[0].extensions.MPEG_audio_spatial.sources[1]'
+    ]
+
+
+def test_other_extensions_ignored():
+    gltf = modified(("textures", 0, "extensions", "KHR_texture_transform"), {"scale": "invalid"})
+    assert validate_gltf(gltf) == []
+
+
+def gathered(gltf):
+    """
+    the gathered glTF objects the exporter validates, with extensions already converted to dicts
+    """
+    def objects(key):
+        return [SimpleNamespace(extensions=o.get("extensions")) for o in gltf.get(key, [])]
+    return SimpleNamespace(extensions=gltf["extensions"], accessors=objects("accessors"),
+                           buffer_views=objects("bufferViews"), buffers=objects("buffers"),
+                           nodes=objects("nodes"), textures=objects("textures"))
+
+
+def test_validate_export_modes():
+    invalid = gathered(modified(("textures", 0, "extensions", "MPEG_texture_video", "width"), 0))
+    assert validate_export(invalid, 'OFF') == []
+    assert validate_export(gathered(GLTF), 'STRICT') == []
+    assert len(validate_export(invalid, 'WARN')) == 1
+    with pytest.raises(MPEGValidationError, match='1 invalid MPEG_\\* values'):
+        validate_export(invalid, 'STRICT')